@@ -88,8 +88,29 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("POSTGRES_HOST"),
         "PORT": os.getenv("POSTGRES_PORT"),
+        # Connections are kept open between the requests for CONN_MAX_AGE
+        # seconds (0 closes them after every request, "none" keeps them forever)
+        # and checked before reuse. Django 5.0 has no built-in pool, use
+        # pgbouncer in front of postgres if the processes need more connections.
+        "CONN_MAX_AGE": (
+            None
+            if os.getenv("CONN_MAX_AGE", "60").lower() == "none"
+            else int(os.getenv("CONN_MAX_AGE", 60))
+        ),
+        "CONN_HEALTH_CHECKS": os.getenv("CONN_HEALTH_CHECKS", "true").lower() == "true",
     }
 }
+# The reports, the exports and the admin lists are read from the replica if it
+# is configured, or from the primary while the replica lags more than the limit.
+if os.getenv("POSTGRES_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.getenv("POSTGRES_REPLICA_HOST"),
+        "PORT": os.getenv("POSTGRES_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["telegram_bot.db_routers.ReplicaRouter"]
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 10))
 
 
 # Password validation
@@ -136,4 +157,80 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 ADMIN_USER_IDS = []
 
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", 60 * 30))
+# Refresh the session TTL on every answer instead of counting it from the start.
+SESSION_TTL_SLIDING = os.getenv("SESSION_TTL_SLIDING", "false").lower() == "true"
+# RedisSessionStore, NearCacheRedisSessionStore (RedisSessionStore with a per process
+# cache of the sessions), InMemorySessionStore (single node only) or PostgresSessionStore.
+SESSION_STORE_BACKEND = os.getenv(
+    "SESSION_STORE_BACKEND", "telegram_bot.session_stores.RedisSessionStore"
+)
+SESSION_STORE_MAX_ENTRIES = int(os.getenv("SESSION_STORE_MAX_ENTRIES", 10000))
+
+# All keys of the bot are namespaced with the prefix, see telegram_bot.redis_keys.
+REDIS_KEY_PREFIX = os.getenv("REDIS_KEY_PREFIX", "hsb")
+REDIS_CLUSTER_MODE = os.getenv("REDIS_CLUSTER_MODE", "false").lower() == "true"
+# Processing state of an update, so a redelivered or replayed update is not
+# processed twice.
+UPDATE_IDEMPOTENCY_TTL_SECONDS = int(
+    os.getenv("UPDATE_IDEMPOTENCY_TTL_SECONDS", 7 * 24 * 60 * 60)
+)
+# The updates of a user are processed one at a time by the update workers.
+USER_LOCK_TIMEOUT_SECONDS = int(os.getenv("USER_LOCK_TIMEOUT_SECONDS", 60))
+
+# Reports are generated by the run_report_worker command. Identical requests
+# made before the report is sent are attached to the same job.
+REPORT_JOB_TIMEOUT_SECONDS = int(os.getenv("REPORT_JOB_TIMEOUT_SECONDS", 60 * 60))
+# ReportGenerator, CopyReportGenerator, which formats the rows in postgres, or
+# ParallelReportGenerator, which generates parts of the date range in processes.
+REPORT_GENERATOR = os.getenv(
+    "REPORT_GENERATOR", "telegram_bot.report_generator.ReportGenerator"
+)
+REPORT_GENERATION_PROCESSES = int(
+    os.getenv("REPORT_GENERATION_PROCESSES", os.cpu_count() or 1)
+)
+# Generated reports are kept until HeroData within their date range changes.
+# The least recently used ones are removed above the size limit.
+REPORT_CACHE_DIRECTORY = os.getenv(
+    "REPORT_CACHE_DIRECTORY", os.path.join(BASE_DIR, "report_cache")
+)
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", 500 * 1024 * 1024))
+# "gzip", "zip" or empty to send the csv as is. Reports larger than the part
+# size are split into parts, telegram bots can not send documents above 50 MB.
+REPORT_COMPRESSION = os.getenv("REPORT_COMPRESSION", "")
+REPORT_MAX_PART_BYTES = int(os.getenv("REPORT_MAX_PART_BYTES", 49 * 1000 * 1000))
+
+# Webhook updates are appended to a redis stream and processed by the
+# run_update_worker processes instead of the web process.
+UPDATE_QUEUE = os.getenv("UPDATE_QUEUE", "false").lower() == "true"
+UPDATE_QUEUE_MAX_LENGTH = int(os.getenv("UPDATE_QUEUE_MAX_LENGTH", 100_000))
+# Updates not acknowledged by a worker for this long, e.g. since the worker
+# crashed, are claimed by another one.
+UPDATE_QUEUE_CLAIM_IDLE_SECONDS = int(os.getenv("UPDATE_QUEUE_CLAIM_IDLE_SECONDS", 60))
+UPDATE_QUEUE_MAX_DELIVERIES = int(os.getenv("UPDATE_QUEUE_MAX_DELIVERIES", 5))
+
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
+# Threads sending the telegram requests made alongside the response, e.g. the
+# inline keyboard removal.
+TELEGRAM_REQUESTS_MAX_WORKERS = int(os.getenv("TELEGRAM_REQUESTS_MAX_WORKERS", 8))
+# Registered by set_webhook, telegram sends it in every webhook request.
+# 1-256 characters, A-Z, a-z, 0-9, _ and -. Empty to accept all requests.
+TELEGRAM_WEBHOOK_SECRET_TOKEN = os.getenv("TELEGRAM_WEBHOOK_SECRET_TOKEN", "")
+# Webhook requests are handled before the django middlewares and url resolving.
+LEAN_WEBHOOK = os.getenv("LEAN_WEBHOOK", "true").lower() == "true"
+
 LOGS_DIRECTORY = os.getenv("LOGS_DIRECTORY", os.path.join(BASE_DIR, "logs"))
+# "text" or "json"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_ENQUEUE = os.getenv("LOG_ENQUEUE", "false").lower() == "true"
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "1"))
+LOG_REDACT_PERSONAL_DATA = (
+    os.getenv("LOG_REDACT_PERSONAL_DATA", "true").lower() == "true"
+)
+
+# Share of updates profiled with cProfile, from 0 to 1. Admins can also enable
+# profiling of the next N updates with the /profile_<N> bot command.
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+# Every profiled update writes a file, so N is limited.
+PROFILING_MAX_UPDATES_COUNT = int(os.getenv("PROFILING_MAX_UPDATES_COUNT", 100))
+PROFILES_DIRECTORY = os.getenv("PROFILES_DIRECTORY", os.path.join(BASE_DIR, "profiles"))
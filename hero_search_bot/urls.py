@@ -18,10 +18,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
-from telegram_bot import api_urls
+from telegram_bot import api_urls, views
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics/", views.metrics, name="metrics"),
     path(
         "api/",
         include(
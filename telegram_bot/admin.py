@@ -1,10 +1,26 @@
 from django.contrib import admin
 
-from telegram_bot.models import HeroData, TelegramUser
+from telegram_bot.db_routers import use_replica
+from telegram_bot.models import FailedUpdate, HeroData, TelegramUser
+
+
+class ReplicaChangeListAdmin(admin.ModelAdmin):
+    # The lists and the search are read from the replica. The response is
+    # rendered within the block, the page of the results is queried there.
+    # Actions and the change forms use the primary.
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != "GET":
+            return super().changelist_view(request, extra_context)
+        with use_replica():
+            response = super().changelist_view(request, extra_context)
+            if hasattr(response, "render"):
+                response.render()
+        return response
 
 
 @admin.register(TelegramUser)
-class TelegramUserAdmin(admin.ModelAdmin):
+class TelegramUserAdmin(ReplicaChangeListAdmin):
     list_display = (
         "id",
         "telegram_id",
@@ -22,7 +38,7 @@ class TelegramUserAdmin(admin.ModelAdmin):
 
 
 @admin.register(HeroData)
-class HeroDataAdmin(admin.ModelAdmin):
+class HeroDataAdmin(ReplicaChangeListAdmin):
     list_display = (
         "case_id",
         "hero_last_name",
@@ -45,7 +61,24 @@ class HeroDataAdmin(admin.ModelAdmin):
         "relative_last_name",
         "relative_first_name",
         "relative_patronymic",
-        "author",
+        "author__username",
     )
 
     raw_id_fields = ("author",)
+
+
+@admin.register(FailedUpdate)
+class FailedUpdateAdmin(ReplicaChangeListAdmin):
+    list_display = (
+        "id",
+        "update_id",
+        "processor",
+        "exception_type",
+        "side_effects_started",
+        "created_at",
+        "replay_count",
+        "replayed_at",
+    )
+    list_filter = ("processor", "exception_type", "side_effects_started")
+    search_fields = ("update_id", "exception_message")
+    readonly_fields = ("created_at",)
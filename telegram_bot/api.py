@@ -3,20 +3,24 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
-from telegram_bot.logger_config import logger
-from telegram_bot.message_handling_services import MessageHandler
+from telegram_bot.logger_config import log_payload, logger
+from telegram_bot.permissions import TelegramSecretTokenPermission
 from telegram_bot.serializers import TelegramBotSerializer
+from telegram_bot.update_filter import reject_unsupported_update
+from telegram_bot.update_queue import handle_update
 
 
 class TelegramBotApiView(GenericViewSet):
     serializer_class = TelegramBotSerializer
+    permission_classes = [TelegramSecretTokenPermission]
 
     @logger.catch
     @action(methods=["POST"], detail=False)
     def user_message(self, request):
-        logger.info(f"Received request with data: {request.data}")
+        if reject_unsupported_update(request.data):
+            return Response(status=status.HTTP_200_OK)
+        log_payload("Received request with data", request.data)
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        handler = MessageHandler(telegram_message=self.request.data)
-        handler.handle_telegram_message()
+        handle_update(self.request.data)
         return Response(status=status.HTTP_200_OK)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class LongpollingTelegramBotConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "telegram_bot"
+
+    def ready(self):
+        from telegram_bot import signals  # noqa: F401
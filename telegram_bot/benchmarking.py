@@ -0,0 +1,59 @@
+import statistics
+import time
+from typing import Callable
+
+
+def measure_durations(func: Callable, iterations: int) -> list[float]:
+    durations = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started_at)
+    return durations
+
+
+def summarize_durations(durations: list[float]) -> dict[str, float]:
+    ordered_durations = sorted(durations)
+
+    def percentile(value: float) -> float:
+        index = min(len(ordered_durations) - 1, int(len(ordered_durations) * value))
+        return ordered_durations[index]
+
+    return {
+        "count": len(ordered_durations),
+        "mean_ms": statistics.fmean(ordered_durations) * 1000,
+        "p50_ms": percentile(0.50) * 1000,
+        "p95_ms": percentile(0.95) * 1000,
+        "p99_ms": percentile(0.99) * 1000,
+        "max_ms": ordered_durations[-1] * 1000,
+    }
+
+
+def format_summary(label: str, summary: dict[str, float]) -> str:
+    return (
+        f"{label}: count={summary['count']} mean={summary['mean_ms']:.3f}ms "
+        f"p50={summary['p50_ms']:.3f}ms p95={summary['p95_ms']:.3f}ms "
+        f"p99={summary['p99_ms']:.3f}ms max={summary['max_ms']:.3f}ms"
+    )
+
+
+def build_text_message_update(update_id: int, chat_id: int, text: str) -> dict:
+    user = {
+        "id": chat_id,
+        "is_bot": False,
+        "first_name": "Benchmark",
+        "last_name": "User",
+        "username": f"benchmark_user_{chat_id}",
+    }
+    message = {
+        "message_id": update_id,
+        "from": user,
+        "chat": {**user, "type": "private"},
+        "date": int(time.time()),
+        "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [
+            {"offset": 0, "length": len(text), "type": "bot_command"}
+        ]
+    return {"update_id": update_id, "message": message}
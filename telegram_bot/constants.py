@@ -8,7 +8,7 @@ from telegram_bot.messages_texts import *
 
 load_dotenv(os.path.join(settings.BASE_DIR, ".env"))
 
-BASE_URL: Final = f"https://api.telegram.org/bot{os.getenv('BOT_TOKEN')}/"
+BASE_URL: Final = f"{settings.TELEGRAM_API_URL}/bot{os.getenv('BOT_TOKEN')}/"
 
 ORDER_OF_MESSAGES: Final = (
     "case_id",
@@ -42,9 +42,14 @@ MESSAGES_MAPPING: Final = {
 MESSAGE_TEXT_VALIDATION_FAILED: Final = (
     "Дані в попередньому повідомленні мають неправельний формат. Спробуйте ще раз."
 )
-MESSAGE_USER_INPUT_EXPIRED = Final = (
-    "Для вводу всіх даних у вас є 30 хв. Так як не всі дані були подані, ми їх видалили. Будь ласка почніть від початку."
+MESSAGE_USER_INPUT_EXPIRED: Final = (
+    f"Для вводу всіх даних у вас є {settings.SESSION_TTL_SECONDS // 60} хв. Так як не всі дані були подані, ми їх видалили. Будь ласка почніть від початку."
 )
 
 
 DATE_FORMAT: Final = "%d-%m-%Y"
+
+CSV_REPORT_FORMAT: Final = "csv"
+XLSX_REPORT_FORMAT: Final = "xlsx"
+PARQUET_REPORT_FORMAT: Final = "parquet"
+REPORT_FORMATS: Final = (CSV_REPORT_FORMAT, XLSX_REPORT_FORMAT, PARQUET_REPORT_FORMAT)
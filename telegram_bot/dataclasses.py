@@ -1,6 +1,8 @@
+import datetime
 import json
 from dataclasses import dataclass
 
+from telegram_bot.constants import CSV_REPORT_FORMAT, DATE_FORMAT
 from telegram_bot.enums import ChatType, MessageType, UserActionType
 from telegram_bot.types import ResponsePayload
 
@@ -64,3 +66,33 @@ class ResponseMessage:
 class ChatData:
     id: int
     type: ChatType
+
+
+@dataclass(frozen=True)
+class ReportJob:
+    start_date: datetime.date
+    end_date: datetime.date
+    report_format: str = CSV_REPORT_FORMAT
+
+    @property
+    def id(self) -> str:
+        return (
+            f"{self.start_date.strftime(DATE_FORMAT)}_"
+            f"{self.end_date.strftime(DATE_FORMAT)}_{self.report_format}"
+        )
+
+    @classmethod
+    def from_id(cls, job_id: str) -> "ReportJob":
+        start_date, end_date, report_format = job_id.split("_")
+        return cls(
+            start_date=datetime.datetime.strptime(start_date, DATE_FORMAT).date(),
+            end_date=datetime.datetime.strptime(end_date, DATE_FORMAT).date(),
+            report_format=report_format,
+        )
+
+
+@dataclass
+class CachedReport:
+    # The report may be split into several files, sent as separate documents.
+    file_paths: list[str]
+    file_ids: list[str] | None = None
@@ -0,0 +1,107 @@
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from telegram_bot.logger_config import logger
+
+PRIMARY_DATABASE = "default"
+REPLICA_DATABASE = "replica"
+REPLICA_LAG_CHECK_INTERVAL = 5.0
+
+read_database: ContextVar[str | None] = ContextVar("read_database", default=None)
+
+
+class ReplicaState:
+    def __init__(self):
+        self.usable = False
+        self.checked_at = None
+
+    @staticmethod
+    def _get_lag() -> float:
+        # Zero if the replica replayed everything it received, e.g. when no
+        # writes happen on the primary, NULL if it is not a replica at all.
+        # A replica disconnected from the primary replayed everything it
+        # received as well, its lag is unknown.
+        with connections[REPLICA_DATABASE].cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT
+                    pg_is_in_recovery() AND NOT EXISTS (
+                        SELECT FROM pg_stat_wal_receiver WHERE status = 'streaming'
+                    ),
+                    CASE
+                        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+                        THEN 0
+                        ELSE EXTRACT(
+                            EPOCH FROM now() - pg_last_xact_replay_timestamp()
+                        )
+                    END
+                """
+            )
+            disconnected, lag = cursor.fetchone()
+        if disconnected:
+            logger.warning("Replica is not streaming the WAL from the primary.")
+            return math.inf
+        return float(lag or 0)
+
+    def _check(self):
+        try:
+            lag = self._get_lag()
+        except DatabaseError as e:
+            logger.error(f"Replica lag check failed: {e}")
+            self.usable = False
+            return
+        self.usable = lag <= settings.REPLICA_MAX_LAG_SECONDS
+        if not self.usable:
+            logger.warning(f"Replica lags {lag:.1f}s, reading from the primary.")
+
+    def is_usable(self) -> bool:
+        now = time.monotonic()
+        if self.checked_at is None or now - self.checked_at >= (
+            REPLICA_LAG_CHECK_INTERVAL
+        ):
+            self.checked_at = now
+            self._check()
+        return self.usable
+
+
+replica_state = ReplicaState()
+
+
+def get_read_database() -> str:
+    if REPLICA_DATABASE in settings.DATABASES and replica_state.is_usable():
+        return REPLICA_DATABASE
+    return PRIMARY_DATABASE
+
+
+@contextmanager
+def use_replica():
+    # The reads made within the block go to the replica, unless it lags.
+    # The database is chosen once for the block and returned, so all the
+    # reads of the block, also of the forked processes, use the same one.
+    token = read_database.set(get_read_database())
+    try:
+        yield read_database.get()
+    finally:
+        read_database.reset(token)
+
+
+class ReplicaRouter:
+    # Only the reads of the reports, the exports and the admin lists may be
+    # stale, so the replica is used within use_replica() blocks only.
+
+    def db_for_read(self, model, **hints):
+        return read_database.get() or PRIMARY_DATABASE
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY_DATABASE
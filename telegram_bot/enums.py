@@ -41,3 +41,11 @@ class MessageType(IntEnum):
         elif message.get("text"):
             return cls.MESSAGE
         raise NotImplementedError
+
+
+class UpdateKind(IntEnum):
+    SUPPORTED = 1
+    # A message without text, e.g. a photo, a sticker or a voice note.
+    UNSUPPORTED_MESSAGE = 2
+    # An update type the bot does not handle, e.g. a poll or a channel post.
+    UNSUPPORTED_UPDATE = 3
@@ -18,11 +18,32 @@ class UnauthorizedUserCalledReportGenerationException(Exception):
         self.message = message
 
 
+class UnauthorizedUserCalledAdminCommandException(Exception):
+    def __init__(self, message="Unauthorized user called an admin command."):
+        self.message = message
+
+
 class UserInputExpiredException(Exception):
     def __init__(self):
         self.message = "User input in the memory is expired and deleted."
 
 
+class CommandValidationFailedException(Exception):
+    # The message is sent to the user as the response to the command.
+    def __init__(self, message: str):
+        self.message = message
+
+
 class UserMessageValidationFailedException(Exception):
     def __init__(self):
         self.message = "User input validation failed."
+
+
+class UpdateDeliveriesExceededException(Exception):
+    def __init__(self, deliveries: int):
+        self.message = f"Update worker stopped during all {deliveries} deliveries."
+
+
+class UpdateInterruptedException(Exception):
+    def __init__(self):
+        self.message = "Update worker stopped while processing the update."
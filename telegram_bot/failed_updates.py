@@ -0,0 +1,142 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.db.models import F, QuerySet
+from django.utils import timezone
+from redis.exceptions import LockError
+
+from telegram_bot.logger_config import logger
+from telegram_bot.message_handling_services import MessageHandler
+from telegram_bot.models import FailedUpdate
+from telegram_bot.update_guards import (
+    UPDATE_DONE,
+    UPDATE_PROCESSING,
+    UPDATE_SIDE_EFFECTS_STARTED,
+    claim_update,
+    complete_update,
+    get_update_state,
+    get_update_user_id,
+    guard_update,
+    release_update,
+    user_lock,
+)
+
+
+def _replay_claimed_update(
+    failed_update: FailedUpdate, user_id: int, update_id: int
+) -> bool:
+    handler = MessageHandler(
+        telegram_message=failed_update.update, raise_exceptions=True
+    )
+    try:
+        with guard_update(user_id, update_id):
+            handler.handle_telegram_message()
+    except Exception as e:
+        if not handler.side_effects_started:
+            release_update(user_id, update_id)
+        FailedUpdate.objects.filter(pk=failed_update.pk).update(
+            replay_count=F("replay_count") + 1,
+            exception_type=e.__class__.__name__,
+            exception_message=getattr(e, "message", str(e)),
+            stage_durations=handler.stage_durations,
+            side_effects_started=handler.side_effects_started,
+        )
+        return False
+    complete_update(user_id, update_id)
+    FailedUpdate.objects.filter(pk=failed_update.pk).update(
+        replay_count=F("replay_count") + 1, replayed_at=timezone.now()
+    )
+    return True
+
+
+def replay_failed_update(failed_update: FailedUpdate) -> bool:
+    # Guarded as in the update workers: under the user lock and with the
+    # idempotency key, so an update is not processed twice.
+    user_id = get_update_user_id(failed_update.update) or 0
+    update_id = failed_update.update["update_id"]
+    try:
+        with user_lock(user_id):
+            if claim_update(user_id, update_id):
+                return _replay_claimed_update(failed_update, user_id, update_id)
+            update_state = get_update_state(user_id, update_id)
+            if update_state == UPDATE_PROCESSING:
+                # A worker stopped before any side effect of the update.
+                return _replay_claimed_update(failed_update, user_id, update_id)
+            if update_state == UPDATE_DONE:
+                # Processed since it failed, e.g. delivered again by Telegram.
+                FailedUpdate.objects.filter(pk=failed_update.pk).update(
+                    replayed_at=timezone.now()
+                )
+                return True
+            if update_state == UPDATE_SIDE_EFFECTS_STARTED:
+                # Interrupted after a side effect since it was stored.
+                FailedUpdate.objects.filter(pk=failed_update.pk).update(
+                    side_effects_started=True
+                )
+                logger.warning(
+                    f"Failed update {failed_update.pk} not replayed, it was "
+                    "interrupted after its first side effect."
+                )
+                return False
+    except LockError as e:
+        logger.warning(f"Failed update {failed_update.pk} not replayed: {e}")
+        return False
+    logger.warning(f"Failed update {failed_update.pk} not replayed, it was released.")
+    return False
+
+
+def _replay_user_failed_updates(failed_updates: list[FailedUpdate]) -> int:
+    # The updates of a user are replayed in the order they were received, the
+    # ones after a failed update are left for the next replay.
+    replayed_count = 0
+    try:
+        for failed_update in failed_updates:
+            if not replay_failed_update(failed_update):
+                break
+            replayed_count += 1
+    finally:
+        # The thread opens its own database connection.
+        connections.close_all()
+    return replayed_count
+
+
+def replay_failed_updates(
+    failed_updates: QuerySet[FailedUpdate], batch_size: int, concurrency: int
+) -> tuple[int, int]:
+    # Returns the numbers of the replayed and of the not replayed updates.
+    # The updates of different users are replayed concurrently. The updates
+    # failed after their processing started are left for a manual check.
+    failed_updates = failed_updates.filter(side_effects_started=False)
+    replayed_count = failed_count = 0
+    last_id = 0
+    # Later updates of these users are not replayed before the failed one.
+    failed_user_ids = set()
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="replay"
+    ) as executor:
+        while True:
+            batch = list(
+                failed_updates.filter(id__gt=last_id).order_by("id")[:batch_size]
+            )
+            if not batch:
+                return replayed_count, failed_count
+            last_id = batch[-1].id
+            updates_by_user = defaultdict(list)
+            for failed_update in batch:
+                user_id = get_update_user_id(failed_update.update)
+                if user_id in failed_user_ids:
+                    failed_count += 1
+                else:
+                    updates_by_user[user_id].append(failed_update)
+            for (user_id, user_updates), user_replayed_count in zip(
+                updates_by_user.items(),
+                executor.map(_replay_user_failed_updates, updates_by_user.values()),
+            ):
+                replayed_count += user_replayed_count
+                if user_replayed_count < len(user_updates):
+                    failed_user_ids.add(user_id)
+                    failed_count += len(user_updates) - user_replayed_count
+            logger.info(
+                f"Replayed {replayed_count} failed updates, {failed_count} not replayed."
+            )
@@ -0,0 +1,174 @@
+import asyncio
+import itertools
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from aiohttp import web
+
+
+@dataclass
+class FakeTelegramApiConfig:
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: int = 1
+
+
+class FakeTelegramApi:
+    def __init__(self, config: FakeTelegramApiConfig | None = None):
+        self.config = config or FakeTelegramApiConfig()
+        self.webhook_url = ""
+        self.updates: list[dict] = []
+        self.calls_count = Counter()
+        self.responses_count = Counter()
+        self.uploaded_bytes = 0
+        self._message_ids = itertools.count(1)
+        self._file_ids = itertools.count(1)
+        self._methods = {
+            "sendMessage": self._send_message,
+            "sendDocument": self._send_document,
+            "editMessageReplyMarkup": self._edit_message_reply_markup,
+            "setWebhook": self._set_webhook,
+            "getUpdates": self._get_updates,
+        }
+
+    def make_app(self) -> web.Application:
+        app = web.Application(client_max_size=100 * 1024**2)
+        app.router.add_route("*", "/bot{token}/{method}", self._handle_method)
+        app.router.add_post("/_fake/updates", self._push_updates)
+        app.router.add_get("/_fake/stats", self._get_stats)
+        return app
+
+    async def _handle_method(self, request: web.Request) -> web.Response:
+        method_name = request.match_info["method"]
+        self.calls_count[method_name] += 1
+        await self._simulate_latency()
+
+        method = self._methods.get(method_name)
+        if method is None:
+            return self._error_response(404, "Not Found")
+        if (
+            self.config.rate_limit_rate
+            and random.random() < self.config.rate_limit_rate
+        ):
+            return self._error_response(
+                429,
+                f"Too Many Requests: retry after {self.config.retry_after}",
+                parameters={"retry_after": self.config.retry_after},
+            )
+        if self.config.error_rate and random.random() < self.config.error_rate:
+            return self._error_response(500, "Internal Server Error")
+
+        data = await self._read_request_data(request)
+        return await method(data)
+
+    async def _simulate_latency(self):
+        delay = self.config.latency
+        if self.config.latency_jitter:
+            delay += random.uniform(0, self.config.latency_jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _read_request_data(self, request: web.Request) -> dict:
+        if request.content_type == "application/json":
+            return await request.json()
+        if request.content_type == "multipart/form-data":
+            data = {}
+            reader = await request.multipart()
+            while part := await reader.next():
+                if part.filename:
+                    size = 0
+                    while chunk := await part.read_chunk():
+                        size += len(chunk)
+                    self.uploaded_bytes += size
+                    data[part.name] = {"file_name": part.filename, "file_size": size}
+                else:
+                    data[part.name] = await part.text()
+            return data
+        return dict(await request.post()) or dict(request.query)
+
+    def _ok_response(self, result) -> web.Response:
+        self.responses_count[200] += 1
+        return web.json_response({"ok": True, "result": result})
+
+    def _error_response(
+        self, error_code: int, description: str, parameters: dict | None = None
+    ) -> web.Response:
+        self.responses_count[error_code] += 1
+        payload = {"ok": False, "error_code": error_code, "description": description}
+        if parameters:
+            payload["parameters"] = parameters
+        return web.json_response(payload, status=error_code)
+
+    def _get_message_result(self, data: dict) -> dict:
+        return {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": int(data.get("chat_id", 0)), "type": "private"},
+        }
+
+    async def _send_message(self, data: dict) -> web.Response:
+        if not data.get("chat_id") or not data.get("text"):
+            return self._error_response(400, "Bad Request: message text is empty")
+        result = self._get_message_result(data)
+        result["text"] = data["text"]
+        return self._ok_response(result)
+
+    async def _send_document(self, data: dict) -> web.Response:
+        document = data.get("document")
+        if not data.get("chat_id") or not document:
+            return self._error_response(400, "Bad Request: there is no document")
+        result = self._get_message_result(data)
+        if isinstance(document, dict):
+            result["document"] = {
+                "file_id": f"fake_file_{next(self._file_ids)}",
+                "file_name": document["file_name"],
+                "file_size": document["file_size"],
+            }
+        else:
+            result["document"] = {"file_id": document}
+        return self._ok_response(result)
+
+    async def _edit_message_reply_markup(self, data: dict) -> web.Response:
+        if not data.get("chat_id") or not data.get("message_id"):
+            return self._error_response(400, "Bad Request: message to edit not found")
+        result = self._get_message_result(data)
+        result["message_id"] = int(data["message_id"])
+        return self._ok_response(result)
+
+    async def _set_webhook(self, data: dict) -> web.Response:
+        self.webhook_url = data.get("url", "")
+        return self._ok_response(True)
+
+    async def _get_updates(self, data: dict) -> web.Response:
+        if self.webhook_url:
+            return self._error_response(
+                409,
+                "Conflict: can't use getUpdates method while webhook is active",
+            )
+        offset = int(data.get("offset", 0))
+        limit = int(data.get("limit", 100))
+        if offset:
+            self.updates = [
+                update for update in self.updates if update["update_id"] >= offset
+            ]
+        return self._ok_response(self.updates[:limit])
+
+    async def _push_updates(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        self.updates.extend(payload if isinstance(payload, list) else [payload])
+        return web.json_response({"ok": True, "result": len(self.updates)})
+
+    async def _get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "calls": dict(self.calls_count),
+                "responses": {
+                    str(status): count for status, count in self.responses_count.items()
+                },
+                "uploaded_bytes": self.uploaded_bytes,
+            }
+        )
@@ -1,12 +1,73 @@
+import dataclasses
 import os.path
+import random
+import sys
 
 from django.utils.timezone import now
 from loguru import logger
 
-from hero_search_bot.settings import LOGS_DIRECTORY
-
-logger.add(
-    os.path.join(LOGS_DIRECTORY, f"log_{now().date()}.log"),
-    rotation="1 day",
-    retention="1 week",
+from hero_search_bot.settings import (
+    DEBUG,
+    LOG_ENQUEUE,
+    LOG_FORMAT,
+    LOG_PAYLOAD_SAMPLE_RATE,
+    LOG_REDACT_PERSONAL_DATA,
+    LOGS_DIRECTORY,
 )
+
+REDACTED_VALUE = "<redacted>"
+PERSONAL_DATA_KEYS = frozenset(("first_name", "last_name", "username", "text"))
+
+_serialize = False
+
+
+def configure_logger(log_format: str = LOG_FORMAT, enqueue: bool = LOG_ENQUEUE):
+    global _serialize
+    _serialize = serialize = log_format == "json"
+    # The variables of the traceback frames, e.g. the telegram message, are not
+    # logged with the exceptions, they are not redacted.
+    sink_options = {
+        "serialize": serialize,
+        "enqueue": enqueue,
+        "diagnose": False,
+        "backtrace": DEBUG,
+    }
+    logger.remove()
+    logger.add(sys.stderr, **sink_options)
+    logger.add(
+        os.path.join(LOGS_DIRECTORY, f"log_{now().date()}.log"),
+        rotation="1 day",
+        retention="1 week",
+        **sink_options,
+    )
+
+
+def redact_personal_data(payload):
+    if dataclasses.is_dataclass(payload) and not isinstance(payload, type):
+        payload = dataclasses.asdict(payload)
+    if isinstance(payload, dict):
+        return {
+            key: (
+                REDACTED_VALUE
+                if key in PERSONAL_DATA_KEYS and value
+                else redact_personal_data(value)
+            )
+            for key, value in payload.items()
+        }
+    if isinstance(payload, (list, tuple)):
+        return [redact_personal_data(value) for value in payload]
+    return payload
+
+
+def log_payload(message: str, payload, sample_rate: float = LOG_PAYLOAD_SAMPLE_RATE):
+    if sample_rate < 1 and random.random() >= sample_rate:
+        return
+    if LOG_REDACT_PERSONAL_DATA:
+        payload = redact_personal_data(payload)
+    if _serialize:
+        logger.bind(payload=payload).info(message)
+    else:
+        logger.info(f"{message}: {payload}")
+
+
+configure_logger()
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+
+from telegram_bot.benchmarking import (
+    format_summary,
+    measure_durations,
+    summarize_durations,
+)
+from telegram_bot.models import TelegramUser
+
+BENCHMARK_TELEGRAM_ID = -2
+# CONN_MAX_AGE and CONN_HEALTH_CHECKS of the compared modes.
+CONNECTION_MODES = {
+    "new connection per update": (0, False),
+    "persistent connection": (60, False),
+    "persistent connection with health checks": (60, True),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the database latency of an update, the TelegramUser "
+        "get_or_create run by the webhook, with a new connection per request "
+        "and with persistent connections."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=1000)
+
+    @staticmethod
+    def _process_update():
+        # The request signals close the connection or check it, as in the webhook.
+        request_started.send(sender=Command)
+        try:
+            TelegramUser.objects.get_or_create(
+                telegram_id=BENCHMARK_TELEGRAM_ID,
+                defaults={"first_name": "Benchmark"},
+            )
+        finally:
+            request_finished.send(sender=Command)
+
+    def handle(self, *args, **options):
+        initial_settings = {
+            key: connection.settings_dict[key]
+            for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS")
+        }
+        try:
+            for mode, (conn_max_age, health_checks) in CONNECTION_MODES.items():
+                connection.close()
+                connection.settings_dict["CONN_MAX_AGE"] = conn_max_age
+                connection.settings_dict["CONN_HEALTH_CHECKS"] = health_checks
+                durations = measure_durations(
+                    self._process_update, options["iterations"]
+                )
+                self.stdout.write(format_summary(mode, summarize_durations(durations)))
+        finally:
+            connection.close()
+            connection.settings_dict.update(initial_settings)
+            TelegramUser.objects.filter(telegram_id=BENCHMARK_TELEGRAM_ID).delete()
@@ -0,0 +1,185 @@
+import datetime
+import os
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+from django.utils.timezone import now
+
+from telegram_bot.models import HeroData, TelegramUser
+from telegram_bot.report_cache import report_cache
+
+REPORT_GENERATORS = (
+    "telegram_bot.report_generator.ReportGenerator",
+    "telegram_bot.report_generator.CopyReportGenerator",
+    "telegram_bot.report_generator.ParallelReportGenerator",
+    "telegram_bot.report_generator.XlsxReportGenerator",
+    "telegram_bot.parquet_export.ParquetReportGenerator",
+)
+BENCHMARK_TELEGRAM_ID = -1
+BENCHMARK_DATABASE_NAME_MARKERS = ("test", "benchmark")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the report generation time of the report generators on "
+        "generated HeroData rows spread over the given number of days. The rows "
+        "are committed, so the parallel generator sees them, and deleted afterwards. "
+        "Runs only against a test or benchmark database, named with --database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            type=str,
+            required=True,
+            help="Name of the configured default database. It must contain "
+            "'test' or 'benchmark'.",
+        )
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--days", type=int, default=3 * 365)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument(
+            "--generator",
+            type=str,
+            action="append",
+            default=None,
+            help="Dotted path of the generator. Can be passed multiple times. "
+            "Defaults to all generators.",
+        )
+        parser.add_argument(
+            "--memory",
+            action="store_true",
+            help="Trace the peak python memory allocated by the generators. "
+            "Slows the generation down, the processes of the parallel generator "
+            "are not traced.",
+        )
+
+    @transaction.atomic
+    def _create_rows(self, rows: int, days: int, batch_size: int) -> TelegramUser:
+        author = TelegramUser.objects.create(
+            telegram_id=BENCHMARK_TELEGRAM_ID, first_name="Benchmark"
+        )
+        for batch_start in range(0, rows, batch_size):
+            HeroData.objects.bulk_create(
+                HeroData(
+                    case_id=str(row_number),
+                    hero_last_name="Прізвище",
+                    hero_first_name="Ім'я",
+                    hero_patronymic="По батькові",
+                    hero_date_of_birth=datetime.date(1990, 1, 2),
+                    item_used_for_dna_extraction="Зубна щітка",
+                    relative_last_name="Прізвище",
+                    relative_first_name="Ім'я",
+                    relative_patronymic="По батькові",
+                    is_added_to_dna_db=row_number % 2 == 0,
+                    comment="Ні" if row_number % 3 else "Коментар",
+                    author=author,
+                )
+                for row_number in range(
+                    batch_start, min(batch_start + batch_size, rows)
+                )
+            )
+        # created_at is set by auto_now_add on create.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {HeroData._meta.db_table}
+                SET created_at = created_at - (id %% %s) * interval '1 day'
+                WHERE author_id = %s
+                """,
+                [days, author.id],
+            )
+        return author
+
+    @staticmethod
+    def _check_database(database: str):
+        configured_database = connection.settings_dict["NAME"]
+        if database != configured_database:
+            raise CommandError(
+                f"--database {database} is not the configured database "
+                f"{configured_database}."
+            )
+        if not any(
+            marker in database.lower() for marker in BENCHMARK_DATABASE_NAME_MARKERS
+        ):
+            raise CommandError(
+                f"{database} is not a test or benchmark database, the benchmark "
+                "commits up to millions of HeroData rows."
+            )
+
+    @staticmethod
+    def _delete_rows(author: TelegramUser):
+        # Without the post_delete signals sent for every row, the cached reports
+        # are invalidated once afterwards.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {HeroData._meta.db_table} WHERE author_id = %s",
+                [author.id],
+            )
+        author.delete()
+
+    def _delete_previous_rows(self):
+        # Left by a benchmark that was killed before it deleted its rows.
+        author = TelegramUser.objects.filter(telegram_id=BENCHMARK_TELEGRAM_ID).first()
+        if author is not None:
+            self.stdout.write(
+                self.style.WARNING("Deleting the rows of a previous benchmark.")
+            )
+            self._delete_rows(author)
+            report_cache.invalidate_dates(datetime.date.min, datetime.date.max)
+
+    def _benchmark_generator(
+        self,
+        generator_path: str,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        trace_memory: bool,
+    ) -> tuple[float, int, int | None]:
+        if trace_memory:
+            tracemalloc.start()
+        started_at = time.perf_counter()
+        try:
+            report_path = import_string(generator_path)(
+                start_date=start_date, end_date=end_date
+            ).generate_report()
+            duration = time.perf_counter() - started_at
+        finally:
+            peak_memory = tracemalloc.get_traced_memory()[1] if trace_memory else None
+            tracemalloc.stop()
+        file_size = os.path.getsize(report_path)
+        os.remove(report_path)
+        return duration, file_size, peak_memory
+
+    def handle(self, *args, **options):
+        self._check_database(options["database"])
+        self._delete_previous_rows()
+        self.stdout.write(
+            self.style.NOTICE(
+                f"Creating {options['rows']} HeroData rows over {options['days']} days."
+            )
+        )
+        author = self._create_rows(
+            options["rows"], options["days"], options["batch_size"]
+        )
+        end_date = now().date()
+        start_date = end_date - datetime.timedelta(days=options["days"] - 1)
+        try:
+            for generator_path in options["generator"] or REPORT_GENERATORS:
+                duration, file_size, peak_memory = self._benchmark_generator(
+                    generator_path, start_date, end_date, options["memory"]
+                )
+                result = f"{generator_path}: {duration:.3f}s, {file_size / 1024 / 1024:.1f}MB"
+                if peak_memory is not None:
+                    result += f", peak memory {peak_memory / 1024 / 1024:.1f}MB"
+                self.stdout.write(result)
+        finally:
+            self._delete_rows(author)
+            # The created_at dates are shifted from the current UTC date, the
+            # local dates may differ by a day.
+            report_cache.invalidate_dates(
+                start_date - datetime.timedelta(days=1),
+                end_date + datetime.timedelta(days=1),
+            )
@@ -0,0 +1,54 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from telegram_bot.benchmarking import format_summary, summarize_durations
+from telegram_bot.constants import BASE_URL
+from telegram_bot.dataclasses import ResponseMessage
+from telegram_bot.message_handling_services import MessageHandler
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends messages through the bot send path and reports latencies and "
+        "response statuses. Meant to be run against the fake Telegram Bot API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--chat-id", type=int, default=1)
+
+    def _send(self, chat_id: int) -> tuple[float, int]:
+        payload = ResponseMessage(text="benchmark", chat_id=chat_id).to_payload()
+        started_at = time.perf_counter()
+        response = MessageHandler(telegram_message={})._send_response(payload)
+        return time.perf_counter() - started_at, response.status_code
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.NOTICE(
+                f"Sending {options['requests']} messages to {BASE_URL} with concurrency {options['concurrency']}"
+            )
+        )
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            results = list(
+                executor.map(
+                    lambda _: self._send(options["chat_id"]),
+                    range(options["requests"]),
+                )
+            )
+        total_duration = time.perf_counter() - started_at
+
+        durations = [duration for duration, _ in results]
+        statuses = Counter(status_code for _, status_code in results)
+        self.stdout.write(format_summary("sendMessage", summarize_durations(durations)))
+        self.stdout.write(f"Statuses: {dict(statuses)}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Throughput: {len(results) / total_duration:.1f} requests/s"
+            )
+        )
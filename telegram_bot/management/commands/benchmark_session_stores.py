@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from telegram_bot.benchmarking import (
+    format_summary,
+    measure_durations,
+    summarize_durations,
+)
+
+SESSION_STORE_BACKENDS = (
+    "telegram_bot.session_stores.RedisSessionStore",
+    "telegram_bot.session_stores.InMemorySessionStore",
+    "telegram_bot.session_stores.PostgresSessionStore",
+)
+
+
+class Command(BaseCommand):
+    help = "Measures per operation latency of the session store backends."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=1000)
+        parser.add_argument(
+            "--backend",
+            type=str,
+            action="append",
+            default=None,
+            help="Dotted path of the backend. Can be passed multiple times. "
+            "Defaults to all backends.",
+        )
+        parser.add_argument(
+            "--first-user-id",
+            type=int,
+            default=-(10**12),
+            help="Benchmark sessions use user ids starting from this one.",
+        )
+
+    def _benchmark_store(self, store, iterations: int, first_user_id: int) -> dict:
+        user_ids = iter(range(first_user_id, first_user_id + iterations))
+        created_user_ids = []
+
+        def create():
+            user_id = next(user_ids)
+            created_user_ids.append(user_id)
+            store.create(user_id, settings.SESSION_TTL_SECONDS)
+
+        saved_user_ids = iter(created_user_ids)
+        got_user_ids = iter(created_user_ids)
+        deleted_user_ids = iter(created_user_ids)
+        operations = (
+            ("create", create),
+            (
+                "save_field",
+                lambda: store.save_field(
+                    next(saved_user_ids),
+                    "case_id",
+                    "1",
+                    ttl=settings.SESSION_TTL_SECONDS,
+                ),
+            ),
+            ("get", lambda: store.get(next(got_user_ids))),
+            ("delete", lambda: store.delete(next(deleted_user_ids))),
+        )
+        try:
+            return {
+                operation: summarize_durations(measure_durations(func, iterations))
+                for operation, func in operations
+            }
+        finally:
+            for user_id in created_user_ids:
+                store.delete(user_id)
+
+    def handle(self, *args, **options):
+        for backend in options["backend"] or SESSION_STORE_BACKENDS:
+            store = import_string(backend)()
+            results = self._benchmark_store(
+                store, options["iterations"], options["first_user_id"]
+            )
+            self.stdout.write(self.style.NOTICE(backend))
+            for operation, summary in results.items():
+                self.stdout.write(format_summary(operation, summary))
@@ -0,0 +1,63 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from rest_framework.reverse import reverse
+
+from telegram_bot.benchmarking import (
+    build_text_message_update,
+    format_summary,
+    measure_durations,
+    summarize_durations,
+)
+from telegram_bot.logger_config import configure_logger, logger
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures webhook latency with logging disabled, with synchronous text "
+        "logging and with enqueued json logging. Meant to be run against the "
+        "fake Telegram Bot API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--chat-id", type=int, default=1)
+
+    def handle(self, *args, **options):
+        client = Client()
+        url = reverse("telegram_bot:telegram_bot-user-message")
+        update = json.dumps(
+            build_text_message_update(
+                update_id=1, chat_id=options["chat_id"], text="/start"
+            )
+        )
+
+        def post_update():
+            client.post(url, data=update, content_type="application/json")
+
+        modes = (
+            ("logging off", None),
+            ("text logging", {"log_format": "text", "enqueue": False}),
+            ("json logging, enqueued", {"log_format": "json", "enqueue": True}),
+        )
+        results = []
+        for label, logger_options in modes:
+            if logger_options is None:
+                logger.remove()
+            else:
+                configure_logger(**logger_options)
+            post_update()
+            results.append(
+                (
+                    label,
+                    summarize_durations(
+                        measure_durations(post_update, options["requests"])
+                    ),
+                )
+            )
+        logger.complete()
+        configure_logger()
+
+        for label, summary in results:
+            self.stdout.write(format_summary(label, summary))
@@ -0,0 +1,110 @@
+import io
+import json
+import logging
+from wsgiref.util import setup_testing_defaults
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from telegram_bot.benchmarking import (
+    build_text_message_update,
+    format_summary,
+    measure_durations,
+    summarize_durations,
+)
+from telegram_bot.logger_config import configure_logger, logger
+from telegram_bot.webhook import (
+    SECRET_TOKEN_WSGI_KEY,
+    WEBHOOK_PATH,
+    LeanWebhookWSGIApplication,
+)
+
+BENCHMARK_SECRET_TOKEN = "benchmark-secret-token"
+
+
+def build_webhook_environ(body: bytes, secret_token: str | None = None) -> dict:
+    environ = {
+        "REQUEST_METHOD": "POST",
+        "PATH_INFO": WEBHOOK_PATH,
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+    }
+    if secret_token is not None:
+        environ[SECRET_TOKEN_WSGI_KEY] = secret_token
+    setup_testing_defaults(environ)
+    return environ
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the per request overhead of the webhook handled by the full "
+        "django stack, TelegramBotApiView, and by the lean webhook path. "
+        "A group chat command is posted, so it is dropped before any redis, "
+        "postgres or telegram call. Requests with a wrong secret token are "
+        "measured as well."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000)
+
+    @override_settings(TELEGRAM_WEBHOOK_SECRET_TOKEN=BENCHMARK_SECRET_TOKEN)
+    def handle(self, *args, **options):
+        update = build_text_message_update(update_id=1, chat_id=-1, text="/start")
+        update["message"]["chat"] = {"id": -1, "title": "Benchmark", "type": "group"}
+        body = json.dumps(update).encode()
+        django_application = WSGIHandler()
+        lean_application = LeanWebhookWSGIApplication(django_application)
+        # Label, application, sent secret token and expected response status.
+        modes = (
+            (
+                "django middlewares and TelegramBotApiView",
+                django_application,
+                BENCHMARK_SECRET_TOKEN,
+                "200",
+            ),
+            ("lean webhook path", lean_application, BENCHMARK_SECRET_TOKEN, "200"),
+            (
+                "django middlewares and TelegramBotApiView, wrong secret token",
+                django_application,
+                "wrong",
+                "403",
+            ),
+            ("lean webhook path, wrong secret token", lean_application, "wrong", "403"),
+        )
+
+        # Only the framework overhead is measured, not the payload logging and
+        # the django warnings of the rejected requests.
+        logger.remove()
+        logging.disable(logging.WARNING)
+        try:
+            results = []
+            for label, application, secret_token, expected_status in modes:
+
+                def start_response(status, headers):
+                    if not status.startswith(expected_status):
+                        raise RuntimeError(f"Webhook responded with {status}.")
+
+                def post_update():
+                    b"".join(
+                        application(
+                            build_webhook_environ(body, secret_token), start_response
+                        )
+                    )
+
+                post_update()
+                results.append(
+                    (
+                        label,
+                        summarize_durations(
+                            measure_durations(post_update, options["requests"])
+                        ),
+                    )
+                )
+        finally:
+            logging.disable(logging.NOTSET)
+            configure_logger()
+
+        for label, summary in results:
+            self.stdout.write(format_summary(label, summary))
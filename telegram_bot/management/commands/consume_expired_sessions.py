@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from telegram_bot.session_expiry import ExpiredSessionsConsumer
+
+
+class Command(BaseCommand):
+    help = (
+        "Listens for expired user input sessions, counts them as abandoned and "
+        "notifies the users. Run a single instance per Redis database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--configure-notifications",
+            action="store_true",
+            help="Enable expired keys notifications with CONFIG SET before listening.",
+        )
+        parser.add_argument(
+            "--no-notify-users",
+            action="store_true",
+            help="Only count the expired sessions without messaging the users.",
+        )
+
+    def handle(self, *args, **options):
+        consumer = ExpiredSessionsConsumer(notify_users=not options["no_notify_users"])
+        if options["configure_notifications"]:
+            consumer.enable_keyspace_notifications()
+        self.stdout.write(self.style.NOTICE("Listening for expired sessions."))
+        consumer.run()
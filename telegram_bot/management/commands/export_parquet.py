@@ -0,0 +1,70 @@
+import datetime
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from telegram_bot.constants import DATE_FORMAT
+from telegram_bot.db_routers import use_replica
+from telegram_bot.models import HeroData
+from telegram_bot.parquet_export import PARQUET_BATCH_SIZE, export_hero_data_to_parquet
+
+
+def parse_date(value: str) -> datetime.date:
+    return datetime.datetime.strptime(value, DATE_FORMAT).date()
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports HeroData to a parquet file for analytics, in row groups read "
+        "from a server side cursor. Exports the whole table by default."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            type=str,
+            default=os.path.join(settings.BASE_DIR, "hero_data.parquet"),
+        )
+        parser.add_argument(
+            "--start-date",
+            type=parse_date,
+            default=None,
+            help="dd-mm-yyyy, the first day of created_at to export.",
+        )
+        parser.add_argument(
+            "--end-date",
+            type=parse_date,
+            default=None,
+            help="dd-mm-yyyy, the last day of created_at to export.",
+        )
+        parser.add_argument(
+            "--with-authors",
+            action="store_true",
+            help="Add the columns of the TelegramUser who submitted the data.",
+        )
+        parser.add_argument("--batch-size", type=int, default=PARQUET_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+        queryset = HeroData.objects.order_by("id")
+        if options["start_date"]:
+            queryset = queryset.filter(created_at__date__gte=options["start_date"])
+        if options["end_date"]:
+            queryset = queryset.filter(created_at__date__lte=options["end_date"])
+
+        started_at = time.perf_counter()
+        with use_replica():
+            rows_count = export_hero_data_to_parquet(
+                queryset,
+                options["output"],
+                with_authors=options["with_authors"],
+                batch_size=options["batch_size"],
+            )
+        self.stdout.write(
+            f"Exported {rows_count} rows to {options['output']} in "
+            f"{time.perf_counter() - started_at:.3f}s, "
+            f"{os.path.getsize(options['output']) / 1024 / 1024:.1f}MB."
+        )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from telegram_bot.partitioning import (
+    PARTITIONED_TABLES,
+    create_future_partitions,
+    detach_old_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the monthly partitions of HeroData and BotStatusChange for the "
+        "next months and optionally detaches the old ones. Run it at least monthly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="Number of months after the current one to create partitions for.",
+        )
+        parser.add_argument(
+            "--detach-older-than",
+            type=int,
+            default=None,
+            help="Detach the partitions of the months before the given number of "
+            "months ago. The detached tables are kept.",
+        )
+
+    def handle(self, *args, **options):
+        for table in PARTITIONED_TABLES:
+            for partition_name in create_future_partitions(
+                table, options["months_ahead"]
+            ):
+                self.stdout.write(f"Created {partition_name}.")
+            if options["detach_older_than"] is not None:
+                for partition_name in detach_old_partitions(
+                    table, options["detach_older_than"]
+                ):
+                    self.stdout.write(f"Detached {partition_name}.")
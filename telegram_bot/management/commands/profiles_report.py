@@ -0,0 +1,49 @@
+import glob
+import os
+import pstats
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Aggregates the collected update profiles into a top N hot functions report."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--directory",
+            type=str,
+            default=None,
+            help="Directory with the profiles. Defaults to PROFILES_DIRECTORY.",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=20,
+            help="Number of functions in the report.",
+        )
+        parser.add_argument(
+            "--sort",
+            type=str,
+            default="cumulative",
+            choices=("cumulative", "tottime", "ncalls"),
+        )
+        parser.add_argument(
+            "--processor",
+            type=str,
+            default=None,
+            help="Only aggregate profiles of the given processor, e.g. UserMessageProcessor.",
+        )
+
+    def handle(self, *args, **options):
+        directory = options["directory"] or settings.PROFILES_DIRECTORY
+        pattern = f"*_{options['processor']}.prof" if options["processor"] else "*.prof"
+        profile_paths = sorted(glob.glob(os.path.join(directory, pattern)))
+        if not profile_paths:
+            raise CommandError(f"No profiles found in {directory}.")
+
+        self.stdout.write(
+            self.style.NOTICE(f"Aggregating {len(profile_paths)} profiles.")
+        )
+        stats = pstats.Stats(*profile_paths, stream=self.stdout)
+        stats.strip_dirs().sort_stats(options["sort"]).print_stats(options["top"])
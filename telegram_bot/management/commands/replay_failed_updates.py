@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from telegram_bot.failed_updates import replay_failed_updates
+from telegram_bot.models import FailedUpdate
+
+
+class Command(BaseCommand):
+    help = (
+        "Processes again the updates stored in FailedUpdate which are not "
+        "replayed yet, e.g. after the cause of the failure is fixed. The updates "
+        "failed after their processing started are not replayed, the data may "
+        "be written or the messages sent already."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Number of users which updates are replayed at the same time.",
+        )
+        parser.add_argument(
+            "--processor",
+            type=str,
+            default=None,
+            help="Replay only the updates failed in the processor, "
+            "e.g. UserMessageProcessor.",
+        )
+        parser.add_argument(
+            "--exception-type",
+            type=str,
+            default=None,
+            help="Replay only the updates failed with the exception.",
+        )
+
+    def handle(self, *args, **options):
+        failed_updates = FailedUpdate.objects.filter(replayed_at__isnull=True)
+        if options["processor"]:
+            failed_updates = failed_updates.filter(processor=options["processor"])
+        if options["exception_type"]:
+            failed_updates = failed_updates.filter(
+                exception_type=options["exception_type"]
+            )
+        replayed_count, failed_count = replay_failed_updates(
+            failed_updates, options["batch_size"], options["concurrency"]
+        )
+        self.stdout.write(
+            f"Replayed {replayed_count} updates, {failed_count} not replayed."
+        )
@@ -0,0 +1,65 @@
+from aiohttp import web
+from django.core.management.base import BaseCommand
+
+from telegram_bot.fake_telegram_api import FakeTelegramApi, FakeTelegramApiConfig
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs a local stand-in for the Telegram Bot API. "
+        "Point TELEGRAM_API_URL to it to load test the bot offline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", type=str, default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8081)
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.0,
+            help="Base latency added to every call, in seconds.",
+        )
+        parser.add_argument(
+            "--latency-jitter",
+            type=float,
+            default=0.0,
+            help="Random extra latency up to the given value, in seconds.",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="Share of calls answered with 500, from 0 to 1.",
+        )
+        parser.add_argument(
+            "--rate-limit-rate",
+            type=float,
+            default=0.0,
+            help="Share of calls answered with 429, from 0 to 1.",
+        )
+        parser.add_argument(
+            "--retry-after",
+            type=int,
+            default=1,
+            help="retry_after value returned with 429 responses, in seconds.",
+        )
+
+    def handle(self, *args, **options):
+        config = FakeTelegramApiConfig(
+            latency=options["latency"],
+            latency_jitter=options["latency_jitter"],
+            error_rate=options["error_rate"],
+            rate_limit_rate=options["rate_limit_rate"],
+            retry_after=options["retry_after"],
+        )
+        self.stdout.write(
+            self.style.NOTICE(
+                f"Fake Telegram Bot API listening on http://{options['host']}:{options['port']} with {config}"
+            )
+        )
+        web.run_app(
+            FakeTelegramApi(config).make_app(),
+            host=options["host"],
+            port=options["port"],
+            print=None,
+        )
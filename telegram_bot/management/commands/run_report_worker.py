@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from telegram_bot.report_jobs import ReportWorker
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates the reports requested with the /report_ bot command and "
+        "sends them to the users who requested them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--worker-name",
+            type=str,
+            default=None,
+            help="Name of the worker, unique and stable across restarts, so the "
+            "jobs it was processing when it died are queued again when it is "
+            "restarted. Defaults to the hostname.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE("Waiting for report jobs."))
+        ReportWorker(worker_name=options["worker_name"]).run()
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from telegram_bot.update_queue import UpdateWorker
+
+
+class Command(BaseCommand):
+    help = (
+        "Processes the telegram updates queued by the webhook when UPDATE_QUEUE "
+        "is enabled. Any number of workers can be run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--consumer",
+            type=str,
+            default=None,
+            help="Consumer name in the update_workers group, unique per worker. "
+            "Defaults to <hostname>-<pid>.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE("Waiting for updates."))
+        UpdateWorker(consumer_name=options["consumer"]).run()
@@ -1,10 +1,17 @@
+import json
 import os
+import re
 
 import requests
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 from dotenv import load_dotenv
 from rest_framework import status
 
+from telegram_bot.update_filter import SUPPORTED_UPDATE_TYPES
+
+SECRET_TOKEN_REGEX = re.compile(r"[A-Za-z0-9_-]{1,256}")
+
 
 class Command(BaseCommand):
     help = "Sets the webhook for the telegram bot with the provided url."
@@ -25,11 +32,20 @@ class Command(BaseCommand):
 
         bot_token = os.getenv("BOT_TOKEN")
 
+        data = {"url": url, "allowed_updates": json.dumps(SUPPORTED_UPDATE_TYPES)}
+        if secret_token := settings.TELEGRAM_WEBHOOK_SECRET_TOKEN:
+            if not SECRET_TOKEN_REGEX.fullmatch(secret_token):
+                raise CommandError(
+                    "TELEGRAM_WEBHOOK_SECRET_TOKEN must be 1-256 characters, "
+                    "A-Z, a-z, 0-9, _ and -."
+                )
+            data["secret_token"] = secret_token
+
         self.stdout.write(self.style.NOTICE(f"Setting webhook to {url}"))
 
         response = requests.post(
-            url=f"https://api.telegram.org/bot{bot_token}/setWebhook",
-            data={"url": url},
+            url=f"{settings.TELEGRAM_API_URL}/bot{bot_token}/setWebhook",
+            data=data,
         )
         if response.status_code != status.HTTP_200_OK or response.ok is not True:
             raise CommandError(
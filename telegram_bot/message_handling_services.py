@@ -1,44 +1,69 @@
+import contextvars
 import datetime
-import os
 from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
 
 import requests
 from django.conf import settings
 
 from telegram_bot.constants import (
     BASE_URL,
+    CSV_REPORT_FORMAT,
     DATE_FORMAT,
     MESSAGE_TEXT_VALIDATION_FAILED,
     MESSAGE_USER_INPUT_EXPIRED,
     MESSAGES_MAPPING,
+    REPORT_FORMATS,
 )
-from telegram_bot.dataclasses import ResponseMessage
+from telegram_bot.dataclasses import ReportJob, ResponseMessage
 from telegram_bot.enums import ChatType
 from telegram_bot.exceptions import (
     AllDataReceivedException,
+    CommandValidationFailedException,
     TelegramMessageNotParsedException,
+    UnauthorizedUserCalledAdminCommandException,
     UnauthorizedUserCalledReportGenerationException,
     UnknownCommandException,
     UserInputExpiredException,
     UserMessageValidationFailedException,
 )
-from telegram_bot.logger_config import logger
+from telegram_bot.logger_config import log_payload, logger
+from telegram_bot.metrics import (
+    collect_stage_durations,
+    count_exception,
+    count_processed_update,
+    count_skipped_update,
+    current_processor,
+    measure_stage,
+)
 from telegram_bot.messages_texts import (
     ALL_DATA_RECEIVED_RESPONSE,
     EDITED_MESSAGE_RESPONSE,
     FIRST_INSTRUCTIONS,
     INPUT_CONFIRMED_RESPONSE,
     INPUT_NOT_CONFIRMED_RESPONSE,
+    PROFILING_ENABLED_RESPONSE,
+    PROFILING_INVALID_UPDATES_COUNT_RESPONSE,
+    REPORT_INVALID_COMMAND_RESPONSE,
+    REPORT_JOB_ALREADY_QUEUED_RESPONSE,
+    REPORT_JOB_QUEUED_RESPONSE,
 )
-from telegram_bot.models import BotStatusChange, TelegramUser
+from telegram_bot.models import BotStatusChange, FailedUpdate, TelegramUser
 from telegram_bot.parsers import (
     ChatStatusChangeMessageParser,
     TelegramCommandParser,
     UserMessageParser,
 )
-from telegram_bot.report_generator import ReportGenerator
+from telegram_bot.profiling import enable_profiling_for_next_updates, profile_update
+from telegram_bot.report_jobs import enqueue_report_job
 from telegram_bot.sequential_messages_processor import SequentialMessagesProcessor
 from telegram_bot.types import ResponsePayload
+from telegram_bot.update_guards import mark_side_effects_started, track_side_effects
+
+telegram_requests_executor = ThreadPoolExecutor(
+    max_workers=settings.TELEGRAM_REQUESTS_MAX_WORKERS,
+    thread_name_prefix="telegram-requests",
+)
 
 
 class UserInputExpiredResponseMixin:
@@ -58,6 +83,14 @@ class TelegramMessageProcessorBase(ABC):
         self.telegram_message = telegram_message
         self.parsed_telegram_message = None
 
+    def _parse(self):
+        if self.parsed_telegram_message is None:
+            with measure_stage("parse"):
+                self.parsed_telegram_message = self.PARSER.parse(self.telegram_message)
+
+    def requires_processing(self) -> bool:
+        return True
+
     @abstractmethod
     def process(self): ...
 
@@ -71,7 +104,9 @@ class TelegramMessageProcessorBase(ABC):
 class MemberStatusChangeProcessor(TelegramMessageProcessorBase):
     PARSER = ChatStatusChangeMessageParser
 
+    @measure_stage("postgres")
     def _save_bot_status_change(self) -> BotStatusChange:
+        mark_side_effects_started()
         telegram_user, created = TelegramUser.objects.get_or_create(
             telegram_id=self.parsed_telegram_message.user_id,
             first_name=self.parsed_telegram_message.first_name,
@@ -81,7 +116,7 @@ class MemberStatusChangeProcessor(TelegramMessageProcessorBase):
 
         if created:
             logger.info(
-                f"Created user: username: telegram_id: {telegram_user}, {self.parsed_telegram_message.username}, first_name: {self.parsed_telegram_message}, last_name: {self.parsed_telegram_message}"
+                f"Created user id: {telegram_user.id}, telegram_id: {telegram_user.telegram_id}"
             )
 
         return BotStatusChange.objects.create(
@@ -92,10 +127,10 @@ class MemberStatusChangeProcessor(TelegramMessageProcessorBase):
         )
 
     def process(self):
-        logger.info(
-            f"Processing bot status change message: {self.parsed_telegram_message}"
+        self._parse()
+        log_payload(
+            "Processing bot status change message", self.parsed_telegram_message
         )
-        self.parsed_telegram_message = self.PARSER.parse(self.telegram_message)
         self._save_bot_status_change()
 
     def prepare_response(self):
@@ -124,8 +159,8 @@ class UserMessageProcessor(TelegramMessageProcessorBase, UserInputExpiredRespons
         )
 
     def process(self):
-        self.parsed_telegram_message = self.PARSER.parse(self.telegram_message)
-        logger.info(f"Processing user message: {self.parsed_telegram_message}")
+        self._parse()
+        log_payload("Processing user message", self.parsed_telegram_message)
         try:
             self._prepare_sequential_messages_processor()
             if not self.parsed_telegram_message.message_edition:
@@ -134,9 +169,11 @@ class UserMessageProcessor(TelegramMessageProcessorBase, UserInputExpiredRespons
             self.all_data_received = True
         except UserMessageValidationFailedException as e:
             logger.exception(f"Exception: {e}")
+            count_exception(e)
             self.message_validation_passed = False
         except UserInputExpiredException as e:
             logger.exception(f"Exception: {e}")
+            count_exception(e)
             self.user_input_expired = True
 
     def prepare_response(self) -> ResponsePayload | None:
@@ -235,16 +272,53 @@ class BotCommandProcessor(TelegramMessageProcessorBase, UserInputExpiredResponse
     def __init__(self, telegram_message: dict):
         super().__init__(telegram_message)
         self.user_input_expired = False
+        self.keyboard_removal: Future | None = None
+        self.report_job_created = False
+        self.command_validation_error = None
+
+    def requires_processing(self) -> bool:
+        # No response is sent to the group chats, so the commands sent there
+        # are dropped before any redis, postgres or telegram call.
+        self._parse()
+        return self.parsed_telegram_message.chat_type is not ChatType.GROUP
 
     def _remove_inline_keyboard_from_replied_message(
         self, chat_id: int, message_id: int
     ):
+        # Sent while the command is processed and the response is sent,
+        # awaited in finalize.
+        mark_side_effects_started()
+        self.keyboard_removal = telegram_requests_executor.submit(
+            contextvars.copy_context().run,
+            self._send_inline_keyboard_removal,
+            chat_id,
+            message_id,
+        )
+
+    @staticmethod
+    @measure_stage("telegram_send")
+    def _send_inline_keyboard_removal(
+        chat_id: int, message_id: int
+    ) -> requests.Response:
         payload = {
             "chat_id": chat_id,
             "message_id": message_id,
             "reply_markup": {"inline_keyboard": []},
         }
-        _response = requests.post(url=BASE_URL + "editMessageReplyMarkup", json=payload)
+        return requests.post(url=BASE_URL + "editMessageReplyMarkup", json=payload)
+
+    def _wait_for_keyboard_removal(self):
+        if self.keyboard_removal is None:
+            return
+        try:
+            response = self.keyboard_removal.result()
+        except requests.RequestException as e:
+            logger.exception(f"Exception: {e}")
+            count_exception(e)
+            return
+        logger.info(
+            f"Telegram response status for inline keyboard removal: {response.status_code}"
+        )
 
     def _dispatch_processing(self):
         match self.parsed_telegram_message.data:
@@ -262,12 +336,14 @@ class BotCommandProcessor(TelegramMessageProcessorBase, UserInputExpiredResponse
                 self._process_continue_input_command()
             case command if command.startswith("/report_"):
                 self._process_report_generation_command()
+            case command if command.startswith("/profile_"):
+                self._process_profiling_command()
             case _:
                 raise UnknownCommandException
 
     def process(self):
-        self.parsed_telegram_message = self.PARSER.parse(self.telegram_message)
-        logger.info(f"Processing bot command: {self.parsed_telegram_message}")
+        self._parse()
+        log_payload("Processing bot command", self.parsed_telegram_message)
         if self.parsed_telegram_message.sent_by_inline_keyboard:
             self._remove_inline_keyboard_from_replied_message(
                 chat_id=self.parsed_telegram_message.chat_id,
@@ -277,7 +353,12 @@ class BotCommandProcessor(TelegramMessageProcessorBase, UserInputExpiredResponse
             self._dispatch_processing()
         except UserInputExpiredException as e:
             logger.error(f"Exception occurred {e}")
+            count_exception(e)
             self.user_input_expired = True
+        except CommandValidationFailedException as e:
+            logger.error(f"Command validation failed: {e.message}")
+            count_exception(e)
+            self.command_validation_error = e.message
 
     def _process_start_command(self):
         SequentialMessagesProcessor.delete_user_input(
@@ -290,15 +371,16 @@ class BotCommandProcessor(TelegramMessageProcessorBase, UserInputExpiredResponse
         )
 
     def _process_input_confirmed_command(self):
-        data_entry_author, _ = TelegramUser.objects.get_or_create(
-            telegram_id=self.parsed_telegram_message.user_id,
-            defaults={
-                "telegram_id": self.parsed_telegram_message.user_id,
-                "username": self.parsed_telegram_message.username,
-                "first_name": self.parsed_telegram_message.first_name,
-                "last_name": self.parsed_telegram_message.last_name,
-            },
-        )
+        with measure_stage("postgres"):
+            data_entry_author, _ = TelegramUser.objects.get_or_create(
+                telegram_id=self.parsed_telegram_message.user_id,
+                defaults={
+                    "telegram_id": self.parsed_telegram_message.user_id,
+                    "username": self.parsed_telegram_message.username,
+                    "first_name": self.parsed_telegram_message.first_name,
+                    "last_name": self.parsed_telegram_message.last_name,
+                },
+            )
         SequentialMessagesProcessor.save_confirmed_data(
             user_id=self.parsed_telegram_message.user_id,
             entry_author=data_entry_author,
@@ -317,15 +399,66 @@ class BotCommandProcessor(TelegramMessageProcessorBase, UserInputExpiredResponse
     def _process_continue_input_command(self):
         pass
 
-    def _process_report_generation_command(self):
+    def _validate_user_is_admin(
+        self,
+        exception_class: type[Exception] = UnauthorizedUserCalledAdminCommandException,
+    ):
         if settings.ADMIN_USER_IDS:
             if self.parsed_telegram_message.chat_id not in settings.ADMIN_USER_IDS:
-                raise UnauthorizedUserCalledReportGenerationException
+                raise exception_class
+
+    def _get_report_job(self) -> ReportJob:
+        # /report_<start date>_<end date>[_<format>]
         report_dates = self.parsed_telegram_message.data.split("_")[1:]
-        self.generated_report = ReportGenerator(
-            start_date=datetime.datetime.strptime(report_dates[0], DATE_FORMAT),
-            end_date=datetime.datetime.strptime(report_dates[1], DATE_FORMAT),
-        ).generate_report()
+        report_format = report_dates[2] if len(report_dates) > 2 else CSV_REPORT_FORMAT
+        invalid_command_exception = CommandValidationFailedException(
+            REPORT_INVALID_COMMAND_RESPONSE.format(
+                report_formats=", ".join(REPORT_FORMATS)
+            )
+        )
+        if not 2 <= len(report_dates) <= 3 or report_format not in REPORT_FORMATS:
+            raise invalid_command_exception
+        try:
+            start_date, end_date = (
+                datetime.datetime.strptime(report_date, DATE_FORMAT).date()
+                for report_date in report_dates[:2]
+            )
+        except ValueError:
+            raise invalid_command_exception
+        return ReportJob(
+            start_date=start_date, end_date=end_date, report_format=report_format
+        )
+
+    def _process_report_generation_command(self):
+        self._validate_user_is_admin(UnauthorizedUserCalledReportGenerationException)
+        report_job = self._get_report_job()
+        mark_side_effects_started()
+        with measure_stage("redis"):
+            self.report_job_created = enqueue_report_job(
+                report_job, self.parsed_telegram_message.chat_id
+            )
+
+    def _get_profiled_updates_count(self) -> int:
+        try:
+            updates_count = int(self.parsed_telegram_message.data.split("_")[1])
+        except ValueError:
+            updates_count = 0
+        if not 0 < updates_count <= settings.PROFILING_MAX_UPDATES_COUNT:
+            raise CommandValidationFailedException(
+                PROFILING_INVALID_UPDATES_COUNT_RESPONSE.format(
+                    max_updates_count=settings.PROFILING_MAX_UPDATES_COUNT
+                )
+            )
+        return updates_count
+
+    def _process_profiling_command(self):
+        # Unlike the reports, profiling is never enabled without admins.
+        if not settings.ADMIN_USER_IDS:
+            raise UnauthorizedUserCalledAdminCommandException
+        self._validate_user_is_admin()
+        updates_count = self._get_profiled_updates_count()
+        mark_side_effects_started()
+        enable_profiling_for_next_updates(updates_count)
 
     def _get_start_command_response(self) -> ResponsePayload:
         response_text = FIRST_INSTRUCTIONS
@@ -403,14 +536,30 @@ class BotCommandProcessor(TelegramMessageProcessorBase, UserInputExpiredResponse
     def _get_report_generation_command_response(self) -> ResponsePayload:
         return ResponseMessage(
             chat_id=self.parsed_telegram_message.chat_id,
-            text="",
-            file_path=self.generated_report,
+            text=(
+                REPORT_JOB_QUEUED_RESPONSE
+                if self.report_job_created
+                else REPORT_JOB_ALREADY_QUEUED_RESPONSE
+            ),
+        ).to_payload()
+
+    def _get_profiling_command_response(self) -> ResponsePayload:
+        return ResponseMessage(
+            text=PROFILING_ENABLED_RESPONSE.format(
+                updates_count=self._get_profiled_updates_count()
+            ),
+            chat_id=self.parsed_telegram_message.chat_id,
         ).to_payload()
 
     def prepare_response(self) -> ResponsePayload | None:
         if self.parsed_telegram_message.chat_type is not ChatType.GROUP:
             if self.user_input_expired:
                 return self._get_user_input_expired_response()
+            if self.command_validation_error:
+                return ResponseMessage(
+                    text=self.command_validation_error,
+                    chat_id=self.parsed_telegram_message.chat_id,
+                ).to_payload()
             match self.parsed_telegram_message.data:
                 case "/start":
                     return self._get_start_command_response()
@@ -426,17 +575,26 @@ class BotCommandProcessor(TelegramMessageProcessorBase, UserInputExpiredResponse
                     return self._get_continue_input_command_response()
                 case command if command.startswith("/report_"):
                     return self._get_report_generation_command_response()
+                case command if command.startswith("/profile_"):
+                    return self._get_profiling_command_response()
                 case _:
                     raise UnknownCommandException
 
     def finalize(self):
-        if hasattr(self, "generated_report"):
-            os.remove(self.generated_report)
+        self._wait_for_keyboard_removal()
 
 
 class MessageHandler:
-    def __init__(self, telegram_message: dict):
+    def __init__(self, telegram_message: dict, raise_exceptions: bool = False):
         self.telegram_message = telegram_message
+        # The queued updates are acknowledged only when processed without
+        # exceptions, the others are delivered again.
+        self.raise_exceptions = raise_exceptions
+        self.processor_name = None
+        self.stage_durations = {}
+        self.exception = None
+        # Set once the processor may have written data or sent messages.
+        self.side_effects_started = False
 
     def _get_message_processor(self):
         if "callback_query" in self.telegram_message:
@@ -461,26 +619,81 @@ class MessageHandler:
             return BASE_URL + "sendDocument"
         return BASE_URL + "sendMessage"
 
-    def _send_response(self, response: dict):
-        logger.info(f"Prepared response: {response}")
+    @measure_stage("telegram_send")
+    def _send_response(self, response: dict) -> requests.Response:
+        log_payload("Prepared response", response)
         url = self._get_response_url(response)
+        mark_side_effects_started()
         response_call = requests.post(url=url, **response)
         logger.info(
             f"Telegram response status for response sent: {response_call.status_code}, url: {url}"
         )
+        return response_call
 
     def handle_telegram_message(self):
         processor = self._get_message_processor()
-        logger.info(
-            f"{processor.__class__.__name__} picked for {self.telegram_message} processing"
+        log_payload(
+            f"{processor.__class__.__name__} picked for processing",
+            self.telegram_message,
         )
+        processor_name = self.processor_name = processor.__class__.__name__
+        current_processor_token = current_processor.set(processor_name)
         try:
-            processor.process()
-            response = processor.prepare_response()
-            if response:
-                self._send_response(response)
-        except Exception as e:
-            logger.exception(f"Exception: {e}")
-            pass
+            if not self._requires_processing(processor):
+                logger.info(f"Update skipped by {processor_name}")
+                count_skipped_update()
+                return
+            with collect_stage_durations(self.stage_durations):
+                with profile_update(processor_name), measure_stage("total"):
+                    self._process_message(processor)
+            if self.exception is not None:
+                self.store_failed_update(self.exception)
+            count_processed_update()
         finally:
-            processor.finalize()
+            current_processor.reset(current_processor_token)
+
+    @staticmethod
+    def _requires_processing(processor: TelegramMessageProcessorBase) -> bool:
+        try:
+            return processor.requires_processing()
+        except Exception as e:
+            # Processed as usual, so the exception is handled and counted there.
+            logger.error(f"Update classification failed: {e}")
+            return True
+
+    def _process_message(self, processor: TelegramMessageProcessorBase):
+        with track_side_effects() as side_effects_started:
+            try:
+                processor.process()
+                response = processor.prepare_response()
+                if response:
+                    self._send_response(response)
+            except Exception as e:
+                logger.exception(f"Exception: {e}")
+                count_exception(e)
+                if self.raise_exceptions:
+                    raise
+                self.exception = e
+            finally:
+                processor.finalize()
+                self.side_effects_started = side_effects_started()
+
+    def store_failed_update(
+        self, exception: Exception, side_effects_started: bool | None = None
+    ):
+        try:
+            FailedUpdate.objects.create(
+                update=self.telegram_message,
+                update_id=self.telegram_message.get("update_id"),
+                processor=self.processor_name or "",
+                exception_type=exception.__class__.__name__,
+                exception_message=getattr(exception, "message", str(exception)),
+                stage_durations=self.stage_durations,
+                side_effects_started=(
+                    self.side_effects_started
+                    if side_effects_started is None
+                    else side_effects_started
+                ),
+            )
+        except Exception as e:
+            logger.exception(f"Failed update not stored: {e}")
@@ -34,3 +34,20 @@ ALL_DATA_RECEIVED_RESPONSE = (
 )
 
 EDITED_MESSAGE_RESPONSE = "Нажаль я не підтримую редагування повідомлень. Чи хотіли б ви ввести дані з самого початку?"
+
+PROFILING_ENABLED_RESPONSE = (
+    "Профілювання увімкнено для наступних {updates_count} повідомлень."
+)
+PROFILING_INVALID_UPDATES_COUNT_RESPONSE = "Вкажіть кількість повідомлень від 1 до {max_updates_count}, наприклад: /profile_10."
+
+REPORT_JOB_QUEUED_RESPONSE = "Звіт формується. Я надішлю файл, щойно він буде готовий."
+REPORT_JOB_ALREADY_QUEUED_RESPONSE = (
+    "Такий звіт вже формується. Я надішлю файл, щойно він буде готовий."
+)
+REPORT_JOB_FAILED_RESPONSE = "Нажаль не вдалося сформувати звіт. Спробуйте пізніше."
+REPORT_INVALID_COMMAND_RESPONSE = (
+    "Вкажіть звіт у форматі /report_<дд-мм-рррр>_<дд-мм-рррр>_<формат>, "
+    "доступні формати: {report_formats}. Наприклад: /report_01-02-2024_29-02-2024_xlsx."
+)
+
+UNSUPPORTED_MESSAGE_RESPONSE = "Нажаль я розумію лише текстові повідомлення."
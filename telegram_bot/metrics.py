@@ -0,0 +1,155 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from telegram_bot.logger_config import logger
+
+STAGE_DURATION_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+current_processor: ContextVar[str] = ContextVar("current_processor", default="none")
+# Durations of the stages of the current update in seconds, stored with it if
+# its processing fails.
+current_stage_durations: ContextVar[dict[str, float] | None] = ContextVar(
+    "current_stage_durations", default=None
+)
+
+stage_duration = Histogram(
+    "hero_search_bot_stage_duration_seconds",
+    "Time spent in a stage of the telegram update processing.",
+    ["processor", "stage"],
+    buckets=STAGE_DURATION_BUCKETS,
+)
+processed_updates = Counter(
+    "hero_search_bot_updates",
+    "Telegram updates processed by the bot.",
+    ["processor"],
+)
+skipped_updates = Counter(
+    "hero_search_bot_skipped_updates",
+    "Telegram updates dropped before processing since they need no side effects nor response.",
+    ["processor"],
+)
+exceptions = Counter(
+    "hero_search_bot_exceptions",
+    "Exceptions raised during the telegram update processing.",
+    ["processor", "exception"],
+)
+session_near_cache_requests = Counter(
+    "hero_search_bot_session_near_cache_requests",
+    "Session reads served from the near-cache (hit) or from redis (miss).",
+    ["result"],
+)
+
+_stage_duration_children = {}
+
+
+def _get_stage_duration_child(processor: str, stage: str):
+    key = (processor, stage)
+    if (child := _stage_duration_children.get(key)) is None:
+        child = _stage_duration_children[key] = stage_duration.labels(
+            processor=processor, stage=stage
+        )
+    return child
+
+
+@contextmanager
+def measure_stage(stage: str):
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - started_at
+        _get_stage_duration_child(current_processor.get(), stage).observe(duration)
+        if (stage_durations := current_stage_durations.get()) is not None:
+            stage_durations[stage] = stage_durations.get(stage, 0) + duration
+
+
+@contextmanager
+def collect_stage_durations(stage_durations: dict[str, float]):
+    token = current_stage_durations.set(stage_durations)
+    try:
+        yield stage_durations
+    finally:
+        current_stage_durations.reset(token)
+
+
+def count_processed_update():
+    processed_updates.labels(processor=current_processor.get()).inc()
+
+
+def count_skipped_update():
+    skipped_updates.labels(processor=current_processor.get()).inc()
+
+
+def count_exception(exception: Exception):
+    exceptions.labels(
+        processor=current_processor.get(),
+        exception=exception.__class__.__name__,
+    ).inc()
+
+
+def count_near_cache_request(hit: bool):
+    session_near_cache_requests.labels(result="hit" if hit else "miss").inc()
+
+
+class SessionsCollector(Collector):
+    def __init__(
+        self,
+        count_open_sessions: Callable[[], int],
+        count_abandoned_sessions: Callable[[], int],
+    ):
+        self.count_open_sessions = count_open_sessions
+        self.count_abandoned_sessions = count_abandoned_sessions
+
+    def collect(self):
+        try:
+            open_sessions = self.count_open_sessions()
+            abandoned_sessions = self.count_abandoned_sessions()
+        except Exception as e:
+            logger.error(f"Counting sessions failed: {e}")
+            return
+        yield GaugeMetricFamily(
+            "hero_search_bot_open_sessions",
+            "User input sessions currently stored.",
+            value=open_sessions,
+        )
+        yield CounterMetricFamily(
+            "hero_search_bot_abandoned_sessions",
+            "User input sessions expired before all data was confirmed.",
+            value=abandoned_sessions,
+        )
+
+
+def get_metrics_registry() -> CollectorRegistry:
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
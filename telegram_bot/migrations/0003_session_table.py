@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("telegram_bot", "0002_rename_dataentryauthor_telegramuser_botstatuschange"),
+    ]
+
+    # Storage of the PostgresSessionStore. The table is UNLOGGED since sessions
+    # are short living and may be lost on a crash, same as with redis.
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE UNLOGGED TABLE telegram_bot_session (
+                user_id bigint PRIMARY KEY,
+                data jsonb NOT NULL,
+                expires_at timestamptz
+            );
+            CREATE INDEX telegram_bot_session_expires_at_idx
+                ON telegram_bot_session (expires_at);
+            """,
+            reverse_sql="DROP TABLE telegram_bot_session;",
+        ),
+    ]
@@ -0,0 +1,110 @@
+from django.db import migrations
+
+# Tables partitioned by month of the column, with their foreign key and its index.
+PARTITIONED_TABLES = (
+    (
+        "telegram_bot_herodata",
+        "created_at",
+        "author_id",
+        "telegram_bot_herodat_author_id_7b6887bc_fk_telegram_",
+        "telegram_bot_herodata_author_id_7b6887bc",
+    ),
+    (
+        "telegram_bot_botstatuschange",
+        "date_time",
+        "initiator_id",
+        "telegram_bot_botstat_initiator_id_16e12111_fk_telegram_",
+        "telegram_bot_botstatuschange_initiator_id_16e12111",
+    ),
+)
+# Partitions created for the months after the current one, later ones are
+# created by the manage_partitions command.
+MONTHS_AHEAD = 3
+
+
+def _add_constraints(table, fk_column, fk_name, fk_index_name, primary_key):
+    return f"""
+    ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key});
+    ALTER TABLE {table} ADD CONSTRAINT {fk_name} FOREIGN KEY ({fk_column})
+        REFERENCES telegram_bot_telegramuser (id) DEFERRABLE INITIALLY DEFERRED;
+    CREATE INDEX {fk_index_name} ON {table} ({fk_column});
+    """
+
+
+def _copy_table(table, source_table):
+    return f"""
+    INSERT INTO {table} SELECT * FROM {source_table};
+    SELECT setval(
+        pg_get_serial_sequence('{table}', 'id'),
+        COALESCE((SELECT max(id) FROM {table}), 0) + 1,
+        false
+    );
+    DROP TABLE {source_table};
+    """
+
+
+def get_partition_sql(table, column, fk_column, fk_name, fk_index_name):
+    # The primary key of a partitioned table must include the partition key.
+    # The rows outside of the created partitions go to the default one.
+    return f"""
+    ALTER TABLE {table} RENAME TO {table}_unpartitioned;
+    ALTER SEQUENCE {table}_id_seq RENAME TO {table}_unpartitioned_id_seq;
+    CREATE TABLE {table} (
+        LIKE {table}_unpartitioned INCLUDING DEFAULTS INCLUDING IDENTITY
+    ) PARTITION BY RANGE ({column});
+    CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;
+    DO $$
+    DECLARE
+        month_start timestamp := date_trunc(
+            'month',
+            COALESCE((SELECT min({column}) FROM {table}_unpartitioned), now())
+            AT TIME ZONE 'UTC'
+        );
+        last_month_start timestamp := date_trunc('month', now() AT TIME ZONE 'UTC')
+            + interval '{MONTHS_AHEAD} months';
+    BEGIN
+        WHILE month_start <= last_month_start LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+                '{table}_p' || to_char(month_start, 'YYYY_MM'),
+                month_start AT TIME ZONE 'UTC',
+                (month_start + interval '1 month') AT TIME ZONE 'UTC'
+            );
+            month_start := month_start + interval '1 month';
+        END LOOP;
+    END
+    $$;
+    {_copy_table(table, f"{table}_unpartitioned")}
+    {_add_constraints(table, fk_column, fk_name, fk_index_name, f"id, {column}")}
+    CREATE INDEX {table}_{column}_idx ON {table} ({column});
+    """
+
+
+def get_unpartition_sql(table, column, fk_column, fk_name, fk_index_name):
+    # The detached partitions are kept as separate tables.
+    return f"""
+    ALTER TABLE {table} RENAME TO {table}_partitioned;
+    ALTER SEQUENCE {table}_id_seq RENAME TO {table}_partitioned_id_seq;
+    CREATE TABLE {table} (
+        LIKE {table}_partitioned INCLUDING DEFAULTS INCLUDING IDENTITY
+    );
+    {_copy_table(table, f"{table}_partitioned")}
+    {_add_constraints(table, fk_column, fk_name, fk_index_name, "id")}
+    """
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("telegram_bot", "0003_session_table"),
+    ]
+
+    # Both tables are append only and queried by time, monthly range partitions
+    # let the report queries skip the other months and keep vacuum cheap.
+    operations = [
+        migrations.RunSQL(
+            sql=get_partition_sql(*partitioned_table),
+            reverse_sql=get_unpartition_sql(*partitioned_table),
+        )
+        for partitioned_table in PARTITIONED_TABLES
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.3 on 2026-10-19 13:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("telegram_bot", "0004_partition_by_month"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FailedUpdate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("update", models.JSONField()),
+                ("update_id", models.BigIntegerField(blank=True, null=True)),
+                ("processor", models.CharField(blank=True, max_length=100)),
+                ("exception_type", models.CharField(max_length=100)),
+                ("exception_message", models.TextField(blank=True)),
+                ("stage_durations", models.JSONField(default=dict)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("replay_count", models.PositiveIntegerField(default=0)),
+                ("replayed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-19 13:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("telegram_bot", "0005_failed_update"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="failedupdate",
+            name="side_effects_started",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("telegram_bot", "0006_failed_update_side_effects_started"),
+    ]
+
+    # The count of the expired sessions of the PostgresSessionStore, in one row.
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE UNLOGGED TABLE telegram_bot_session_stats (
+                abandoned_count bigint NOT NULL
+            );
+            INSERT INTO telegram_bot_session_stats (abandoned_count) VALUES (0);
+            """,
+            reverse_sql="DROP TABLE telegram_bot_session_stats;",
+        ),
+    ]
@@ -35,3 +35,21 @@ class BotStatusChange(models.Model):
     chat_type = EnumIntegerField(ChatType)
     date_time = models.DateTimeField(auto_now_add=True)
     chat_id = models.BigIntegerField()
+
+
+class FailedUpdate(models.Model):
+    # Updates which processing raised an exception, to be replayed with the
+    # replay_failed_updates command.
+    update = models.JSONField()
+    update_id = models.BigIntegerField(null=True, blank=True)
+    processor = models.CharField(max_length=100, blank=True)
+    exception_type = models.CharField(max_length=100)
+    exception_message = models.TextField(blank=True)
+    # Seconds spent in every measured stage, e.g. "total" or "telegram_send".
+    stage_durations = models.JSONField(default=dict)
+    # The processor may have written data or sent messages before it failed,
+    # so the update is not replayed.
+    side_effects_started = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    replay_count = models.PositiveIntegerField(default=0)
+    replayed_at = models.DateTimeField(null=True, blank=True)
@@ -0,0 +1,86 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.db.models import QuerySet
+
+from telegram_bot.logger_config import logger
+from telegram_bot.report_generator import ReportGenerator
+
+PARQUET_BATCH_SIZE = 50_000
+PARQUET_COMPRESSION = "zstd"
+HERO_DATA_FIELDS = (
+    ("id", pa.int64()),
+    ("case_id", pa.string()),
+    ("hero_last_name", pa.string()),
+    ("hero_first_name", pa.string()),
+    ("hero_patronymic", pa.string()),
+    ("hero_date_of_birth", pa.date32()),
+    ("item_used_for_dna_extraction", pa.string()),
+    ("relative_last_name", pa.string()),
+    ("relative_first_name", pa.string()),
+    ("relative_patronymic", pa.string()),
+    ("is_added_to_dna_db", pa.bool_()),
+    ("comment", pa.string()),
+    ("created_at", pa.timestamp("us", tz="UTC")),
+    ("author_id", pa.int64()),
+)
+AUTHOR_FIELDS = (
+    ("author__telegram_id", pa.int64()),
+    ("author__username", pa.string()),
+    ("author__first_name", pa.string()),
+    ("author__last_name", pa.string()),
+)
+
+
+def get_parquet_schema(with_authors: bool = False) -> pa.Schema:
+    fields = HERO_DATA_FIELDS + AUTHOR_FIELDS if with_authors else HERO_DATA_FIELDS
+    return pa.schema(fields)
+
+
+def export_hero_data_to_parquet(
+    queryset: QuerySet,
+    file_path: str,
+    with_authors: bool = False,
+    batch_size: int = PARQUET_BATCH_SIZE,
+) -> int:
+    # The rows are read from a server side cursor and written as a row group
+    # per batch, so at most one batch is kept in memory. The names, the items
+    # and the dates repeat a lot and are dictionary encoded.
+    schema = get_parquet_schema(with_authors)
+    rows = queryset.values_list(*schema.names).iterator(chunk_size=batch_size)
+    rows_count = 0
+    with pq.ParquetWriter(
+        file_path,
+        schema,
+        compression=PARQUET_COMPRESSION,
+        use_dictionary=True,
+    ) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                writer.write_batch(_to_record_batch(batch, schema))
+                rows_count += len(batch)
+                batch = []
+        if batch:
+            writer.write_batch(_to_record_batch(batch, schema))
+            rows_count += len(batch)
+    logger.info(f"Exported {rows_count} HeroData rows to {file_path}.")
+    return rows_count
+
+
+def _to_record_batch(rows: list[tuple], schema: pa.Schema) -> pa.RecordBatch:
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+class ParquetReportGenerator(ReportGenerator):
+    FILE_EXTENSION = "parquet"
+
+    def generate_report(self):
+        file_name = self._get_file_name()
+        logger.info(f"Generating report {file_name}.")
+        export_hero_data_to_parquet(self._get_report_queryset(), file_name)
+        return file_name
@@ -0,0 +1,143 @@
+import datetime
+import re
+
+from django.db import connection, transaction
+
+from telegram_bot.logger_config import logger
+from telegram_bot.models import BotStatusChange, HeroData
+
+# The tables partitioned by month of the column in 0004_partition_by_month.
+PARTITIONED_TABLES = {
+    HeroData._meta.db_table: "created_at",
+    BotStatusChange._meta.db_table: "date_time",
+}
+PARTITION_NAME_REGEX = re.compile(r"_p(?P<year>\d{4})_(?P<month>\d{2})$")
+# The ACCESS EXCLUSIVE locks are not waited for behind long queries, which
+# would block the queries queued after them.
+LOCK_TIMEOUT_MS = 5000
+
+
+def get_month_start(date: datetime.date) -> datetime.date:
+    return date.replace(day=1)
+
+
+def add_months(month_start: datetime.date, months: int) -> datetime.date:
+    years, month_index = divmod(month_start.month - 1 + months, 12)
+    return datetime.date(month_start.year + years, month_index + 1, 1)
+
+
+def get_partition_name(table: str, month_start: datetime.date) -> str:
+    return f"{table}_p{month_start.strftime('%Y_%m')}"
+
+
+def get_default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def _get_month_bound(month_start: datetime.date) -> datetime.datetime:
+    return datetime.datetime.combine(
+        month_start, datetime.time.min, tzinfo=datetime.timezone.utc
+    )
+
+
+def get_monthly_partitions(table: str) -> dict[datetime.date, str]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT partition.relname
+            FROM pg_inherits
+            JOIN pg_class partition ON partition.oid = pg_inherits.inhrelid
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            WHERE parent.relname = %s
+            """,
+            [table],
+        )
+        partition_names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for partition_name in partition_names:
+        if match := PARTITION_NAME_REGEX.search(partition_name):
+            month_start = datetime.date(int(match["year"]), int(match["month"]), 1)
+            partitions[month_start] = partition_name
+    return partitions
+
+
+@transaction.atomic
+def create_partition(table: str, month_start: datetime.date) -> str:
+    # The partition is created as a separate table and attached, after the
+    # rows of its month are moved there from the default partition. The move
+    # and the attach, which scans the default partition, hold an ACCESS
+    # EXCLUSIVE lock on the default partition until the commit, so the rows
+    # outside of the existing partitions are not written meanwhile. It is
+    # short as long as the partitions are created ahead and the default
+    # partition stays empty. The other partitions are not blocked.
+    column = PARTITIONED_TABLES[table]
+    partition_name = get_partition_name(table, month_start)
+    month_bounds = [
+        _get_month_bound(month_start),
+        _get_month_bound(add_months(month_start, 1)),
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL lock_timeout = %s", [f"{LOCK_TIMEOUT_MS}ms"])
+        cursor.execute(
+            f"CREATE TABLE {partition_name} (LIKE {table} INCLUDING DEFAULTS)"
+        )
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {get_default_partition_name(table)}
+                WHERE {column} >= %s AND {column} < %s
+                RETURNING *
+            )
+            INSERT INTO {partition_name} SELECT * FROM moved
+            """,
+            month_bounds,
+        )
+        cursor.execute(
+            f"""
+            ALTER TABLE {table} ATTACH PARTITION {partition_name}
+            FOR VALUES FROM (%s) TO (%s)
+            """,
+            month_bounds,
+        )
+    logger.info(f"Partition {partition_name} created.")
+    return partition_name
+
+
+def create_future_partitions(
+    table: str, months_ahead: int, today: datetime.date | None = None
+) -> list[str]:
+    current_month_start = get_month_start(today or datetime.date.today())
+    partitions = get_monthly_partitions(table)
+    created_partitions = []
+    for months in range(months_ahead + 1):
+        month_start = add_months(current_month_start, months)
+        if month_start not in partitions:
+            created_partitions.append(create_partition(table, month_start))
+    return created_partitions
+
+
+@transaction.atomic
+def detach_partition(table: str, partition_name: str):
+    # Takes a short ACCESS EXCLUSIVE lock on the table: Postgres does not
+    # detach concurrently while a default partition exists, and the tables
+    # have one.
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL lock_timeout = %s", [f"{LOCK_TIMEOUT_MS}ms"])
+        cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {partition_name}")
+
+
+def detach_old_partitions(
+    table: str, months_to_keep: int, today: datetime.date | None = None
+) -> list[str]:
+    # The detached partitions stay as separate tables, to be archived or dropped.
+    detached_partitions = []
+    first_kept_month_start = add_months(
+        get_month_start(today or datetime.date.today()), -months_to_keep
+    )
+    for month_start, partition_name in sorted(get_monthly_partitions(table).items()):
+        if month_start >= first_kept_month_start:
+            break
+        detach_partition(table, partition_name)
+        logger.info(f"Partition {partition_name} detached.")
+        detached_partitions.append(partition_name)
+    return detached_partitions
@@ -0,0 +1,24 @@
+import hmac
+
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def is_secret_token_valid(secret_token: str | None) -> bool:
+    # All requests are accepted until the webhook is set with a secret token.
+    if not settings.TELEGRAM_WEBHOOK_SECRET_TOKEN:
+        return True
+    if secret_token is None:
+        return False
+    return hmac.compare_digest(
+        secret_token.encode(), settings.TELEGRAM_WEBHOOK_SECRET_TOKEN.encode()
+    )
+
+
+class TelegramSecretTokenPermission(BasePermission):
+    message = "Invalid secret token."
+
+    def has_permission(self, request, view):
+        return is_secret_token_valid(request.headers.get(SECRET_TOKEN_HEADER))
@@ -0,0 +1,81 @@
+import cProfile
+import os
+import random
+import time
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+
+from telegram_bot.logger_config import logger
+from telegram_bot.redis_client import client
+from telegram_bot.redis_keys import PROFILED_UPDATES_LEFT_KEY
+
+PROFILING_STATE_REFRESH_INTERVAL = 1.0
+
+
+class ProfilingState:
+    def __init__(self):
+        self.enabled_by_command = False
+        self.refreshed_at = 0.0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self.refreshed_at >= PROFILING_STATE_REFRESH_INTERVAL:
+            self.refreshed_at = now
+            self.enabled_by_command = bool(client.exists(PROFILED_UPDATES_LEFT_KEY))
+
+    def _take_profiled_update(self) -> bool:
+        updates_left = client.decr(PROFILED_UPDATES_LEFT_KEY)
+        if updates_left < 0:
+            client.delete(PROFILED_UPDATES_LEFT_KEY)
+            self.enabled_by_command = False
+            return False
+        return True
+
+    def should_profile(self) -> bool:
+        if settings.PROFILING_SAMPLE_RATE and (
+            random.random() < settings.PROFILING_SAMPLE_RATE
+        ):
+            return True
+        self._refresh()
+        if self.enabled_by_command:
+            return self._take_profiled_update()
+        return False
+
+
+profiling_state = ProfilingState()
+
+
+def enable_profiling_for_next_updates(updates_count: int):
+    client.set(PROFILED_UPDATES_LEFT_KEY, updates_count)
+    profiling_state.refreshed_at = 0.0
+
+
+def get_profile_file_path(label: str) -> str:
+    file_name = f"{time.time_ns()}_{os.getpid()}_{label}.prof"
+    return os.path.join(settings.PROFILES_DIRECTORY, file_name)
+
+
+@contextmanager
+def _profile(label: str):
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        os.makedirs(settings.PROFILES_DIRECTORY, exist_ok=True)
+        file_path = get_profile_file_path(label)
+        profile.dump_stats(file_path)
+        logger.info(f"Profile saved to {file_path}")
+
+
+def profile_update(label: str):
+    try:
+        should_profile = profiling_state.should_profile()
+    except Exception as e:
+        logger.error(f"Checking profiling state failed: {e}")
+        should_profile = False
+    if should_profile:
+        return _profile(label)
+    return nullcontext()
@@ -0,0 +1,15 @@
+import os
+
+import redis
+from django.conf import settings
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(settings.BASE_DIR, ".env"))
+if settings.REDIS_CLUSTER_MODE:
+    client = redis.RedisCluster(
+        host=os.getenv("REDIS_HOST"), port=os.getenv("REDIS_PORT")
+    )
+else:
+    client = redis.Redis(
+        host=os.getenv("REDIS_HOST"), port=os.getenv("REDIS_PORT"), db=0
+    )
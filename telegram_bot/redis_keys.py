@@ -0,0 +1,56 @@
+import re
+
+from django.conf import settings
+
+# Keys of one user share the {<user_id>} hash tag, so in Redis Cluster they are
+# placed in the same slot and can be used together in pipelines and scripts.
+KEY_PREFIX = settings.REDIS_KEY_PREFIX
+SESSION_KEYS_PREFIX = f"{KEY_PREFIX}:session:"
+SESSION_KEYS_PATTERN = f"{SESSION_KEYS_PREFIX}*"
+SESSION_KEY_REGEX = re.compile(rf"^{re.escape(KEY_PREFIX)}:session:{{(-?\d+)}}$")
+
+PROFILED_UPDATES_LEFT_KEY = f"{KEY_PREFIX}:profiling:updates_left"
+ABANDONED_SESSIONS_COUNTER_KEY = f"{KEY_PREFIX}:stats:abandoned_sessions"
+# The report jobs keys share the {report_jobs} hash tag, so in Redis Cluster a
+# job is locked and queued in one script and moved between the lists.
+REPORT_JOBS_QUEUE_KEY = f"{KEY_PREFIX}:{{report_jobs}}:queue"
+REPORT_CACHE_LRU_KEY = f"{KEY_PREFIX}:report_cache:lru"
+REPORT_CACHE_VERSION_KEY = f"{KEY_PREFIX}:report_cache:version"
+UPDATES_STREAM_KEY = f"{KEY_PREFIX}:updates:stream"
+
+
+def get_session_key(user_id: int) -> str:
+    return f"{KEY_PREFIX}:session:{{{user_id}}}"
+
+
+def get_user_lock_key(user_id: int) -> str:
+    return f"{KEY_PREFIX}:lock:{{{user_id}}}"
+
+
+def get_update_idempotency_key(user_id: int, update_id: int) -> str:
+    return f"{KEY_PREFIX}:update:{{{user_id}}}:{update_id}"
+
+
+def get_report_job_lock_key(job_id: str) -> str:
+    return f"{KEY_PREFIX}:{{report_jobs}}:job:{job_id}:lock"
+
+
+def get_report_job_subscribers_key(job_id: str) -> str:
+    return f"{KEY_PREFIX}:{{report_jobs}}:job:{job_id}:subscribers"
+
+
+def get_report_jobs_processing_key(worker_name: str) -> str:
+    return f"{KEY_PREFIX}:{{report_jobs}}:processing:{worker_name}"
+
+
+def get_report_cache_entry_key(job_id: str) -> str:
+    return f"{KEY_PREFIX}:report_cache:{{{job_id}}}"
+
+
+def get_session_user_id(key: bytes | str) -> int | None:
+    if isinstance(key, bytes):
+        key = key.decode()
+    match = SESSION_KEY_REGEX.match(key)
+    if match is None:
+        return None
+    return int(match.group(1))
@@ -0,0 +1,124 @@
+import datetime
+import json
+import os
+import shutil
+import time
+
+from django.conf import settings
+
+from telegram_bot.dataclasses import CachedReport, ReportJob
+from telegram_bot.logger_config import logger
+from telegram_bot.redis_client import client
+from telegram_bot.redis_keys import (
+    REPORT_CACHE_LRU_KEY,
+    REPORT_CACHE_VERSION_KEY,
+    get_report_cache_entry_key,
+)
+
+
+class ReportCache:
+    # The files are stored in REPORT_CACHE_DIRECTORY, the metadata in redis:
+    # a hash per report and a sorted set of the reports by the last use time.
+
+    @staticmethod
+    def get_version() -> int:
+        # Changed by every invalidation. A report generated while the version
+        # changed may miss the new data, so it is not cached.
+        return int(client.get(REPORT_CACHE_VERSION_KEY) or 0)
+
+    def get(self, report_job: ReportJob) -> CachedReport | None:
+        entry = client.hgetall(get_report_cache_entry_key(report_job.id))
+        if not entry:
+            return None
+        cached_report = CachedReport(
+            file_paths=json.loads(entry[b"file_paths"]),
+            file_ids=json.loads(entry[b"file_ids"]) if b"file_ids" in entry else None,
+        )
+        if cached_report.file_ids is None and not all(
+            os.path.exists(file_path) for file_path in cached_report.file_paths
+        ):
+            self.delete(report_job)
+            return None
+        client.zadd(REPORT_CACHE_LRU_KEY, {report_job.id: time.time()})
+        return cached_report
+
+    def put(
+        self, report_job: ReportJob, report_paths: list[str], version: int
+    ) -> CachedReport | None:
+        if version != self.get_version():
+            logger.info(f"Report {report_job.id} changed while generated, not cached.")
+            return None
+        os.makedirs(settings.REPORT_CACHE_DIRECTORY, exist_ok=True)
+        file_paths = []
+        for report_path in report_paths:
+            file_path = os.path.join(
+                settings.REPORT_CACHE_DIRECTORY, os.path.basename(report_path)
+            )
+            shutil.move(report_path, file_path)
+            file_paths.append(file_path)
+        with client.pipeline(transaction=not settings.REDIS_CLUSTER_MODE) as pipeline:
+            pipeline.hset(
+                get_report_cache_entry_key(report_job.id),
+                mapping={
+                    "file_paths": json.dumps(file_paths),
+                    "file_size": sum(map(os.path.getsize, file_paths)),
+                },
+            )
+            pipeline.zadd(REPORT_CACHE_LRU_KEY, {report_job.id: time.time()})
+            pipeline.execute()
+        self._evict()
+        return CachedReport(file_paths=file_paths)
+
+    @staticmethod
+    def set_file_ids(report_job: ReportJob, file_ids: list[str]):
+        client.hset(
+            get_report_cache_entry_key(report_job.id), "file_ids", json.dumps(file_ids)
+        )
+
+    @staticmethod
+    def delete(report_job: ReportJob):
+        file_paths = client.hget(
+            get_report_cache_entry_key(report_job.id), "file_paths"
+        )
+        with client.pipeline(transaction=not settings.REDIS_CLUSTER_MODE) as pipeline:
+            pipeline.delete(get_report_cache_entry_key(report_job.id))
+            pipeline.zrem(REPORT_CACHE_LRU_KEY, report_job.id)
+            pipeline.execute()
+        for file_path in json.loads(file_paths or "[]"):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    @staticmethod
+    def _get_file_sizes(job_ids: list[str]) -> list[int]:
+        with client.pipeline(transaction=False) as pipeline:
+            for job_id in job_ids:
+                pipeline.hget(get_report_cache_entry_key(job_id), "file_size")
+            return [int(file_size or 0) for file_size in pipeline.execute()]
+
+    def _evict(self):
+        # From the least recently used report.
+        job_ids = [
+            job_id.decode() for job_id in client.zrange(REPORT_CACHE_LRU_KEY, 0, -1)
+        ]
+        file_sizes = self._get_file_sizes(job_ids)
+        cached_size = sum(file_sizes)
+        for job_id, file_size in zip(job_ids, file_sizes):
+            if cached_size <= settings.REPORT_CACHE_MAX_BYTES:
+                return
+            logger.info(f"Evicting cached report {job_id}.")
+            self.delete(ReportJob.from_id(job_id))
+            cached_size -= file_size
+
+    def invalidate_date(self, date: datetime.date):
+        self.invalidate_dates(date, date)
+
+    def invalidate_dates(self, start_date: datetime.date, end_date: datetime.date):
+        client.incr(REPORT_CACHE_VERSION_KEY)
+        for job_id in client.zrange(REPORT_CACHE_LRU_KEY, 0, -1):
+            report_job = ReportJob.from_id(job_id.decode())
+            if report_job.start_date <= end_date and start_date <= report_job.end_date:
+                logger.info(f"Invalidating cached report {report_job.id}.")
+                self.delete(report_job)
+
+
+report_cache = ReportCache()
@@ -0,0 +1,142 @@
+import gzip
+import os
+import zipfile
+from typing import BinaryIO, Iterator
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from telegram_bot.logger_config import logger
+
+GZIP_COMPRESSION = "gzip"
+ZIP_COMPRESSION = "zip"
+# Upper bound of the compressed data buffered by zlib before it reaches the file.
+COMPRESSOR_PENDING_MAX_BYTES = 256 * 1024
+# Headers and trailers of the archive, the zip central directory.
+ARCHIVE_OVERHEAD_BYTES = 1024
+
+
+class ReportPartWriter:
+    def __init__(self, file_path: str, compression: str, csv_file_name: str):
+        self.file_path = file_path
+        self.compression = compression
+        self.uncompressed_size = 0
+        self._file = open(file_path, "wb")
+        self._archive = None
+        if compression == GZIP_COMPRESSION:
+            self._stream = gzip.GzipFile(
+                filename=csv_file_name, mode="wb", fileobj=self._file
+            )
+        elif compression == ZIP_COMPRESSION:
+            self._archive = zipfile.ZipFile(
+                self._file, "w", compression=zipfile.ZIP_DEFLATED
+            )
+            self._stream = self._archive.open(csv_file_name, "w", force_zip64=True)
+        else:
+            self._stream = self._file
+
+    def get_max_size(self) -> int:
+        # The size the file may have if it is closed right now.
+        if not self.compression:
+            return self._file.tell()
+        pending_size = min(self.uncompressed_size, COMPRESSOR_PENDING_MAX_BYTES)
+        return self._file.tell() + pending_size + ARCHIVE_OVERHEAD_BYTES
+
+    def write(self, line: bytes):
+        self._stream.write(line)
+        self.uncompressed_size += len(line)
+
+    def close(self):
+        if self._stream is not self._file:
+            self._stream.close()
+        if self._archive is not None:
+            self._archive.close()
+        self._file.close()
+
+
+def _get_extensions(compression: str) -> tuple[str, str]:
+    # The extensions of the part file and of the csv inside of it.
+    if compression == GZIP_COMPRESSION:
+        return ".csv.gz", ".csv"
+    if compression == ZIP_COMPRESSION:
+        return ".zip", ".csv"
+    if not compression:
+        return ".csv", ".csv"
+    raise ImproperlyConfigured(f"Unknown REPORT_COMPRESSION: {compression}.")
+
+
+def _read_records(report_file: BinaryIO) -> Iterator[bytes]:
+    # A quoted field may contain line breaks, a record ends at the first line
+    # break after an even number of quotes, the escaped quotes are doubled.
+    record_lines = []
+    quotes_count = 0
+    for line in report_file:
+        record_lines.append(line)
+        quotes_count += line.count(b'"')
+        if quotes_count % 2 == 0:
+            yield b"".join(record_lines)
+            record_lines = []
+            quotes_count = 0
+    if record_lines:
+        yield b"".join(record_lines)
+
+
+def compress_report(report_path: str) -> list[str]:
+    # Compresses the report with REPORT_COMPRESSION and splits it into parts
+    # of at most REPORT_MAX_PART_BYTES, every part starts with the headers line.
+    # The rows are streamed, the report is never loaded into memory.
+    compression = settings.REPORT_COMPRESSION
+    max_part_bytes = settings.REPORT_MAX_PART_BYTES
+    extension, csv_extension = _get_extensions(compression)
+    if not compression and os.path.getsize(report_path) <= max_part_bytes:
+        return [report_path]
+
+    base_path = os.path.splitext(report_path)[0]
+    parts: list[ReportPartWriter] = []
+
+    def open_part() -> ReportPartWriter:
+        # A compressed report is named as the csv unless it is split, the name
+        # of the first part is changed when the second one is opened.
+        # The not compressed parts must not overwrite the report while it is read.
+        if len(parts) == 1 and compression:
+            first_part_path = f"{base_path}_part1{extension}"
+            os.rename(parts[0].file_path, first_part_path)
+            parts[0].file_path = first_part_path
+        if parts or not compression:
+            part_base_path = f"{base_path}_part{len(parts) + 1}"
+        else:
+            part_base_path = base_path
+        part = ReportPartWriter(
+            part_base_path + extension,
+            compression,
+            os.path.basename(part_base_path) + csv_extension,
+        )
+        parts.append(part)
+        return part
+
+    try:
+        with open(report_path, "rb") as report_file:
+            records = _read_records(report_file)
+            headers_line = next(records, b"")
+            part = open_part()
+            part.write(headers_line)
+            rows_in_part = 0
+            for record in records:
+                if rows_in_part and part.get_max_size() + len(record) > max_part_bytes:
+                    part.close()
+                    part = open_part()
+                    part.write(headers_line)
+                    rows_in_part = 0
+                part.write(record)
+                rows_in_part += 1
+            part.close()
+    except Exception:
+        for part in parts:
+            part.close()
+            os.remove(part.file_path)
+        raise
+
+    os.remove(report_path)
+    part_paths = [part.file_path for part in parts]
+    logger.info(f"Report {report_path} compressed into {len(part_paths)} parts.")
+    return part_paths
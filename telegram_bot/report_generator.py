@@ -1,15 +1,29 @@
 import datetime
+import multiprocessing
 import os.path
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 
 from django.conf import settings
-from django.db.models import QuerySet
+from django.db import connections
+from django.db.models import Case, CharField, F, Func, QuerySet, Value, When
+from django.db.models.functions import Concat, NullIf
+from xlsxwriter import Workbook
 
 from telegram_bot.constants import DATE_FORMAT
 from telegram_bot.logger_config import logger
 from telegram_bot.models import HeroData
 
+REPORT_HEADERS_LINE = "Номер справи;ПІБ зниклого;Дата народження зниклого;Речі для отримання ДНК;Чи додано до бази ДНК;ПІБ родича;Коментар;Дата подання даних\n"
+# Rows per worksheet, the maximum of excel.
+XLSX_MAX_ROWS = 1_048_576
+# DATE_FORMAT in the postgres to_char notation.
+POSTGRES_DATE_FORMAT = "DD-MM-YYYY"
+
 
 class ReportGenerator:
+    FILE_EXTENSION = "csv"
+
     def __init__(self, start_date: datetime.date, end_date: datetime.date):
         self.start_date = start_date
         self.end_date = end_date
@@ -19,21 +33,22 @@ class ReportGenerator:
         end_datetime = datetime.datetime.combine(self.end_date, datetime.time.max)
         return start_datetime, end_datetime
 
-    def _get_filtered_queryset(self) -> QuerySet:
+    def _get_report_queryset(self) -> QuerySet:
         filter_date_times = self._get_filter_date_times()
-        return (
-            HeroData.objects.filter(created_at__range=filter_date_times)
-            .order_by("-created_at")
-            .iterator()
+        return HeroData.objects.filter(created_at__range=filter_date_times).order_by(
+            "-created_at"
         )
 
+    def _get_filtered_queryset(self) -> QuerySet:
+        return self._get_report_queryset().iterator()
+
     def _get_file_name(self) -> str:
-        file_name = f"{self.start_date.strftime(DATE_FORMAT)}_{self.end_date.strftime(DATE_FORMAT)}.csv"
+        file_name = f"{self.start_date.strftime(DATE_FORMAT)}_{self.end_date.strftime(DATE_FORMAT)}.{self.FILE_EXTENSION}"
         file_path = os.path.join(settings.BASE_DIR, file_name)
         return file_path
 
     @staticmethod
-    def _convert_hero_data_to_row(hero_data: HeroData) -> str:
+    def _get_row_values(hero_data: HeroData) -> list[str]:
         hero_full_name = f"{hero_data.hero_last_name} {hero_data.hero_first_name} {hero_data.hero_patronymic}"
         hero_date_of_birth = hero_data.hero_date_of_birth.strftime(DATE_FORMAT)
         relative_full_name = f"{hero_data.relative_last_name} {hero_data.relative_first_name} {hero_data.relative_patronymic}"
@@ -42,27 +57,199 @@ class ReportGenerator:
         else:
             is_added_to_dna_db = "Ні"
         created_at_date = hero_data.created_at.strftime(DATE_FORMAT)
-        joined_data = ";".join(
-            [
-                hero_data.case_id,
-                hero_full_name,
-                hero_date_of_birth,
-                hero_data.item_used_for_dna_extraction or "",
-                is_added_to_dna_db,
-                relative_full_name,
-                hero_data.comment or "",
-                created_at_date,
-            ]
-        )
+        return [
+            hero_data.case_id,
+            hero_full_name,
+            hero_date_of_birth,
+            hero_data.item_used_for_dna_extraction or "",
+            is_added_to_dna_db,
+            relative_full_name,
+            hero_data.comment or "",
+            created_at_date,
+        ]
+
+    @classmethod
+    def _convert_hero_data_to_row(cls, hero_data: HeroData) -> str:
+        joined_data = ";".join(cls._get_row_values(hero_data))
         return f"{joined_data}\n"
 
     def generate_report(self):
         file_name = self._get_file_name()
         logger.info(f"Generating report {file_name}.")
         with open(file_name, "w") as report_file:
-            headers_line = "Номер справи;ПІБ зниклого;Дата народження зниклого;Речі для отримання ДНК;Чи додано до бази ДНК;ПІБ родича;Коментар;Дата подання даних\n"
-            report_file.write(headers_line)
+            report_file.write(REPORT_HEADERS_LINE)
+            self._write_rows(report_file)
+        return file_name
+
+    def _write_rows(self, report_file):
+        for hero_data in self._get_filtered_queryset():
+            data_as_row = self._convert_hero_data_to_row(hero_data)
+            report_file.write(data_as_row)
+
+
+class XlsxReportGenerator(ReportGenerator):
+    # The constant memory mode writes every row to a temporary file as soon as
+    # the next row starts, so only one row is kept in memory. The values entered
+    # by the users are written as text, never as formulas or links.
+    FILE_EXTENSION = "xlsx"
+    WORKBOOK_OPTIONS = {
+        "constant_memory": True,
+        "strings_to_formulas": False,
+        "strings_to_urls": False,
+    }
+
+    def generate_report(self):
+        file_name = self._get_file_name()
+        logger.info(f"Generating report {file_name}.")
+        headers = REPORT_HEADERS_LINE.rstrip("\n").split(";")
+        workbook = Workbook(file_name, self.WORKBOOK_OPTIONS)
+        try:
+            worksheet = None
+            row_number = XLSX_MAX_ROWS
             for hero_data in self._get_filtered_queryset():
-                data_as_row = self._convert_hero_data_to_row(hero_data)
-                report_file.write(data_as_row)
+                if row_number == XLSX_MAX_ROWS:
+                    worksheet = workbook.add_worksheet()
+                    worksheet.write_row(0, 0, headers)
+                    row_number = 1
+                worksheet.write_row(row_number, 0, self._get_row_values(hero_data))
+                row_number += 1
+            if worksheet is None:
+                workbook.add_worksheet().write_row(0, 0, headers)
+        finally:
+            workbook.close()
+        return file_name
+
+
+def _format_date(field_name: str) -> Func:
+    return Func(
+        F(field_name),
+        Value(POSTGRES_DATE_FORMAT),
+        function="to_char",
+        output_field=CharField(),
+    )
+
+
+def _join_full_name(*field_names: str) -> Concat:
+    separated_field_names = []
+    for field_name in field_names:
+        if separated_field_names:
+            separated_field_names.append(Value(" "))
+        separated_field_names.append(F(field_name))
+    return Concat(*separated_field_names, output_field=CharField())
+
+
+class CopyReportGenerator(ReportGenerator):
+    # Formats the rows in postgres and streams them to the file with COPY,
+    # without creating a model instance per row. Empty values are selected as
+    # NULL since COPY writes empty strings quoted.
+
+    def _get_report_rows_queryset(self) -> QuerySet:
+        return (
+            HeroData.objects.filter(created_at__range=self._get_filter_date_times())
+            .order_by("-created_at")
+            .values_list(
+                "case_id",
+                _join_full_name("hero_last_name", "hero_first_name", "hero_patronymic"),
+                _format_date("hero_date_of_birth"),
+                NullIf("item_used_for_dna_extraction", Value("")),
+                Case(
+                    When(is_added_to_dna_db=True, then=Value("Так")),
+                    default=Value("Ні"),
+                ),
+                _join_full_name(
+                    "relative_last_name", "relative_first_name", "relative_patronymic"
+                ),
+                NullIf("comment", Value(""), output_field=CharField()),
+                _format_date("created_at"),
+            )
+        )
+
+    def generate_report(self):
+        file_name = self._get_file_name()
+        logger.info(f"Generating report {file_name} with COPY.")
+        queryset = self._get_report_rows_queryset()
+        sql, params = queryset.query.sql_with_params()
+        with connections[queryset.db].cursor() as cursor, open(
+            file_name, "w"
+        ) as report_file:
+            report_file.write(REPORT_HEADERS_LINE)
+            query = cursor.mogrify(sql, params).decode()
+            cursor.copy_expert(
+                f"COPY ({query}) TO STDOUT WITH (FORMAT csv, DELIMITER ';')",
+                report_file,
+            )
+        return file_name
+
+
+def split_date_range(
+    start_date: datetime.date, end_date: datetime.date, partitions_count: int
+) -> list[tuple[datetime.date, datetime.date]]:
+    days = (end_date - start_date).days + 1
+    partitions_count = max(1, min(partitions_count, days))
+    partition_days, longer_partitions_count = divmod(days, partitions_count)
+    date_ranges = []
+    partition_start_date = start_date
+    for index in range(partitions_count):
+        days_in_partition = partition_days + (index < longer_partitions_count)
+        partition_end_date = partition_start_date + datetime.timedelta(
+            days=days_in_partition - 1
+        )
+        date_ranges.append((partition_start_date, partition_end_date))
+        partition_start_date = partition_end_date + datetime.timedelta(days=1)
+    return date_ranges
+
+
+def _generate_report_partition(
+    start_date: datetime.date, end_date: datetime.date, file_path: str
+) -> str:
+    try:
+        with open(file_path, "w") as partition_file:
+            ReportGenerator(start_date=start_date, end_date=end_date)._write_rows(
+                partition_file
+            )
+    finally:
+        connections.close_all()
+    return file_path
+
+
+class ParallelReportGenerator(ReportGenerator):
+    # Splits the date range into REPORT_GENERATION_PROCESSES partitions,
+    # generated in forked processes with their own connections.
+
+    def generate_report(self):
+        file_name = self._get_file_name()
+        date_ranges = split_date_range(
+            self.start_date, self.end_date, settings.REPORT_GENERATION_PROCESSES
+        )
+        logger.info(f"Generating report {file_name} in {len(date_ranges)} partitions.")
+        partition_paths = [
+            f"{file_name}.part{index}" for index in range(len(date_ranges))
+        ]
+        # The forked processes must not reuse the connections of this one.
+        connections.close_all()
+        try:
+            with ProcessPoolExecutor(
+                max_workers=len(date_ranges),
+                mp_context=multiprocessing.get_context("fork"),
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _generate_report_partition, start_date, end_date, path
+                    )
+                    for (start_date, end_date), path in zip(
+                        date_ranges, partition_paths
+                    )
+                ]
+                for future in futures:
+                    future.result()
+            with open(file_name, "w") as report_file:
+                report_file.write(REPORT_HEADERS_LINE)
+                # The partitions are in ascending order of the dates.
+                for partition_path in reversed(partition_paths):
+                    with open(partition_path, "r") as partition_file:
+                        shutil.copyfileobj(partition_file, report_file)
+        finally:
+            for partition_path in partition_paths:
+                if os.path.exists(partition_path):
+                    os.remove(partition_path)
         return file_name
@@ -0,0 +1,253 @@
+import os
+import socket
+
+import requests
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+from telegram_bot.constants import (
+    BASE_URL,
+    CSV_REPORT_FORMAT,
+    PARQUET_REPORT_FORMAT,
+    XLSX_REPORT_FORMAT,
+)
+from telegram_bot.dataclasses import CachedReport, ReportJob, ResponseMessage
+from telegram_bot.db_routers import REPLICA_DATABASE, use_replica
+from telegram_bot.logger_config import logger
+from telegram_bot.messages_texts import REPORT_JOB_FAILED_RESPONSE
+from telegram_bot.metrics import count_exception, current_processor, measure_stage
+from telegram_bot.redis_client import client
+from telegram_bot.redis_keys import (
+    REPORT_JOBS_QUEUE_KEY,
+    get_report_job_lock_key,
+    get_report_job_subscribers_key,
+    get_report_jobs_processing_key,
+)
+from telegram_bot.report_cache import report_cache
+from telegram_bot.report_compression import compress_report
+
+REPORT_JOBS_QUEUE_TIMEOUT = 5
+# Adds the subscriber and queues the job if it is not locked yet, in one step,
+# so a job is never left locked without being queued.
+ENQUEUE_REPORT_JOB_SCRIPT = """
+redis.call("SADD", KEYS[2], ARGV[2])
+redis.call("EXPIRE", KEYS[2], ARGV[3])
+if not redis.call("SET", KEYS[1], 1, "NX", "EX", ARGV[3]) then
+    return 0
+end
+redis.call("LPUSH", KEYS[3], ARGV[1])
+return 1
+"""
+# The csv reports are generated by settings.REPORT_GENERATOR. Imported by the
+# worker only, pyarrow is not loaded by the web processes.
+REPORT_GENERATORS_BY_FORMAT = {
+    XLSX_REPORT_FORMAT: "telegram_bot.report_generator.XlsxReportGenerator",
+    PARQUET_REPORT_FORMAT: "telegram_bot.parquet_export.ParquetReportGenerator",
+}
+
+
+def enqueue_report_job(report_job: ReportJob, chat_id: int) -> bool:
+    # Returns False if the same report is already queued or generated,
+    # the chat then gets the report of that job.
+    created = client.eval(
+        ENQUEUE_REPORT_JOB_SCRIPT,
+        3,
+        get_report_job_lock_key(report_job.id),
+        get_report_job_subscribers_key(report_job.id),
+        REPORT_JOBS_QUEUE_KEY,
+        report_job.id,
+        chat_id,
+        settings.REPORT_JOB_TIMEOUT_SECONDS,
+    )
+    if created:
+        logger.info(f"Report job {report_job.id} queued.")
+    return bool(created)
+
+
+def pop_report_job_subscribers(report_job: ReportJob) -> list[int]:
+    with client.pipeline(transaction=not settings.REDIS_CLUSTER_MODE) as pipeline:
+        pipeline.smembers(get_report_job_subscribers_key(report_job.id))
+        pipeline.delete(get_report_job_subscribers_key(report_job.id))
+        pipeline.delete(get_report_job_lock_key(report_job.id))
+        subscribers, _, _ = pipeline.execute()
+    return sorted(int(chat_id) for chat_id in subscribers)
+
+
+class ReportWorker:
+    # A popped job is kept in the processing list of the worker until it is
+    # processed. The jobs left there by a killed worker are queued again when
+    # the worker with the same name starts.
+    PROCESSOR_NAME = "ReportWorker"
+
+    def __init__(self, worker_name: str | None = None):
+        self.worker_name = worker_name or socket.gethostname()
+        self.processing_key = get_report_jobs_processing_key(self.worker_name)
+
+    @staticmethod
+    def _get_file_id(response: requests.Response) -> str | None:
+        if not response.ok:
+            return None
+        return response.json().get("result", {}).get("document", {}).get("file_id")
+
+    def _send_document(
+        self, chat_id: int, file_path: str, file_id: str | None
+    ) -> str | None:
+        try:
+            if file_id is None:
+                with open(file_path, "rb") as report_file:
+                    response = requests.post(
+                        url=BASE_URL + "sendDocument",
+                        data={"chat_id": chat_id},
+                        files={"document": report_file},
+                    )
+                file_id = self._get_file_id(response)
+            else:
+                response = requests.post(
+                    url=BASE_URL + "sendDocument",
+                    data={"chat_id": chat_id, "document": file_id},
+                )
+            logger.info(
+                f"Telegram response status for report sent: {response.status_code}"
+            )
+        except requests.RequestException as e:
+            logger.exception(f"Exception: {e}")
+            count_exception(e)
+        return file_id
+
+    @measure_stage("telegram_send")
+    def _send_report(
+        self, cached_report: CachedReport, chat_ids: list[int]
+    ) -> list[str | None]:
+        # Every file is uploaded once, the other chats get it by the file_id.
+        file_ids = cached_report.file_ids or [None] * len(cached_report.file_paths)
+        for chat_id in chat_ids:
+            file_ids = [
+                self._send_document(chat_id, file_path, file_id)
+                for file_path, file_id in zip(cached_report.file_paths, file_ids)
+            ]
+        return file_ids
+
+    @staticmethod
+    def _send_report_failed_message(chat_ids: list[int]):
+        for chat_id in chat_ids:
+            payload = ResponseMessage(
+                text=REPORT_JOB_FAILED_RESPONSE,
+                chat_id=chat_id,
+            ).to_payload()
+            try:
+                requests.post(url=BASE_URL + "sendMessage", **payload)
+            except requests.RequestException as e:
+                logger.exception(f"Exception: {e}")
+
+    @staticmethod
+    @measure_stage("report_generation")
+    def _generate_report(report_job: ReportJob) -> tuple[str, str]:
+        # Returns the report path and the database it was read from.
+        generator_class = import_string(
+            REPORT_GENERATORS_BY_FORMAT.get(
+                report_job.report_format, settings.REPORT_GENERATOR
+            )
+        )
+        with use_replica() as database:
+            report_path = generator_class(
+                start_date=report_job.start_date,
+                end_date=report_job.end_date,
+            ).generate_report()
+        return report_path, database
+
+    @staticmethod
+    @measure_stage("report_compression")
+    def _compress_report(report_path: str) -> list[str]:
+        return compress_report(report_path)
+
+    def _get_report(self, report_job: ReportJob) -> tuple[CachedReport, bool]:
+        if cached_report := report_cache.get(report_job):
+            logger.info(f"Report {report_job.id} found in the cache.")
+            return cached_report, True
+        version = report_cache.get_version()
+        report_path, database = self._generate_report(report_job)
+        # XLSX and parquet files are compressed already.
+        if report_job.report_format == CSV_REPORT_FORMAT:
+            report_paths = self._compress_report(report_path)
+        else:
+            report_paths = [report_path]
+        # The replica may not have replayed the changes that invalidated the
+        # cache yet, its report would be cached under the current version.
+        if database == REPLICA_DATABASE:
+            logger.info(f"Report {report_job.id} read from the replica, not cached.")
+        elif cached_report := report_cache.put(report_job, report_paths, version):
+            return cached_report, True
+        return CachedReport(file_paths=report_paths), False
+
+    def process_job(self, report_job: ReportJob):
+        logger.info(f"Processing report job {report_job.id}.")
+        report, is_cached = None, False
+        try:
+            report, is_cached = self._get_report(report_job)
+        except Exception as e:
+            logger.exception(f"Exception: {e}")
+            count_exception(e)
+        chat_ids = pop_report_job_subscribers(report_job)
+        if report is None:
+            self._send_report_failed_message(chat_ids)
+            return
+        try:
+            file_ids = self._send_report(report, chat_ids)
+            if is_cached and all(file_ids) and file_ids != report.file_ids:
+                report_cache.set_file_ids(report_job, file_ids)
+        finally:
+            if not is_cached:
+                for file_path in report.file_paths:
+                    os.remove(file_path)
+
+    def requeue_abandoned_jobs(self) -> int:
+        requeued_count = 0
+        # Queued at the end the jobs are popped from, so they are processed first.
+        while client.lmove(
+            self.processing_key, REPORT_JOBS_QUEUE_KEY, src="RIGHT", dest="RIGHT"
+        ):
+            requeued_count += 1
+        if requeued_count:
+            logger.warning(f"{requeued_count} abandoned report jobs queued again.")
+        return requeued_count
+
+    def _requeue_job(self, job_id: bytes):
+        with client.pipeline(transaction=not settings.REDIS_CLUSTER_MODE) as pipeline:
+            pipeline.lrem(self.processing_key, 1, job_id)
+            pipeline.rpush(REPORT_JOBS_QUEUE_KEY, job_id)
+            pipeline.execute()
+
+    def process_next_job(self) -> bool:
+        job_id = client.blmove(
+            REPORT_JOBS_QUEUE_KEY,
+            self.processing_key,
+            REPORT_JOBS_QUEUE_TIMEOUT,
+            src="RIGHT",
+            dest="LEFT",
+        )
+        if job_id is None:
+            return False
+        try:
+            # The worker is not run in the request cycle, the persistent
+            # connection is checked the same way as between the requests.
+            close_old_connections()
+            self.process_job(ReportJob.from_id(job_id.decode()))
+        except Exception as e:
+            logger.exception(f"Exception: {e}")
+            count_exception(e)
+        except BaseException:
+            # Stopped while processing, e.g. with Ctrl+C, another worker takes it.
+            self._requeue_job(job_id)
+            raise
+        client.lrem(self.processing_key, 1, job_id)
+        return True
+
+    def run(self):
+        current_processor.set(self.PROCESSOR_NAME)
+        self.requeue_abandoned_jobs()
+        logger.info(
+            f"Waiting for report jobs on {REPORT_JOBS_QUEUE_KEY} as {self.worker_name}"
+        )
+        while True:
+            self.process_next_job()
@@ -1,10 +1,7 @@
 import copy
-import os
 from datetime import datetime
 
-import redis
 from django.conf import settings
-from dotenv import load_dotenv
 
 from telegram_bot.constants import (
     MESSAGES_MAPPING,
@@ -16,10 +13,10 @@ from telegram_bot.exceptions import (
     UserMessageValidationFailedException,
 )
 from telegram_bot.logger_config import logger
+from telegram_bot.metrics import measure_stage
 from telegram_bot.models import HeroData, TelegramUser
-
-load_dotenv(os.path.join(settings.BASE_DIR, ".env"))
-client = redis.Redis(host=os.getenv("REDIS_HOST"), port=os.getenv("REDIS_PORT"), db=0)
+from telegram_bot.session_stores import get_session_store
+from telegram_bot.update_guards import mark_side_effects_started
 
 
 class SequentialMessagesProcessor:
@@ -54,17 +51,26 @@ class SequentialMessagesProcessor:
         raise AllDataReceivedException
 
     @staticmethod
+    @measure_stage("session_store")
     def create_new_redis_entry(user_id: int):
-        client.hset(str(user_id), mapping={"empty": "True"})
-        client.expire(str(user_id), 60 * 30)
+        mark_side_effects_started()
+        get_session_store().create(user_id, settings.SESSION_TTL_SECONDS)
 
     def save_message(self):
         self.validate_user_input_exists(self.user_id)
         self._validate_user_input(self.message_data)
-        client.hset(
-            str(self.user_id),
-            mapping={self.current_message_key: self.message_data},
-        )
+        mark_side_effects_started()
+        with measure_stage("session_store"):
+            get_session_store().save_field(
+                self.user_id,
+                self.current_message_key,
+                self.message_data,
+                ttl=(
+                    settings.SESSION_TTL_SECONDS
+                    if settings.SESSION_TTL_SLIDING
+                    else None
+                ),
+            )
 
     def get_response_text(self) -> str:
         if self.next_message_key:
@@ -98,39 +104,42 @@ class SequentialMessagesProcessor:
         SequentialMessagesProcessor.validate_user_input_exists(user_id)
         logger.info(f"Saving confirmed data for user_id: {user_id}")
         data = SequentialMessagesProcessor.get_user_input(user_id)
-        hero_data = HeroData.objects.create(
-            case_id=int(data["case_id".encode()].decode()),
-            hero_last_name=data["hero_last_name".encode()].decode(),
-            hero_first_name=data["hero_first_name".encode()].decode(),
-            hero_patronymic=data["hero_patronymic".encode()].decode(),
-            hero_date_of_birth=datetime.strptime(
-                data["hero_date_of_birth".encode()].decode(),
-                "%d/%m/%Y",
-            ).date(),
-            item_used_for_dna_extraction=data[
-                "item_used_for_dna_extraction".encode()
-            ].decode(),
-            relative_last_name=data["relative_last_name".encode()].decode(),
-            relative_first_name=data["relative_first_name".encode()].decode(),
-            relative_patronymic=data["relative_patronymic".encode()].decode(),
-            is_added_to_dna_db=(
-                True
-                if data["is_added_to_dna_db".encode()].decode().lower() == "так"
-                else False
-            ),
-            comment=(
-                ""
-                if data["comment".encode()].decode().lower() == "ні"
-                else data["comment".encode()].decode()
-            ),
-            author=entry_author,
-        )
+        mark_side_effects_started()
+        with measure_stage("postgres"):
+            hero_data = HeroData.objects.create(
+                case_id=int(data["case_id".encode()].decode()),
+                hero_last_name=data["hero_last_name".encode()].decode(),
+                hero_first_name=data["hero_first_name".encode()].decode(),
+                hero_patronymic=data["hero_patronymic".encode()].decode(),
+                hero_date_of_birth=datetime.strptime(
+                    data["hero_date_of_birth".encode()].decode(),
+                    "%d/%m/%Y",
+                ).date(),
+                item_used_for_dna_extraction=data[
+                    "item_used_for_dna_extraction".encode()
+                ].decode(),
+                relative_last_name=data["relative_last_name".encode()].decode(),
+                relative_first_name=data["relative_first_name".encode()].decode(),
+                relative_patronymic=data["relative_patronymic".encode()].decode(),
+                is_added_to_dna_db=(
+                    True
+                    if data["is_added_to_dna_db".encode()].decode().lower() == "так"
+                    else False
+                ),
+                comment=(
+                    ""
+                    if data["comment".encode()].decode().lower() == "ні"
+                    else data["comment".encode()].decode()
+                ),
+                author=entry_author,
+            )
         SequentialMessagesProcessor.delete_user_input(user_id)
         return hero_data
 
     @staticmethod
+    @measure_stage("session_store")
     def get_user_input(user_id: int) -> dict:
-        return client.hgetall(str(user_id))
+        return get_session_store().get(user_id)
 
     @staticmethod
     def check_if_user_input_exists(user_id: int) -> bool:
@@ -151,5 +160,15 @@ class SequentialMessagesProcessor:
                 raise UserMessageValidationFailedException
 
     @staticmethod
+    @measure_stage("session_store")
     def delete_user_input(user_id: int):
-        client.delete(str(user_id))
+        mark_side_effects_started()
+        get_session_store().delete(user_id)
+
+    @staticmethod
+    def count_open_sessions() -> int:
+        return get_session_store().count()
+
+    @staticmethod
+    def count_abandoned_sessions() -> int:
+        return get_session_store().count_abandoned()
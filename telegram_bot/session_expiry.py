@@ -0,0 +1,80 @@
+import redis
+import requests
+from django.conf import settings
+
+from telegram_bot.constants import BASE_URL, MESSAGE_USER_INPUT_EXPIRED
+from telegram_bot.dataclasses import ResponseMessage
+from telegram_bot.logger_config import logger
+from telegram_bot.redis_client import client
+from telegram_bot.redis_keys import ABANDONED_SESSIONS_COUNTER_KEY, get_session_user_id
+
+EXPIRED_KEYS_CHANNEL = "__keyevent@0__:expired"
+REQUIRED_KEYSPACE_EVENTS = "Ex"
+EXPIRED_KEYS_POLL_TIMEOUT = 1.0
+
+
+def get_node_clients() -> list[redis.Redis]:
+    # Keyspace notifications are published by the node of the key only, so in
+    # cluster mode every primary node is configured and listened to. The nodes
+    # added later are listened to after a restart.
+    if settings.REDIS_CLUSTER_MODE:
+        return [node.redis_connection for node in client.get_primaries()]
+    return [client]
+
+
+class ExpiredSessionsConsumer:
+    def __init__(self, notify_users: bool = True):
+        self.notify_users = notify_users
+
+    @staticmethod
+    def enable_keyspace_notifications():
+        for node_client in get_node_clients():
+            events = node_client.config_get("notify-keyspace-events")[
+                "notify-keyspace-events"
+            ]
+            if "E" in events and ("x" in events or "A" in events):
+                continue
+            node_client.config_set(
+                "notify-keyspace-events",
+                "".join(sorted(set(events + REQUIRED_KEYSPACE_EVENTS))),
+            )
+
+    def _send_user_input_expired_message(self, chat_id: int):
+        payload = ResponseMessage(
+            text=MESSAGE_USER_INPUT_EXPIRED,
+            chat_id=chat_id,
+        ).to_payload()
+        response = requests.post(url=BASE_URL + "sendMessage", **payload)
+        logger.info(
+            f"Telegram response status for expired session message: {response.status_code}"
+        )
+
+    def handle_expired_key(self, key: bytes):
+        chat_id = get_session_user_id(key)
+        if chat_id is None:
+            return
+        client.incr(ABANDONED_SESSIONS_COUNTER_KEY)
+        logger.info(f"Session of the chat {chat_id} expired.")
+        if self.notify_users:
+            try:
+                self._send_user_input_expired_message(chat_id)
+            except requests.RequestException as e:
+                logger.exception(f"Exception: {e}")
+
+    def run(self):
+        pubsubs = []
+        for node_client in get_node_clients():
+            pubsub = node_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(EXPIRED_KEYS_CHANNEL)
+            pubsubs.append(pubsub)
+        logger.info(
+            f"Listening for expired sessions on {EXPIRED_KEYS_CHANNEL} "
+            f"of {len(pubsubs)} nodes"
+        )
+        while True:
+            for pubsub in pubsubs:
+                message = pubsub.get_message(
+                    timeout=EXPIRED_KEYS_POLL_TIMEOUT / len(pubsubs)
+                )
+                if message is not None:
+                    self.handle_expired_key(message["data"])
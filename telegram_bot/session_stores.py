@@ -0,0 +1,403 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import cache
+
+import redis
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from telegram_bot.logger_config import logger
+from telegram_bot.metrics import count_near_cache_request
+from telegram_bot.redis_client import client
+from telegram_bot.redis_keys import (
+    ABANDONED_SESSIONS_COUNTER_KEY,
+    SESSION_KEYS_PATTERN,
+    SESSION_KEYS_PREFIX,
+    get_session_key,
+)
+
+SESSION_TABLE_NAME = "telegram_bot_session"
+SESSION_STATS_TABLE_NAME = "telegram_bot_session_stats"
+INVALIDATION_CHANNEL = "__redis__:invalidate"
+NEAR_CACHE_PING_INTERVAL = 5.0
+NEAR_CACHE_RECONNECT_INTERVAL = 1.0
+
+
+class SessionStoreBase(ABC):
+    # Sessions are returned the same way redis HGETALL returns them:
+    # a dict with bytes keys and bytes values, empty if the session is missing.
+    # save_field refreshes the session TTL only if the ttl is passed.
+
+    @abstractmethod
+    def create(self, user_id: int, ttl: int): ...
+
+    @abstractmethod
+    def get(self, user_id: int) -> dict[bytes, bytes]: ...
+
+    @abstractmethod
+    def save_field(
+        self, user_id: int, field: str, value: str, ttl: int | None = None
+    ): ...
+
+    @abstractmethod
+    def delete(self, user_id: int): ...
+
+    @abstractmethod
+    def count(self) -> int: ...
+
+    @abstractmethod
+    def count_abandoned(self) -> int:
+        # The sessions expired since the store was set up.
+        ...
+
+
+class RedisSessionStore(SessionStoreBase):
+    def create(self, user_id: int, ttl: int):
+        client.hset(get_session_key(user_id), mapping={"empty": "True"})
+        client.expire(get_session_key(user_id), ttl)
+
+    def get(self, user_id: int) -> dict[bytes, bytes]:
+        return client.hgetall(get_session_key(user_id))
+
+    def save_field(self, user_id: int, field: str, value: str, ttl: int | None = None):
+        if ttl is None:
+            client.hset(get_session_key(user_id), mapping={field: value})
+            return
+        # Redis Cluster does not support MULTI in pipelines. The keys are in one
+        # slot there, so the pipeline still goes to a single node in one round trip.
+        with client.pipeline(transaction=not settings.REDIS_CLUSTER_MODE) as pipeline:
+            pipeline.hset(get_session_key(user_id), mapping={field: value})
+            pipeline.expire(get_session_key(user_id), ttl)
+            pipeline.execute()
+
+    def delete(self, user_id: int):
+        client.delete(get_session_key(user_id))
+
+    def count(self) -> int:
+        return sum(1 for _ in client.scan_iter(match=SESSION_KEYS_PATTERN, count=1000))
+
+    def count_abandoned(self) -> int:
+        # Counted by the consume_expired_sessions command.
+        return int(client.get(ABANDONED_SESSIONS_COUNTER_KEY) or 0)
+
+
+class NearCacheRedisSessionStore(RedisSessionStore):
+    # Keeps the sessions read by the process in memory. Redis server-assisted
+    # client side caching (CLIENT TRACKING in broadcasting mode) notifies the
+    # process about every change of the session keys, made by any worker, and
+    # the changed sessions are dropped from the cache.
+    # The cache is bypassed while the tracking is not established.
+
+    def __init__(self, max_entries: int | None = None):
+        if settings.REDIS_CLUSTER_MODE:
+            raise ImproperlyConfigured(
+                "NearCacheRedisSessionStore is not supported in the redis cluster mode."
+            )
+        self.max_entries = max_entries or settings.SESSION_STORE_MAX_ENTRIES
+        self._sessions: OrderedDict[str, dict[bytes, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._invalidations_count = 0
+        self._tracking_enabled = False
+        self._start_listener()
+
+    def _start_listener(self):
+        threading.Thread(
+            target=self._listen_for_invalidations,
+            name="session-near-cache-invalidations",
+            daemon=True,
+        ).start()
+
+    def _enable_tracking(
+        self,
+    ) -> tuple[redis.connection.Connection, redis.connection.Connection]:
+        invalidations_connection = client.connection_pool.make_connection()
+        invalidations_connection.send_command("CLIENT", "ID")
+        redirect_client_id = invalidations_connection.read_response()
+        invalidations_connection.send_command("SUBSCRIBE", INVALIDATION_CHANNEL)
+        invalidations_connection.read_response()
+
+        tracking_connection = client.connection_pool.make_connection()
+        tracking_connection.send_command(
+            "CLIENT",
+            "TRACKING",
+            "ON",
+            "REDIRECT",
+            redirect_client_id,
+            "BCAST",
+            "PREFIX",
+            SESSION_KEYS_PREFIX,
+        )
+        tracking_connection.read_response()
+        with self._lock:
+            self._tracking_enabled = True
+        logger.info("Session near-cache tracking enabled.")
+        return invalidations_connection, tracking_connection
+
+    def _disable_tracking(self):
+        with self._lock:
+            self._tracking_enabled = False
+            self._invalidate()
+
+    def _invalidate(self, keys: list[bytes] | None = None):
+        self._invalidations_count += 1
+        if keys is None:
+            self._sessions.clear()
+            return
+        for key in keys:
+            self._sessions.pop(key.decode(), None)
+
+    def handle_invalidation_message(self, message: list):
+        # [b"message", b"__redis__:invalidate", keys], keys are None on FLUSHDB.
+        _, _, keys = message
+        with self._lock:
+            self._invalidate(keys)
+
+    def _listen_for_invalidations(self):
+        while True:
+            connections = ()
+            try:
+                connections = self._enable_tracking()
+                invalidations_connection, tracking_connection = connections
+                while True:
+                    if invalidations_connection.can_read(
+                        timeout=NEAR_CACHE_PING_INTERVAL
+                    ):
+                        self.handle_invalidation_message(
+                            invalidations_connection.read_response()
+                        )
+                    else:
+                        # The tracking stops if its connection is closed.
+                        tracking_connection.send_command("PING")
+                        tracking_connection.read_response()
+            except (redis.RedisError, OSError) as e:
+                logger.error(f"Session near-cache tracking failed: {e}")
+            finally:
+                self._disable_tracking()
+                for connection_ in connections:
+                    connection_.disconnect()
+            time.sleep(NEAR_CACHE_RECONNECT_INTERVAL)
+
+    def get(self, user_id: int) -> dict[bytes, bytes]:
+        key = get_session_key(user_id)
+        with self._lock:
+            tracking_enabled = self._tracking_enabled
+            if tracking_enabled and (data := self._sessions.get(key)) is not None:
+                self._sessions.move_to_end(key)
+                count_near_cache_request(hit=True)
+                return dict(data)
+            invalidations_count = self._invalidations_count
+        if not tracking_enabled:
+            return super().get(user_id)
+        count_near_cache_request(hit=False)
+        data = super().get(user_id)
+        with self._lock:
+            # Not cached if any session changed while it was read.
+            if invalidations_count == self._invalidations_count:
+                self._sessions[key] = data
+                while len(self._sessions) > self.max_entries:
+                    self._sessions.popitem(last=False)
+        return dict(data)
+
+    def _invalidate_after_write(self, user_id: int):
+        with self._lock:
+            self._invalidate([get_session_key(user_id).encode()])
+
+    def create(self, user_id: int, ttl: int):
+        super().create(user_id, ttl)
+        self._invalidate_after_write(user_id)
+
+    def save_field(self, user_id: int, field: str, value: str, ttl: int | None = None):
+        super().save_field(user_id, field, value, ttl=ttl)
+        self._invalidate_after_write(user_id)
+
+    def delete(self, user_id: int):
+        super().delete(user_id)
+        self._invalidate_after_write(user_id)
+
+
+class InMemorySessionStore(SessionStoreBase):
+    def __init__(self, max_entries: int | None = None):
+        self.max_entries = max_entries or settings.SESSION_STORE_MAX_ENTRIES
+        self._sessions: OrderedDict[int, tuple[dict[bytes, bytes], float | None]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._abandoned_count = 0
+
+    @staticmethod
+    def _get_expires_at(ttl: int | None) -> float | None:
+        return time.monotonic() + ttl if ttl is not None else None
+
+    @staticmethod
+    def _is_expired(expires_at: float | None) -> bool:
+        return expires_at is not None and expires_at <= time.monotonic()
+
+    def _set(self, user_id: int, data: dict[bytes, bytes], expires_at: float | None):
+        self._sessions[user_id] = (data, expires_at)
+        self._sessions.move_to_end(user_id)
+        while len(self._sessions) > self.max_entries:
+            _, (_, expires_at) = self._sessions.popitem(last=False)
+            if self._is_expired(expires_at):
+                self._abandoned_count += 1
+
+    def _get_alive(self, user_id: int) -> tuple[dict[bytes, bytes], float | None]:
+        data, expires_at = self._sessions.get(user_id, ({}, None))
+        if self._is_expired(expires_at):
+            del self._sessions[user_id]
+            self._abandoned_count += 1
+            return {}, None
+        return data, expires_at
+
+    def create(self, user_id: int, ttl: int):
+        with self._lock:
+            self._set(user_id, {b"empty": b"True"}, self._get_expires_at(ttl))
+
+    def get(self, user_id: int) -> dict[bytes, bytes]:
+        with self._lock:
+            data, _ = self._get_alive(user_id)
+            if data:
+                self._sessions.move_to_end(user_id)
+            return dict(data)
+
+    def save_field(self, user_id: int, field: str, value: str, ttl: int | None = None):
+        with self._lock:
+            data, expires_at = self._get_alive(user_id)
+            if ttl is not None:
+                expires_at = self._get_expires_at(ttl)
+            self._set(
+                user_id,
+                {**data, field.encode(): value.encode()},
+                expires_at,
+            )
+
+    def delete(self, user_id: int):
+        with self._lock:
+            self._get_alive(user_id)
+            self._sessions.pop(user_id, None)
+
+    def count(self) -> int:
+        with self._lock:
+            expired_user_ids = [
+                user_id
+                for user_id, (_, expires_at) in self._sessions.items()
+                if self._is_expired(expires_at)
+            ]
+            for user_id in expired_user_ids:
+                del self._sessions[user_id]
+            self._abandoned_count += len(expired_user_ids)
+            return len(self._sessions)
+
+    def count_abandoned(self) -> int:
+        # With the expired sessions not dropped yet.
+        with self._lock:
+            return self._abandoned_count + sum(
+                self._is_expired(expires_at)
+                for _, expires_at in self._sessions.values()
+            )
+
+
+class PostgresSessionStore(SessionStoreBase):
+    # The expired sessions are deleted when a session is created and counted
+    # in the one row of the stats table.
+    def create(self, user_id: int, ttl: int):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH expired AS (
+                    DELETE FROM {SESSION_TABLE_NAME} WHERE expires_at <= now()
+                    RETURNING user_id
+                )
+                UPDATE {SESSION_STATS_TABLE_NAME}
+                SET abandoned_count = abandoned_count + (SELECT count(*) FROM expired)
+                WHERE EXISTS (SELECT FROM expired)
+                """
+            )
+            cursor.execute(
+                f"""
+                INSERT INTO {SESSION_TABLE_NAME} (user_id, data, expires_at)
+                VALUES (%s, %s, now() + make_interval(secs => %s))
+                ON CONFLICT (user_id) DO UPDATE
+                SET data = EXCLUDED.data, expires_at = EXCLUDED.expires_at
+                """,
+                [user_id, json.dumps({"empty": "True"}), ttl],
+            )
+
+    def get(self, user_id: int) -> dict[bytes, bytes]:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT data FROM {SESSION_TABLE_NAME}
+                WHERE user_id = %s AND (expires_at IS NULL OR expires_at > now())
+                """,
+                [user_id],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return {}
+        data = json.loads(row[0]) if isinstance(row[0], str) else row[0]
+        return {key.encode(): value.encode() for key, value in data.items()}
+
+    def save_field(self, user_id: int, field: str, value: str, ttl: int | None = None):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {SESSION_TABLE_NAME} AS session (user_id, data, expires_at)
+                VALUES (
+                    %s,
+                    jsonb_build_object(%s::text, %s::text),
+                    now() + make_interval(secs => %s)
+                )
+                ON CONFLICT (user_id) DO UPDATE
+                SET data = session.data || EXCLUDED.data,
+                    expires_at = COALESCE(EXCLUDED.expires_at, session.expires_at)
+                """,
+                [user_id, field, value, ttl],
+            )
+
+    def delete(self, user_id: int):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH deleted AS (
+                    DELETE FROM {SESSION_TABLE_NAME} WHERE user_id = %s
+                    RETURNING expires_at
+                )
+                UPDATE {SESSION_STATS_TABLE_NAME}
+                SET abandoned_count = abandoned_count + 1
+                WHERE EXISTS (SELECT FROM deleted WHERE expires_at <= now())
+                """,
+                [user_id],
+            )
+
+    def count(self) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT count(*) FROM {SESSION_TABLE_NAME}
+                WHERE expires_at IS NULL OR expires_at > now()
+                """
+            )
+            return cursor.fetchone()[0]
+
+    def count_abandoned(self) -> int:
+        # With the expired sessions not deleted yet.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT abandoned_count + (
+                    SELECT count(*) FROM {SESSION_TABLE_NAME} WHERE expires_at <= now()
+                )
+                FROM {SESSION_STATS_TABLE_NAME}
+                """
+            )
+            return cursor.fetchone()[0]
+
+
+@cache
+def get_session_store() -> SessionStoreBase:
+    return import_string(settings.SESSION_STORE_BACKEND)()
@@ -0,0 +1,30 @@
+import datetime
+
+import redis
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.timezone import is_aware, localdate
+
+from telegram_bot.logger_config import logger
+from telegram_bot.models import HeroData
+from telegram_bot.report_cache import report_cache
+
+
+def _invalidate_cached_reports(date: datetime.date):
+    # A cache outage does not fail the data write, the reports cached before
+    # it may stay stale then.
+    try:
+        report_cache.invalidate_date(date)
+    except redis.RedisError as e:
+        logger.error(f"Cached reports invalidation failed: {e}")
+
+
+@receiver(post_save, sender=HeroData)
+@receiver(post_delete, sender=HeroData)
+def invalidate_cached_reports(sender, instance: HeroData, **kwargs):
+    created_at = instance.created_at
+    date = localdate(created_at) if is_aware(created_at) else created_at.date()
+    # After the commit, so a report generated meanwhile is not cached without
+    # the change.
+    transaction.on_commit(lambda: _invalidate_cached_reports(date))
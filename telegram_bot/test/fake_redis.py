@@ -0,0 +1,80 @@
+class FakeRedisPipeline:
+    def __init__(self, fake_redis):
+        self.fake_redis = fake_redis
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue_command(*args, **kwargs):
+            self.commands.append((getattr(self.fake_redis, name), args, kwargs))
+            return self
+
+        return queue_command
+
+    def execute(self):
+        results = [command(*args, **kwargs) for command, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+
+class FakeRedis:
+    # In memory replacement of the redis client for the commands used by the
+    # report cache, so the tests do not touch the keys of a real redis.
+
+    def __init__(self):
+        self.data = {}
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def pipeline(self, transaction=True):
+        return FakeRedisPipeline(self)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def incr(self, key):
+        value = int(self.data.get(key) or 0) + 1
+        self.data[key] = self._encode(value)
+        return value
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        fields = dict(mapping or {})
+        if field is not None:
+            fields[field] = value
+        hash_value = self.data.setdefault(key, {})
+        for name, field_value in fields.items():
+            hash_value[self._encode(name)] = self._encode(field_value)
+        return len(fields)
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(self._encode(field))
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def zadd(self, key, mapping):
+        sorted_set = self.data.setdefault(key, {})
+        for member, score in mapping.items():
+            sorted_set[self._encode(member)] = score
+        return len(mapping)
+
+    def zrange(self, key, start, end):
+        members = sorted(self.data.get(key, {}).items(), key=lambda item: item[1])
+        members = [member for member, _ in members]
+        return members[start:] if end == -1 else members[start : end + 1]
+
+    def zrem(self, key, *members):
+        sorted_set = self.data.get(key, {})
+        return sum(
+            sorted_set.pop(self._encode(member), None) is not None for member in members
+        )
@@ -3,6 +3,7 @@ import json
 from copy import deepcopy
 from unittest import mock
 
+from django.test import override_settings
 from precisely import assert_that, has_attrs, is_mapping
 from rest_framework import status
 from rest_framework.reverse import reverse
@@ -259,9 +260,11 @@ class TestTelegramBotApiViewSet(TelegramBotRequestsTestBase):
 
         assert response.status_code == status.HTTP_200_OK
         assert mock_post.call_count == 2
+        # The keyboard removal is sent concurrently with the response.
+        calls_by_url = {call.kwargs["url"]: call for call in mock_post.call_args_list}
 
         assert_that(
-            mock_post.mock_calls[0].kwargs,
+            calls_by_url[BASE_URL + "editMessageReplyMarkup"].kwargs,
             is_mapping(
                 {
                     "url": BASE_URL + "editMessageReplyMarkup",
@@ -279,7 +282,7 @@ class TestTelegramBotApiViewSet(TelegramBotRequestsTestBase):
         )
 
         assert_that(
-            mock_post.mock_calls[1].kwargs,
+            calls_by_url[BASE_URL + "sendMessage"].kwargs,
             is_mapping(
                 {
                     "url": BASE_URL + "sendMessage",
@@ -452,3 +455,29 @@ class TestTelegramBotApiViewSet(TelegramBotRequestsTestBase):
         )
 
         assert response.status_code == status.HTTP_200_OK
+
+    @override_settings(TELEGRAM_WEBHOOK_SECRET_TOKEN="secret")
+    @mock.patch("telegram_bot.message_handling_services.requests.post")
+    def test_request_with_secret_token(self, mock_post):
+        response = self.client.post(
+            self.url,
+            data=json.dumps(self.command_as_message_in_private_chat_request_payload),
+            content_type="application/json",
+            headers={"X-Telegram-Bot-Api-Secret-Token": "secret"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        mock_post.assert_called()
+
+    @override_settings(TELEGRAM_WEBHOOK_SECRET_TOKEN="secret")
+    @mock.patch("telegram_bot.message_handling_services.requests.post")
+    def test_request_without_secret_token_is_rejected(self, mock_post):
+        response = self.client.post(
+            self.url,
+            data=json.dumps(self.command_as_message_in_private_chat_request_payload),
+            content_type="application/json",
+            headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"},
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        mock_post.assert_not_called()
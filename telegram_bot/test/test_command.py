@@ -1,15 +1,27 @@
+import cProfile
+import os
+import tempfile
 from io import StringIO
 from os import getenv
 from unittest import mock
 
 import dotenv
 from django.core.management import CommandError, call_command
-from django.test import TestCase
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
 from precisely import assert_that, is_sequence
 from rest_framework import status
 
+from telegram_bot.management.commands.benchmark_report_generation import (
+    BENCHMARK_TELEGRAM_ID,
+)
+from telegram_bot.models import HeroData, TelegramUser
+from telegram_bot.test.factories import TelegramUserFactory
+
 dotenv.load_dotenv()
 
+ALLOWED_UPDATES = '["message", "edited_message", "callback_query", "my_chat_member"]'
+
 
 class TestSetWebhook(TestCase):
     @mock.patch("telegram_bot.management.commands.set_webhook.requests.post")
@@ -33,7 +45,7 @@ class TestSetWebhook(TestCase):
 
         mock_post.assert_called_once_with(
             url=telegram_url,
-            data={"url": webhook_url},
+            data={"url": webhook_url, "allowed_updates": ALLOWED_UPDATES},
         )
         output.seek(0)
         assert_that(
@@ -44,6 +56,40 @@ class TestSetWebhook(TestCase):
             ),
         )
 
+    @override_settings(TELEGRAM_WEBHOOK_SECRET_TOKEN="secret-token_1")
+    @mock.patch("telegram_bot.management.commands.set_webhook.requests.post")
+    def test_command_with_secret_token(self, mock_post):
+        response_mock = mock.MagicMock()
+        response_mock.ok = True
+        response_mock.status_code = status.HTTP_200_OK
+        mock_post.return_value = response_mock
+
+        webhook_url = "http://localhost:8000/api/telegram_bot/user_message/"
+
+        call_command("set_webhook", url=webhook_url, stdout=StringIO())
+
+        bot_token = getenv("BOT_TOKEN")
+        mock_post.assert_called_once_with(
+            url=f"https://api.telegram.org/bot{bot_token}/setWebhook",
+            data={
+                "url": webhook_url,
+                "allowed_updates": ALLOWED_UPDATES,
+                "secret_token": "secret-token_1",
+            },
+        )
+
+    @override_settings(TELEGRAM_WEBHOOK_SECRET_TOKEN="secret token")
+    @mock.patch("telegram_bot.management.commands.set_webhook.requests.post")
+    def test_command_invalid_secret_token(self, mock_post):
+        with self.assertRaises(CommandError):
+            call_command(
+                "set_webhook",
+                url="http://localhost:8000/api/telegram_bot/user_message/",
+                stdout=StringIO(),
+            )
+
+        mock_post.assert_not_called()
+
     @mock.patch("telegram_bot.management.commands.set_webhook.requests.post")
     def test_command_url_tail_missing(self, mock_post):
         response_mock = mock.MagicMock()
@@ -65,7 +111,10 @@ class TestSetWebhook(TestCase):
 
         mock_post.assert_called_once_with(
             url=telegram_url,
-            data={"url": f"{webhook_url}/api/telegram_bot/user_message/"},
+            data={
+                "url": f"{webhook_url}/api/telegram_bot/user_message/",
+                "allowed_updates": ALLOWED_UPDATES,
+            },
         )
         output.seek(0)
         assert_that(
@@ -98,7 +147,7 @@ class TestSetWebhook(TestCase):
 
         mock_post.assert_called_once_with(
             url=telegram_url,
-            data={"url": webhook_url},
+            data={"url": webhook_url, "allowed_updates": ALLOWED_UPDATES},
         )
         output.seek(0)
         assert_that(
@@ -107,3 +156,76 @@ class TestSetWebhook(TestCase):
                 f"Setting webhook to {webhook_url}\n",
             ),
         )
+
+
+@mock.patch("telegram_bot.management.commands.benchmark_report_generation.report_cache")
+class TestBenchmarkReportGeneration(TestCase):
+    def _call_command(self, database: str) -> str:
+        output = StringIO()
+        call_command(
+            "benchmark_report_generation",
+            database=database,
+            rows=10,
+            days=5,
+            generator=["telegram_bot.report_generator.ReportGenerator"],
+            stdout=output,
+        )
+        return output.getvalue()
+
+    def test_command_ok(self, mock_report_cache):
+        TelegramUserFactory(telegram_id=BENCHMARK_TELEGRAM_ID)
+
+        output = self._call_command(connection.settings_dict["NAME"])
+
+        assert "telegram_bot.report_generator.ReportGenerator: " in output
+        assert "Deleting the rows of a previous benchmark." in output
+        assert not TelegramUser.objects.filter(
+            telegram_id=BENCHMARK_TELEGRAM_ID
+        ).exists()
+        assert not HeroData.objects.exists()
+        assert mock_report_cache.invalidate_dates.call_count == 2
+
+    def test_command_other_database(self, mock_report_cache):
+        with self.assertRaises(CommandError):
+            self._call_command("test_other")
+        assert not TelegramUser.objects.exists()
+
+    def test_command_not_test_database(self, mock_report_cache):
+        with mock.patch.dict(connection.settings_dict, {"NAME": "hero_search_bot"}):
+            with self.assertRaises(CommandError):
+                self._call_command("hero_search_bot")
+        assert not TelegramUser.objects.exists()
+
+
+class TestProfilesReport(SimpleTestCase):
+    def test_command_ok(self):
+        with tempfile.TemporaryDirectory() as profiles_directory:
+            for processor_name in ("UserMessageProcessor", "BotCommandProcessor"):
+                profile = cProfile.Profile()
+                profile.runcall(sorted, range(100))
+                profile.dump_stats(
+                    os.path.join(profiles_directory, f"1_1_{processor_name}.prof")
+                )
+
+            output = StringIO()
+            call_command(
+                "profiles_report",
+                directory=profiles_directory,
+                processor="UserMessageProcessor",
+                top=5,
+                stdout=output,
+            )
+
+        output.seek(0)
+        report = output.read()
+        assert report.startswith("Aggregating 1 profiles.\n")
+        assert "sorted" in report
+
+    def test_command_no_profiles(self):
+        with tempfile.TemporaryDirectory() as profiles_directory:
+            with self.assertRaises(CommandError):
+                call_command(
+                    "profiles_report",
+                    directory=profiles_directory,
+                    stdout=StringIO(),
+                )
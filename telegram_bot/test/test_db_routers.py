@@ -0,0 +1,107 @@
+import math
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from telegram_bot.db_routers import (
+    PRIMARY_DATABASE,
+    REPLICA_DATABASE,
+    ReplicaRouter,
+    ReplicaState,
+    get_read_database,
+    use_replica,
+)
+from telegram_bot.models import HeroData
+
+
+@override_settings(REPLICA_MAX_LAG_SECONDS=10)
+@mock.patch("telegram_bot.db_routers.ReplicaState._get_lag")
+class TestReplicaState(SimpleTestCase):
+    def test_replica_usable(self, mock_get_lag):
+        mock_get_lag.return_value = 1.5
+        assert ReplicaState().is_usable() is True
+
+    def test_replica_lags(self, mock_get_lag):
+        mock_get_lag.return_value = 30
+        assert ReplicaState().is_usable() is False
+
+    def test_replica_unavailable(self, mock_get_lag):
+        mock_get_lag.side_effect = OperationalError
+        assert ReplicaState().is_usable() is False
+
+    def test_lag_checked_once_per_interval(self, mock_get_lag):
+        mock_get_lag.return_value = 0
+        replica_state = ReplicaState()
+        assert replica_state.is_usable() is True
+        mock_get_lag.return_value = 30
+        assert replica_state.is_usable() is True
+        mock_get_lag.assert_called_once()
+
+
+@mock.patch("telegram_bot.db_routers.REPLICA_DATABASE", PRIMARY_DATABASE)
+class TestReplicaLag(TestCase):
+    def test_not_a_replica(self):
+        assert ReplicaState._get_lag() == 0
+
+    @mock.patch("telegram_bot.db_routers.connections")
+    def test_replica_disconnected(self, mock_connections):
+        cursor_mock = mock_connections.__getitem__.return_value.cursor.return_value
+        cursor_mock.__enter__.return_value.fetchone.return_value = (True, 0)
+        assert ReplicaState._get_lag() == math.inf
+
+
+class TestGetReadDatabase(SimpleTestCase):
+    def test_replica_not_configured(self):
+        assert REPLICA_DATABASE not in settings.DATABASES
+        assert get_read_database() == PRIMARY_DATABASE
+
+    @mock.patch("telegram_bot.db_routers.replica_state")
+    def test_replica_configured(self, mock_replica_state):
+        with mock.patch.dict(settings.DATABASES, {REPLICA_DATABASE: {}}):
+            for usable, database in (
+                (True, REPLICA_DATABASE),
+                (False, PRIMARY_DATABASE),
+            ):
+                mock_replica_state.is_usable.return_value = usable
+                assert get_read_database() == database
+
+
+@mock.patch("telegram_bot.db_routers.get_read_database", return_value=REPLICA_DATABASE)
+class TestReplicaRouter(SimpleTestCase):
+    def test_db_for_read(self, mock_get_read_database):
+        router = ReplicaRouter()
+        assert router.db_for_read(HeroData) == PRIMARY_DATABASE
+        with use_replica():
+            assert router.db_for_read(HeroData) == REPLICA_DATABASE
+        assert router.db_for_read(HeroData) == PRIMARY_DATABASE
+
+    def test_database_chosen_once_per_block(self, mock_get_read_database):
+        router = ReplicaRouter()
+        with use_replica() as database:
+            mock_get_read_database.return_value = PRIMARY_DATABASE
+            assert database == REPLICA_DATABASE
+            assert router.db_for_read(HeroData) == REPLICA_DATABASE
+        mock_get_read_database.assert_called_once()
+
+    def test_db_for_write(self, mock_get_read_database):
+        with use_replica():
+            assert ReplicaRouter().db_for_write(HeroData) == PRIMARY_DATABASE
+
+
+class TestReplicaChangeListAdmin(TestCase):
+    @mock.patch(
+        "telegram_bot.db_routers.get_read_database", return_value=PRIMARY_DATABASE
+    )
+    def test_changelist_read_with_replica(self, mock_get_read_database):
+        self.client.force_login(
+            User.objects.create_superuser(username="admin", password="password")
+        )
+        response = self.client.get(
+            reverse("admin:telegram_bot_herodata_changelist"), {"q": "search"}
+        )
+        assert response.status_code == 200
+        mock_get_read_database.assert_called()
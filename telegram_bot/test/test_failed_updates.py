@@ -0,0 +1,223 @@
+from copy import deepcopy
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from telegram_bot.failed_updates import replay_failed_updates
+from telegram_bot.message_handling_services import MessageHandler
+from telegram_bot.models import FailedUpdate
+from telegram_bot.redis_keys import get_update_idempotency_key
+from telegram_bot.test.requests_examples import MESSAGE_IN_PRIVATE_CHAT
+from telegram_bot.update_guards import (
+    UPDATE_DONE,
+    UPDATE_PROCESSING,
+    UPDATE_SIDE_EFFECTS_STARTED,
+)
+
+
+def build_failed_update(
+    user_id: int, update_id: int, side_effects_started: bool = False
+) -> FailedUpdate:
+    update = deepcopy(MESSAGE_IN_PRIVATE_CHAT)
+    update["update_id"] = update_id
+    update["message"]["from"]["id"] = user_id
+    return FailedUpdate.objects.create(
+        update=update,
+        update_id=update_id,
+        processor="UserMessageProcessor",
+        exception_type="RuntimeError",
+        side_effects_started=side_effects_started,
+    )
+
+
+def fail_updates_of_user(user_id: int):
+    # Replaces MessageHandler.handle_telegram_message.
+    def handle_telegram_message(handler):
+        if handler.telegram_message["message"]["from"]["id"] == user_id:
+            raise ValueError("still failing")
+
+    return handle_telegram_message
+
+
+def fail_after_side_effects_started(handler):
+    # Replaces MessageHandler.handle_telegram_message.
+    handler.side_effects_started = True
+    raise ValueError("failed after a message was sent")
+
+
+class TestReplayFailedUpdates(TransactionTestCase):
+    def setUp(self):
+        guards_client_patch = mock.patch("telegram_bot.update_guards.client")
+        self.guards_redis_mock = guards_client_patch.start()
+        self.addCleanup(guards_client_patch.stop)
+        self.guards_redis_mock.set.return_value = True
+
+    def test_replay_failed_updates(self):
+        failing_user_updates = [
+            build_failed_update(1, update_id) for update_id in (1, 3)
+        ]
+        other_user_updates = [build_failed_update(2, update_id) for update_id in (2, 4)]
+
+        with mock.patch(
+            "telegram_bot.failed_updates.MessageHandler.handle_telegram_message",
+            autospec=True,
+            side_effect=fail_updates_of_user(1),
+        ) as handle_mock:
+            replayed_count, failed_count = replay_failed_updates(
+                FailedUpdate.objects.all(), batch_size=1, concurrency=2
+            )
+
+        assert (replayed_count, failed_count) == (2, 2)
+        # The later update of the failing user is not replayed.
+        assert handle_mock.call_count == 3
+        first_failed_update, second_failed_update = (
+            FailedUpdate.objects.get(pk=failed_update.pk)
+            for failed_update in failing_user_updates
+        )
+        assert first_failed_update.replay_count == 1
+        assert first_failed_update.exception_type == "ValueError"
+        assert first_failed_update.exception_message == "still failing"
+        assert first_failed_update.replayed_at is None
+        assert second_failed_update.replay_count == 0
+        for failed_update in other_user_updates:
+            failed_update.refresh_from_db()
+            assert failed_update.replay_count == 1
+            assert failed_update.replayed_at is not None
+
+    def test_command(self):
+        build_failed_update(1, 1)
+        FailedUpdate.objects.create(
+            update=MESSAGE_IN_PRIVATE_CHAT,
+            processor="BotCommandProcessor",
+            exception_type="RuntimeError",
+        )
+
+        output = StringIO()
+        with mock.patch(
+            "telegram_bot.failed_updates.MessageHandler.handle_telegram_message"
+        ) as handle_mock:
+            call_command(
+                "replay_failed_updates",
+                "--processor",
+                "UserMessageProcessor",
+                "--concurrency",
+                "1",
+                stdout=output,
+            )
+            call_command("replay_failed_updates", stdout=StringIO())
+
+        assert output.getvalue() == "Replayed 1 updates, 0 not replayed.\n"
+        assert handle_mock.call_count == 2
+        assert not FailedUpdate.objects.filter(replayed_at__isnull=True).exists()
+
+    def test_partially_processed_update_not_replayed(self):
+        partially_processed_update = build_failed_update(
+            1, 1, side_effects_started=True
+        )
+        failed_update = build_failed_update(1, 2)
+
+        with mock.patch(
+            "telegram_bot.failed_updates.MessageHandler.handle_telegram_message",
+            autospec=True,
+            side_effect=fail_after_side_effects_started,
+        ) as handle_mock:
+            assert replay_failed_updates(
+                FailedUpdate.objects.all(), batch_size=10, concurrency=1
+            ) == (0, 1)
+            assert replay_failed_updates(
+                FailedUpdate.objects.all(), batch_size=10, concurrency=1
+            ) == (0, 0)
+
+        # Only the update failed before its side effects started is replayed,
+        # once, and its idempotency key is not released.
+        handle_mock.assert_called_once()
+        assert handle_mock.call_args.args[0].telegram_message == failed_update.update
+        failed_update.refresh_from_db()
+        assert failed_update.side_effects_started is True
+        assert failed_update.replay_count == 1
+        assert failed_update.exception_message == "failed after a message was sent"
+        self.guards_redis_mock.delete.assert_not_called()
+        partially_processed_update.refresh_from_db()
+        assert partially_processed_update.replay_count == 0
+
+    def test_claimed_update_not_replayed(self):
+        interrupted_update = build_failed_update(1, 1)
+        done_update = build_failed_update(2, 2)
+        self.guards_redis_mock.set.return_value = None
+        self.guards_redis_mock.get.side_effect = lambda key: {
+            get_update_idempotency_key(1, 1): UPDATE_SIDE_EFFECTS_STARTED,
+            get_update_idempotency_key(2, 2): UPDATE_DONE,
+        }[key]
+
+        with mock.patch(
+            "telegram_bot.failed_updates.MessageHandler.handle_telegram_message"
+        ) as handle_mock:
+            assert replay_failed_updates(
+                FailedUpdate.objects.all(), batch_size=10, concurrency=1
+            ) == (1, 1)
+
+        handle_mock.assert_not_called()
+        interrupted_update.refresh_from_db()
+        assert interrupted_update.replayed_at is None
+        assert interrupted_update.side_effects_started is True
+        done_update.refresh_from_db()
+        assert done_update.replayed_at is not None
+        assert done_update.replay_count == 0
+
+    def test_update_interrupted_before_side_effects_replayed(self):
+        failed_update = build_failed_update(1, 1)
+        self.guards_redis_mock.set.return_value = None
+        self.guards_redis_mock.get.return_value = UPDATE_PROCESSING
+
+        with mock.patch(
+            "telegram_bot.failed_updates.MessageHandler.handle_telegram_message"
+        ) as handle_mock:
+            assert replay_failed_updates(
+                FailedUpdate.objects.all(), batch_size=10, concurrency=1
+            ) == (1, 0)
+
+        handle_mock.assert_called_once()
+        failed_update.refresh_from_db()
+        assert failed_update.replayed_at is not None
+
+    def test_update_failed_before_side_effects_started_released(self):
+        build_failed_update(1, 1)
+
+        with mock.patch(
+            "telegram_bot.failed_updates.MessageHandler.handle_telegram_message",
+            side_effect=ValueError("still failing"),
+        ):
+            replay_failed_updates(
+                FailedUpdate.objects.all(), batch_size=10, concurrency=1
+            )
+
+        self.guards_redis_mock.delete.assert_called_once_with(
+            get_update_idempotency_key(1, 1)
+        )
+
+    @mock.patch("telegram_bot.message_handling_services.requests.post")
+    @mock.patch(
+        "telegram_bot.message_handling_services.SequentialMessagesProcessor.get_user_input"
+    )
+    def test_update_failed_reading_session_replayed(
+        self, get_user_input_mock, post_mock
+    ):
+        get_user_input_mock.side_effect = RuntimeError("redis unavailable")
+        MessageHandler(
+            telegram_message=MESSAGE_IN_PRIVATE_CHAT
+        ).handle_telegram_message()
+        failed_update = FailedUpdate.objects.get()
+        assert failed_update.side_effects_started is False
+        post_mock.assert_not_called()
+
+        get_user_input_mock.side_effect = None
+        get_user_input_mock.return_value = {}
+        assert replay_failed_updates(
+            FailedUpdate.objects.all(), batch_size=10, concurrency=1
+        ) == (1, 0)
+
+        post_mock.assert_called_once()
+        failed_update.refresh_from_db()
+        assert failed_update.replayed_at is not None
@@ -0,0 +1,99 @@
+from aiohttp import FormData
+from aiohttp.test_utils import AioHTTPTestCase
+
+from telegram_bot.fake_telegram_api import FakeTelegramApi, FakeTelegramApiConfig
+
+
+class TestFakeTelegramApi(AioHTTPTestCase):
+    config = FakeTelegramApiConfig()
+
+    async def get_application(self):
+        self.fake_api = FakeTelegramApi(self.config)
+        return self.fake_api.make_app()
+
+    async def test_send_message(self):
+        response = await self.client.post(
+            "/botTOKEN/sendMessage", data={"chat_id": "1", "text": "text"}
+        )
+        assert response.status == 200
+        payload = await response.json()
+        assert payload["ok"] is True
+        assert payload["result"]["chat"]["id"] == 1
+        assert payload["result"]["text"] == "text"
+        assert self.fake_api.calls_count["sendMessage"] == 1
+
+    async def test_send_document(self):
+        form_data = FormData()
+        form_data.add_field("chat_id", "1")
+        form_data.add_field("document", b"a;b;c\n", filename="report.csv")
+        response = await self.client.post("/botTOKEN/sendDocument", data=form_data)
+        assert response.status == 200
+        payload = await response.json()
+        assert payload["result"]["document"]["file_name"] == "report.csv"
+        assert payload["result"]["document"]["file_size"] == 6
+        assert payload["result"]["document"]["file_id"]
+        assert self.fake_api.uploaded_bytes == 6
+
+    async def test_edit_message_reply_markup(self):
+        response = await self.client.post(
+            "/botTOKEN/editMessageReplyMarkup",
+            json={
+                "chat_id": 1,
+                "message_id": 2,
+                "reply_markup": {"inline_keyboard": []},
+            },
+        )
+        assert response.status == 200
+        payload = await response.json()
+        assert payload["result"]["message_id"] == 2
+
+    async def test_get_updates(self):
+        await self.client.post(
+            "/_fake/updates", json=[{"update_id": 1}, {"update_id": 2}]
+        )
+        response = await self.client.get("/botTOKEN/getUpdates")
+        payload = await response.json()
+        assert [update["update_id"] for update in payload["result"]] == [1, 2]
+
+        response = await self.client.get("/botTOKEN/getUpdates", params={"offset": 2})
+        payload = await response.json()
+        assert [update["update_id"] for update in payload["result"]] == [2]
+
+    async def test_get_updates_webhook_is_set(self):
+        await self.client.post("/botTOKEN/setWebhook", data={"url": "http://bot/"})
+        response = await self.client.get("/botTOKEN/getUpdates")
+        assert response.status == 409
+        assert self.fake_api.webhook_url == "http://bot/"
+
+    async def test_unknown_method(self):
+        response = await self.client.post("/botTOKEN/unknownMethod")
+        assert response.status == 404
+
+
+class TestFakeTelegramApiRateLimited(AioHTTPTestCase):
+    async def get_application(self):
+        self.fake_api = FakeTelegramApi(
+            FakeTelegramApiConfig(rate_limit_rate=1, retry_after=5)
+        )
+        return self.fake_api.make_app()
+
+    async def test_send_message_rate_limited(self):
+        response = await self.client.post(
+            "/botTOKEN/sendMessage", data={"chat_id": "1", "text": "text"}
+        )
+        assert response.status == 429
+        payload = await response.json()
+        assert payload["ok"] is False
+        assert payload["parameters"]["retry_after"] == 5
+        assert self.fake_api.responses_count[429] == 1
+
+
+class TestFakeTelegramApiFailing(AioHTTPTestCase):
+    async def get_application(self):
+        return FakeTelegramApi(FakeTelegramApiConfig(error_rate=1)).make_app()
+
+    async def test_send_message_failed(self):
+        response = await self.client.post(
+            "/botTOKEN/sendMessage", data={"chat_id": "1", "text": "text"}
+        )
+        assert response.status == 500
@@ -0,0 +1,100 @@
+import io
+from unittest import mock
+
+from django.test import SimpleTestCase
+from precisely import assert_that, is_mapping
+
+from telegram_bot.dataclasses import UserMessage
+from telegram_bot.logger_config import (
+    logger,
+    REDACTED_VALUE,
+    configure_logger,
+    log_payload,
+    redact_personal_data,
+)
+from telegram_bot.test.requests_examples import MESSAGE_IN_PRIVATE_CHAT
+
+
+class TestRedactPersonalData(SimpleTestCase):
+    def test_redact_telegram_update(self):
+        redacted_payload = redact_personal_data(MESSAGE_IN_PRIVATE_CHAT)
+        message = redacted_payload["message"]
+        assert message["text"] == REDACTED_VALUE
+        assert message["from"]["first_name"] == REDACTED_VALUE
+        assert message["from"]["username"] == REDACTED_VALUE
+        assert message["chat"]["first_name"] == REDACTED_VALUE
+        assert message["chat"]["id"] == MESSAGE_IN_PRIVATE_CHAT["message"]["chat"]["id"]
+        assert redacted_payload["update_id"] == MESSAGE_IN_PRIVATE_CHAT["update_id"]
+        assert MESSAGE_IN_PRIVATE_CHAT["message"]["text"] != REDACTED_VALUE
+
+    def test_redact_dataclass(self):
+        user_message = UserMessage(
+            chat_id=1,
+            username="username",
+            user_id=2,
+            text="relative name",
+            message_edition=False,
+            first_name="first_name",
+        )
+        assert_that(
+            redact_personal_data(user_message),
+            is_mapping(
+                {
+                    "chat_id": 1,
+                    "username": REDACTED_VALUE,
+                    "user_id": 2,
+                    "text": REDACTED_VALUE,
+                    "message_edition": False,
+                    "chat_type": None,
+                    "message_type": None,
+                    "first_name": REDACTED_VALUE,
+                    "last_name": None,
+                }
+            ),
+        )
+
+
+class TestLogPayload(SimpleTestCase):
+    @mock.patch("telegram_bot.logger_config.logger")
+    def test_log_payload(self, mock_logger):
+        log_payload("Received request with data", {"text": "text", "id": 1})
+        mock_logger.info.assert_called_once_with(
+            f"Received request with data: {{'text': '{REDACTED_VALUE}', 'id': 1}}"
+        )
+
+    @mock.patch("telegram_bot.logger_config.logger")
+    def test_log_payload_not_sampled(self, mock_logger):
+        log_payload("Received request with data", {"id": 1}, sample_rate=0)
+        mock_logger.info.assert_not_called()
+
+    @mock.patch("telegram_bot.logger_config._serialize", True)
+    @mock.patch("telegram_bot.logger_config.logger")
+    def test_log_payload_serialized(self, mock_logger):
+        log_payload("Received request with data", {"text": "text"})
+        mock_logger.bind.assert_called_once_with(payload={"text": REDACTED_VALUE})
+        mock_logger.bind.return_value.info.assert_called_once_with(
+            "Received request with data"
+        )
+
+
+class TestConfigureLogger(SimpleTestCase):
+    @mock.patch("telegram_bot.logger_config.logger")
+    def test_exception_variables_are_not_logged(self, mock_logger):
+        configure_logger()
+        assert mock_logger.add.call_count == 2
+        for call in mock_logger.add.call_args_list:
+            assert call.kwargs["diagnose"] is False
+
+    def test_exception_log_has_no_variables(self):
+        with mock.patch("sys.stderr", new_callable=io.StringIO) as stderr_mock:
+            configure_logger()
+            try:
+                text = "personal data"
+                raise ValueError(len(text))
+            except ValueError:
+                logger.exception("Exception")
+            logger.complete()
+        configure_logger()
+        output = stderr_mock.getvalue()
+        assert "ValueError" in output
+        assert "personal data" not in output
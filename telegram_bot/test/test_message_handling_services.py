@@ -1,10 +1,11 @@
 import copy
+import datetime
 import json
-import os
 from unittest import mock
 
 from django.test import override_settings
 from precisely import assert_that, has_attrs, is_mapping, is_sequence
+from prometheus_client import REGISTRY
 
 from telegram_bot.constants import (
     BASE_URL,
@@ -12,9 +13,12 @@ from telegram_bot.constants import (
     MESSAGES_MAPPING,
     ORDER_OF_MESSAGES,
 )
+from telegram_bot.dataclasses import ReportJob
 from telegram_bot.enums import ChatType, UserActionType
 from telegram_bot.exceptions import (
+    CommandValidationFailedException,
     TelegramMessageNotParsedException,
+    UnauthorizedUserCalledAdminCommandException,
     UnauthorizedUserCalledReportGenerationException,
     UnknownCommandException,
 )
@@ -32,9 +36,15 @@ from telegram_bot.messages_texts import (
     INPUT_CONFIRMED_RESPONSE,
     INPUT_NOT_CONFIRMED_RESPONSE,
     INQUERY_MESSAGE_START,
+    PROFILING_ENABLED_RESPONSE,
+    PROFILING_INVALID_UPDATES_COUNT_RESPONSE,
+    REPORT_INVALID_COMMAND_RESPONSE,
+    REPORT_JOB_ALREADY_QUEUED_RESPONSE,
+    REPORT_JOB_QUEUED_RESPONSE,
 )
-from telegram_bot.models import BotStatusChange, TelegramUser
+from telegram_bot.models import BotStatusChange, FailedUpdate, TelegramUser
 from telegram_bot.parsers import TelegramCommandParser, UserMessageParser
+from telegram_bot.redis_keys import get_session_key
 from telegram_bot.sequential_messages_processor import SequentialMessagesProcessor
 from telegram_bot.test.base import TelegramBotRequestsTestBase
 
@@ -161,6 +171,82 @@ class TestMessageHandler(TelegramBotRequestsTestBase):
         assert mock_called_with_kwargs["text"] == response_text
         assert "reply_markup" not in mock_called_with_kwargs
 
+    @mock.patch(
+        "telegram_bot.message_handling_services.MessageHandler._process_message"
+    )
+    def test_handle_telegram_message_command_in_group_chat_skipped(
+        self, process_message_mock
+    ):
+        labels = {"processor": "BotCommandProcessor"}
+        skipped_before = (
+            REGISTRY.get_sample_value("hero_search_bot_skipped_updates_total", labels)
+            or 0
+        )
+        callback_in_group = copy.deepcopy(
+            self.command_as_callback_in_private_chat_request_payload
+        )
+        callback_in_group["callback_query"]["message"]["chat"]["type"] = "group"
+        for payload in (
+            self.command_as_message_in_group_request_payload,
+            callback_in_group,
+        ):
+            serialized_data = self._get_serialized_request_data(payload)
+            MessageHandler(telegram_message=serialized_data).handle_telegram_message()
+        process_message_mock.assert_not_called()
+        assert (
+            REGISTRY.get_sample_value("hero_search_bot_skipped_updates_total", labels)
+            == skipped_before + 2
+        )
+
+    @mock.patch(
+        "telegram_bot.message_handling_services.SequentialMessagesProcessor.get_user_input"
+    )
+    def test_handle_telegram_message_raise_exceptions(self, get_user_input_mock):
+        get_user_input_mock.side_effect = RuntimeError("redis unavailable")
+        serialized_data = self._get_serialized_request_data(
+            self.message_in_private_chat_request_payload
+        )
+
+        MessageHandler(telegram_message=serialized_data).handle_telegram_message()
+        with self.assertRaises(RuntimeError):
+            MessageHandler(
+                telegram_message=serialized_data, raise_exceptions=True
+            ).handle_telegram_message()
+        assert FailedUpdate.objects.count() == 1
+
+    @mock.patch(
+        "telegram_bot.message_handling_services.SequentialMessagesProcessor.get_user_input"
+    )
+    def test_handle_telegram_message_failed_update_stored(self, get_user_input_mock):
+        get_user_input_mock.side_effect = RuntimeError("redis unavailable")
+
+        MessageHandler(
+            telegram_message=self.message_in_private_chat_request_payload
+        ).handle_telegram_message()
+
+        failed_update = FailedUpdate.objects.get()
+        assert failed_update.update == self.message_in_private_chat_request_payload
+        assert (
+            failed_update.update_id
+            == self.message_in_private_chat_request_payload["update_id"]
+        )
+        assert failed_update.processor == "UserMessageProcessor"
+        assert failed_update.exception_type == "RuntimeError"
+        assert failed_update.exception_message == "redis unavailable"
+        assert failed_update.stage_durations["total"] > 0
+        assert failed_update.side_effects_started is False
+        assert failed_update.replayed_at is None
+
+    @mock.patch(
+        "telegram_bot.message_handling_services.MessageHandler._process_message"
+    )
+    def test_handle_telegram_message_classification_failed(self, process_message_mock):
+        payload = copy.deepcopy(self.command_as_message_in_group_request_payload)
+        payload["message"]["chat"]["type"] = "channel"
+        serialized_data = self._get_serialized_request_data(payload)
+        MessageHandler(telegram_message=serialized_data).handle_telegram_message()
+        process_message_mock.assert_called_once()
+
 
 class TestMemberStatusChangeProcessor(TelegramBotRequestsTestBase):
     def test_process_bot_added_to_the_private_chat(self):
@@ -296,7 +382,7 @@ class TestMemberStatusChangeProcessor(TelegramBotRequestsTestBase):
 
 class TestUserMessageProcessor(TelegramBotRequestsTestBase):
 
-    @mock.patch("telegram_bot.sequential_messages_processor.redis.Redis.hgetall")
+    @mock.patch("telegram_bot.redis_client.redis.Redis.hgetall")
     def test_prepare_sequential_messages_processor(self, redis_hgetall_mock):
         redis_hgetall_mock.return_value = {}
         serialized_request_data = self._get_serialized_request_data(
@@ -322,7 +408,7 @@ class TestUserMessageProcessor(TelegramBotRequestsTestBase):
         with self.assertRaises(TelegramMessageNotParsedException):
             processor._prepare_sequential_messages_processor()
 
-    @mock.patch("telegram_bot.sequential_messages_processor.redis.Redis.hgetall")
+    @mock.patch("telegram_bot.redis_client.redis.Redis.hgetall")
     def test_prepare_sequential_messages_processor_all_data_received(
         self, redis_hgetall_mock
     ):
@@ -347,9 +433,9 @@ class TestUserMessageProcessor(TelegramBotRequestsTestBase):
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -360,15 +446,15 @@ class TestUserMessageProcessor(TelegramBotRequestsTestBase):
                 processor.process()
                 hgetall_mock.assert_called_once()
                 hset_mock.assert_called_once_with(
-                    str(chat_id), mapping={"case_id": message_text}
+                    get_session_key(chat_id), mapping={"case_id": message_text}
                 )
                 assert processor.all_data_received is False
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -379,17 +465,17 @@ class TestUserMessageProcessor(TelegramBotRequestsTestBase):
                 processor.process()
                 hgetall_mock.assert_called_once()
                 hset_mock.assert_called_once_with(
-                    str(chat_id), mapping={"hero_last_name": message_text}
+                    get_session_key(chat_id), mapping={"hero_last_name": message_text}
                 )
                 assert processor.all_data_received is False
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.expire"
+                "telegram_bot.redis_client.redis.Redis.expire"
             ) as expire_mock:
                 hgetall_mock.return_value = {
                     "case_id".encode(): None,
@@ -432,11 +518,11 @@ class TestUserMessageProcessor(TelegramBotRequestsTestBase):
         with self.subTest():
             # message_validation_failed
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.expire"
+                "telegram_bot.redis_client.redis.Redis.expire"
             ) as expire_mock:
                 hgetall_mock.return_value = {
                     b"case_id": "123123",
@@ -476,11 +562,11 @@ class TestUserMessageProcessor(TelegramBotRequestsTestBase):
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.expire"
+                "telegram_bot.redis_client.redis.Redis.expire"
             ) as expire_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -505,11 +591,11 @@ class TestUserMessageProcessor(TelegramBotRequestsTestBase):
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.expire"
+                "telegram_bot.redis_client.redis.Redis.expire"
             ) as expire_mock:
                 hgetall_mock.return_value = {
                     "case_id".encode(): None,
@@ -535,11 +621,11 @@ class TestUserMessageProcessor(TelegramBotRequestsTestBase):
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.expire"
+                "telegram_bot.redis_client.redis.Redis.expire"
             ) as expire_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -621,11 +707,11 @@ class TestUserMessageProcessor(TelegramBotRequestsTestBase):
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.expire"
+                "telegram_bot.redis_client.redis.Redis.expire"
             ) as expire_mock:
                 hgetall_mock.return_value = {
                     "case_id".encode(): None,
@@ -661,7 +747,7 @@ class TestUserMessageProcessor(TelegramBotRequestsTestBase):
             with mock.patch(
                 "telegram_bot.message_handling_services.SequentialMessagesProcessor.check_if_user_input_exists",
             ) as mock_check_if_user_input_exists, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock:
                 mock_check_if_user_input_exists.return_value = True
                 hgetall_mock.return_value = {"case_id".encode(): None}
@@ -730,6 +816,7 @@ class TestBotCommandProcessor(TelegramBotRequestsTestBase):
         processor._remove_inline_keyboard_from_replied_message(
             self.chat_id, self.message_id
         )
+        processor.keyboard_removal.result()
         mock_post.assert_called_once_with(
             url=BASE_URL + "editMessageReplyMarkup",
             json={
@@ -1288,6 +1375,90 @@ class TestBotCommandProcessor(TelegramBotRequestsTestBase):
         processor.process()
         mock_process_command.assert_called_once()
 
+    # command: /profile_
+    @override_settings(ADMIN_USER_IDS=[111111111])
+    @mock.patch(
+        "telegram_bot.message_handling_services.enable_profiling_for_next_updates"
+    )
+    def test_process_profiling_command(self, mock_enable_profiling):
+        payload = copy.deepcopy(self.command_as_message_in_private_chat_request_payload)
+        payload["message"]["text"] = "/profile_5"
+        serialized_data = self._get_serialized_request_data(payload)
+        processor = BotCommandProcessor(serialized_data)
+        processor.process()
+        mock_enable_profiling.assert_called_once_with(5)
+        assert_that(
+            processor.prepare_response(),
+            is_mapping(
+                {
+                    "data": is_mapping(
+                        {
+                            "text": PROFILING_ENABLED_RESPONSE.format(updates_count=5),
+                            "chat_id": serialized_data["message"]["chat"]["id"],
+                        }
+                    )
+                }
+            ),
+        )
+
+    @override_settings(ADMIN_USER_IDS=[123])
+    @mock.patch(
+        "telegram_bot.message_handling_services.enable_profiling_for_next_updates"
+    )
+    def test_process_profiling_command_user_not_an_admin(self, mock_enable_profiling):
+        payload = copy.deepcopy(self.command_as_message_in_private_chat_request_payload)
+        payload["message"]["text"] = "/profile_5"
+        serialized_data = self._get_serialized_request_data(payload)
+        processor = BotCommandProcessor(serialized_data)
+        with self.assertRaises(UnauthorizedUserCalledAdminCommandException):
+            processor.process()
+        mock_enable_profiling.assert_not_called()
+
+    @override_settings(ADMIN_USER_IDS=[])
+    @mock.patch(
+        "telegram_bot.message_handling_services.enable_profiling_for_next_updates"
+    )
+    def test_process_profiling_command_admin_ids_is_empty(self, mock_enable_profiling):
+        payload = copy.deepcopy(self.command_as_message_in_private_chat_request_payload)
+        payload["message"]["text"] = "/profile_5"
+        serialized_data = self._get_serialized_request_data(payload)
+        processor = BotCommandProcessor(serialized_data)
+        with self.assertRaises(UnauthorizedUserCalledAdminCommandException):
+            processor.process()
+        mock_enable_profiling.assert_not_called()
+
+    @override_settings(ADMIN_USER_IDS=[111111111], PROFILING_MAX_UPDATES_COUNT=100)
+    @mock.patch(
+        "telegram_bot.message_handling_services.enable_profiling_for_next_updates"
+    )
+    def test_process_profiling_command_invalid_updates_count(
+        self, mock_enable_profiling
+    ):
+        for command in ("/profile_0", "/profile_-5", "/profile_101", "/profile_x"):
+            payload = copy.deepcopy(
+                self.command_as_message_in_private_chat_request_payload
+            )
+            payload["message"]["text"] = command
+            serialized_data = self._get_serialized_request_data(payload)
+            processor = BotCommandProcessor(serialized_data)
+            processor.process()
+            assert_that(
+                processor.prepare_response(),
+                is_mapping(
+                    {
+                        "data": is_mapping(
+                            {
+                                "text": PROFILING_INVALID_UPDATES_COUNT_RESPONSE.format(
+                                    max_updates_count=100
+                                ),
+                                "chat_id": serialized_data["message"]["chat"]["id"],
+                            }
+                        )
+                    }
+                ),
+            )
+        mock_enable_profiling.assert_not_called()
+
     # command: /unknown
     def test_process_unknown_command_in_the_private_chat_as_a_message(self):
         with self.assertRaises(UnknownCommandException):
@@ -1695,7 +1866,7 @@ class TestBotCommandProcessor(TelegramBotRequestsTestBase):
         mock_get_response.assert_not_called()
 
     # command: /continue_input
-    @mock.patch("telegram_bot.sequential_messages_processor.client")
+    @mock.patch("telegram_bot.session_stores.client")
     @mock.patch(
         "telegram_bot.message_handling_services.SequentialMessagesProcessor.get_response_text"
     )
@@ -1808,36 +1979,90 @@ class TestBotCommandProcessor(TelegramBotRequestsTestBase):
         assert response is None
 
     # command: /report_
-    def test_get_report_command_response(self):
+    @mock.patch("telegram_bot.message_handling_services.enqueue_report_job")
+    def test_get_report_command_response(self, mock_enqueue_report_job):
         payload = copy.deepcopy(self.command_as_message_in_private_chat_request_payload)
         payload["message"]["text"] = "/report_01-02-2024_04-02-2024"
         serialized_data = self._get_serialized_request_data(payload)
         parsed_message = TelegramCommandParser.parse(serialized_data)
+        for job_created, response_text in (
+            (True, REPORT_JOB_QUEUED_RESPONSE),
+            (False, REPORT_JOB_ALREADY_QUEUED_RESPONSE),
+        ):
+            with self.subTest(job_created=job_created):
+                mock_enqueue_report_job.return_value = job_created
+                processor = BotCommandProcessor(serialized_data)
+                processor.parsed_telegram_message = parsed_message
+                processor._process_report_generation_command()
+                mock_enqueue_report_job.assert_called_with(
+                    ReportJob(
+                        start_date=datetime.date(2024, 2, 1),
+                        end_date=datetime.date(2024, 2, 4),
+                    ),
+                    payload["message"]["chat"]["id"],
+                )
+                assert processor._get_report_generation_command_response() == {
+                    "data": {
+                        "text": response_text,
+                        "chat_id": payload["message"]["chat"]["id"],
+                    }
+                }
+
+    def test_get_report_job_with_format(self):
+        payload = copy.deepcopy(self.command_as_message_in_private_chat_request_payload)
+        for command, report_format in (
+            ("/report_01-02-2024_04-02-2024", "csv"),
+            ("/report_01-02-2024_04-02-2024_xlsx", "xlsx"),
+        ):
+            with self.subTest(command=command):
+                payload["message"]["text"] = command
+                serialized_data = self._get_serialized_request_data(payload)
+                processor = BotCommandProcessor(serialized_data)
+                processor.parsed_telegram_message = TelegramCommandParser.parse(
+                    serialized_data
+                )
+                assert processor._get_report_job() == ReportJob(
+                    start_date=datetime.date(2024, 2, 1),
+                    end_date=datetime.date(2024, 2, 4),
+                    report_format=report_format,
+                )
+
+    def test_get_report_job_unknown_format(self):
+        payload = copy.deepcopy(self.command_as_message_in_private_chat_request_payload)
+        payload["message"]["text"] = "/report_01-02-2024_04-02-2024_pdf"
+        serialized_data = self._get_serialized_request_data(payload)
         processor = BotCommandProcessor(serialized_data)
-        processor.parsed_telegram_message = parsed_message
-        processor._process_report_generation_command()
-        response = processor._get_report_generation_command_response()
-        try:
-            assert_that(
-                response,
-                is_mapping(
-                    {
-                        "data": is_mapping(
-                            {
-                                "text": "",
-                                "chat_id": payload["message"]["chat"]["id"],
-                            }
-                        ),
-                        "files": is_mapping(
-                            {"document": has_attrs(name=processor.generated_report)}
+        processor.parsed_telegram_message = TelegramCommandParser.parse(serialized_data)
+        with self.assertRaises(CommandValidationFailedException) as context:
+            processor._get_report_job()
+        assert "csv, xlsx, parquet" in context.exception.message
+
+    @override_settings(ADMIN_USER_IDS=[111111111])
+    @mock.patch("telegram_bot.message_handling_services.enqueue_report_job")
+    def test_process_report_command_invalid(self, mock_enqueue_report_job):
+        for command in (
+            "/report_01-02-2024_04-02-2024_pdf",
+            "/report_01-02-2024",
+            "/report_01-02-2024_31-02-2024",
+            "/report_01-02-2024_04-02-2024_csv_x",
+        ):
+            with self.subTest(command=command):
+                payload = copy.deepcopy(
+                    self.command_as_message_in_private_chat_request_payload
+                )
+                payload["message"]["text"] = command
+                serialized_data = self._get_serialized_request_data(payload)
+                processor = BotCommandProcessor(serialized_data)
+                processor.process()
+                assert processor.prepare_response() == {
+                    "data": {
+                        "text": REPORT_INVALID_COMMAND_RESPONSE.format(
+                            report_formats="csv, xlsx, parquet"
                         ),
+                        "chat_id": serialized_data["message"]["chat"]["id"],
                     }
-                ),
-            )
-        except Exception:
-            raise
-        finally:
-            os.remove(processor.generated_report)
+                }
+        mock_enqueue_report_job.assert_not_called()
 
     @mock.patch(
         "telegram_bot.message_handling_services.BotCommandProcessor._get_report_generation_command_response"
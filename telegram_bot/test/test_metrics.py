@@ -0,0 +1,120 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from telegram_bot.exceptions import UserInputExpiredException
+from telegram_bot.message_handling_services import MessageHandler
+from telegram_bot.metrics import (
+    SessionsCollector,
+    collect_stage_durations,
+    count_exception,
+    current_processor,
+    measure_stage,
+)
+from telegram_bot.test.base import TelegramBotRequestsTestBase
+
+
+class TestMetrics(SimpleTestCase):
+    def test_measure_stage(self):
+        labels = {"processor": "TestProcessor", "stage": "test_stage"}
+        count_before = (
+            REGISTRY.get_sample_value(
+                "hero_search_bot_stage_duration_seconds_count", labels
+            )
+            or 0
+        )
+        token = current_processor.set("TestProcessor")
+        try:
+            with measure_stage("test_stage"):
+                pass
+        finally:
+            current_processor.reset(token)
+        assert (
+            REGISTRY.get_sample_value(
+                "hero_search_bot_stage_duration_seconds_count", labels
+            )
+            == count_before + 1
+        )
+
+    def test_collect_stage_durations(self):
+        with measure_stage("test_stage"):
+            pass
+        with collect_stage_durations({}) as stage_durations:
+            with measure_stage("test_stage"):
+                pass
+            with measure_stage("test_stage"), measure_stage("other_stage"):
+                pass
+        assert set(stage_durations) == {"test_stage", "other_stage"}
+        assert stage_durations["test_stage"] >= stage_durations["other_stage"] > 0
+
+    def test_count_exception(self):
+        labels = {
+            "processor": "none",
+            "exception": "UserInputExpiredException",
+        }
+        count_before = (
+            REGISTRY.get_sample_value("hero_search_bot_exceptions_total", labels) or 0
+        )
+        count_exception(UserInputExpiredException())
+        assert (
+            REGISTRY.get_sample_value("hero_search_bot_exceptions_total", labels)
+            == count_before + 1
+        )
+
+    def test_sessions_collector(self):
+        collector = SessionsCollector(
+            count_open_sessions=lambda: 3,
+            count_abandoned_sessions=lambda: 2,
+        )
+        metrics = list(collector.collect())
+        assert [metric.name for metric in metrics] == [
+            "hero_search_bot_open_sessions",
+            "hero_search_bot_abandoned_sessions",
+        ]
+        assert metrics[0].samples[0].value == 3
+        assert metrics[1].samples[0].value == 2
+
+    def test_sessions_collector_count_failed(self):
+        def count_open_sessions():
+            raise ConnectionError
+
+        collector = SessionsCollector(
+            count_open_sessions=count_open_sessions,
+            count_abandoned_sessions=lambda: 2,
+        )
+        assert list(collector.collect()) == []
+
+
+class TestMetricsView(TelegramBotRequestsTestBase):
+    @mock.patch("telegram_bot.session_stores.client")
+    def test_metrics(self, redis_mock):
+        redis_mock.scan_iter.return_value = [b"hsb:session:{1}", b"hsb:session:{-2}"]
+        redis_mock.get.return_value = b"4"
+        response = self.client.get(reverse("metrics"))
+        assert response.status_code == status.HTTP_200_OK
+        content = response.content.decode()
+        assert "hero_search_bot_stage_duration_seconds" in content
+        assert "hero_search_bot_open_sessions 2.0" in content
+        assert "hero_search_bot_abandoned_sessions_total 4.0" in content
+
+    @mock.patch("telegram_bot.message_handling_services.requests.post")
+    def test_handle_telegram_message_is_measured(self, mock_post):
+        serialized_data = self._get_serialized_request_data(
+            self.bot_added_to_the_private_chat_request_payload
+        )
+        labels = {"processor": "MemberStatusChangeProcessor"}
+        count_before = (
+            REGISTRY.get_sample_value("hero_search_bot_updates_total", labels) or 0
+        )
+        MessageHandler(telegram_message=serialized_data).handle_telegram_message()
+        assert (
+            REGISTRY.get_sample_value("hero_search_bot_updates_total", labels)
+            == count_before + 1
+        )
+        assert REGISTRY.get_sample_value(
+            "hero_search_bot_stage_duration_seconds_count",
+            {"processor": "MemberStatusChangeProcessor", "stage": "postgres"},
+        )
@@ -0,0 +1,88 @@
+import datetime
+import os
+import tempfile
+from io import StringIO
+
+import pyarrow.parquet as pq
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.timezone import now
+
+from telegram_bot.constants import DATE_FORMAT
+from telegram_bot.models import HeroData
+from telegram_bot.parquet_export import (
+    ParquetReportGenerator,
+    export_hero_data_to_parquet,
+    get_parquet_schema,
+)
+from telegram_bot.test.factories import HeroDataFactory
+
+
+class TestExportHeroDataToParquet(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "hero_data.parquet")
+        self.hero_data_list = HeroDataFactory.create_batch(5, comment=None)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_export_in_row_groups(self):
+        rows_count = export_hero_data_to_parquet(
+            HeroData.objects.order_by("id"), self.file_path, batch_size=2
+        )
+        assert rows_count == 5
+        parquet_file = pq.ParquetFile(self.file_path)
+        assert parquet_file.metadata.num_row_groups == 3
+        assert parquet_file.schema_arrow == get_parquet_schema()
+        table = parquet_file.read()
+        assert table.column("case_id").to_pylist() == [
+            hero_data.case_id for hero_data in self.hero_data_list
+        ]
+        assert table.column("comment").to_pylist() == [None] * 5
+        assert table.column("hero_date_of_birth").to_pylist() == [
+            hero_data.hero_date_of_birth for hero_data in self.hero_data_list
+        ]
+        column_encodings = parquet_file.metadata.row_group(0).column(1).encodings
+        assert "RLE_DICTIONARY" in column_encodings
+
+    def test_export_with_authors(self):
+        export_hero_data_to_parquet(
+            HeroData.objects.order_by("id"), self.file_path, with_authors=True
+        )
+        table = pq.read_table(self.file_path)
+        assert table.column("author__telegram_id").to_pylist() == [
+            hero_data.author.telegram_id for hero_data in self.hero_data_list
+        ]
+
+    def test_export_empty_queryset(self):
+        rows_count = export_hero_data_to_parquet(
+            HeroData.objects.none(), self.file_path
+        )
+        assert rows_count == 0
+        assert pq.read_table(self.file_path).num_rows == 0
+
+    def test_export_parquet_command(self):
+        call_command(
+            "export_parquet",
+            f"--output={self.file_path}",
+            f"--start-date={now().strftime(DATE_FORMAT)}",
+            "--with-authors",
+            stdout=StringIO(),
+        )
+        table = pq.read_table(self.file_path)
+        assert table.num_rows == 5
+        assert "author__username" in table.column_names
+
+
+class TestParquetReportGenerator(TestCase):
+    def test_generate_report(self):
+        hero_data = HeroDataFactory()
+        report_file_path = ParquetReportGenerator(
+            start_date=now().date() - datetime.timedelta(days=1),
+            end_date=now().date(),
+        ).generate_report()
+        assert report_file_path.endswith(".parquet")
+        table = pq.read_table(report_file_path)
+        os.remove(report_file_path)
+        assert table.column("case_id").to_pylist() == [hero_data.case_id]
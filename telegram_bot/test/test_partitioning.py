@@ -0,0 +1,81 @@
+import datetime
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from telegram_bot.models import HeroData
+from telegram_bot.partitioning import (
+    add_months,
+    create_future_partitions,
+    create_partition,
+    detach_old_partitions,
+    get_monthly_partitions,
+)
+from telegram_bot.test.factories import HeroDataFactory
+
+HERO_DATA_TABLE = HeroData._meta.db_table
+
+
+def count_rows(table: str) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+class TestAddMonths(SimpleTestCase):
+    def test_add_months(self):
+        assert add_months(datetime.date(2024, 11, 1), 2) == datetime.date(2025, 1, 1)
+        assert add_months(datetime.date(2024, 1, 1), -1) == datetime.date(2023, 12, 1)
+
+
+class TestPartitioning(TestCase):
+    def test_row_stored_in_month_partition(self):
+        create_future_partitions(HERO_DATA_TABLE, months_ahead=0)
+        month_start = datetime.date.today().replace(day=1)
+        partition_name = get_monthly_partitions(HERO_DATA_TABLE)[month_start]
+        HeroDataFactory()
+        assert count_rows(partition_name) == 1
+
+    def test_create_partition_moves_rows_from_default_partition(self):
+        hero_data = HeroDataFactory()
+        hero_data.created_at = datetime.datetime(
+            2001, 5, 10, tzinfo=datetime.timezone.utc
+        )
+        hero_data.save()
+        assert count_rows(f"{HERO_DATA_TABLE}_default") == 1
+
+        partition_name = create_partition(HERO_DATA_TABLE, datetime.date(2001, 5, 1))
+
+        assert partition_name == f"{HERO_DATA_TABLE}_p2001_05"
+        assert count_rows(f"{HERO_DATA_TABLE}_default") == 0
+        assert count_rows(partition_name) == 1
+        assert HeroData.objects.get() == hero_data
+
+    def test_create_future_partitions(self):
+        today = add_months(datetime.date.today().replace(day=1), 12)
+        created_partitions = create_future_partitions(
+            HERO_DATA_TABLE, months_ahead=1, today=today
+        )
+        assert created_partitions == [
+            f"{HERO_DATA_TABLE}_p{today.strftime('%Y_%m')}",
+            f"{HERO_DATA_TABLE}_p{add_months(today, 1).strftime('%Y_%m')}",
+        ]
+        assert create_future_partitions(HERO_DATA_TABLE, 1, today=today) == []
+
+    def test_detach_old_partitions(self):
+        create_partition(HERO_DATA_TABLE, datetime.date(2001, 5, 1))
+        create_partition(HERO_DATA_TABLE, datetime.date(2001, 6, 1))
+        with CaptureQueriesContext(connection) as queries:
+            detached_partitions = detach_old_partitions(
+                HERO_DATA_TABLE, months_to_keep=1, today=datetime.date(2001, 7, 15)
+            )
+        assert detached_partitions == [f"{HERO_DATA_TABLE}_p2001_05"]
+        sql = [query["sql"] for query in queries]
+        detach_index = sql.index(
+            f"ALTER TABLE {HERO_DATA_TABLE} DETACH PARTITION {HERO_DATA_TABLE}_p2001_05"
+        )
+        assert sql[detach_index - 1] == "SET LOCAL lock_timeout = '5000ms'"
+        partitions = get_monthly_partitions(HERO_DATA_TABLE)
+        assert datetime.date(2001, 5, 1) not in partitions
+        assert datetime.date(2001, 6, 1) in partitions
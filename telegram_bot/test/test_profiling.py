@@ -0,0 +1,80 @@
+import os
+import tempfile
+from contextlib import nullcontext
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from telegram_bot.profiling import (
+    ProfilingState,
+    enable_profiling_for_next_updates,
+    profile_update,
+)
+from telegram_bot.redis_keys import PROFILED_UPDATES_LEFT_KEY
+
+
+@override_settings(PROFILING_SAMPLE_RATE=0)
+class TestProfilingState(SimpleTestCase):
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    @mock.patch("telegram_bot.profiling.client")
+    def test_should_profile_sampled(self, redis_mock):
+        assert ProfilingState().should_profile() is True
+        redis_mock.exists.assert_not_called()
+
+    @mock.patch("telegram_bot.profiling.client")
+    def test_should_profile_disabled(self, redis_mock):
+        redis_mock.exists.return_value = 0
+        assert ProfilingState().should_profile() is False
+        redis_mock.decr.assert_not_called()
+
+    @mock.patch("telegram_bot.profiling.client")
+    def test_should_profile_enabled_by_command(self, redis_mock):
+        redis_mock.exists.return_value = 1
+        redis_mock.decr.return_value = 0
+        assert ProfilingState().should_profile() is True
+        redis_mock.decr.assert_called_once_with(PROFILED_UPDATES_LEFT_KEY)
+
+    @mock.patch("telegram_bot.profiling.client")
+    def test_should_profile_no_updates_left(self, redis_mock):
+        redis_mock.exists.return_value = 1
+        redis_mock.decr.return_value = -1
+        profiling_state = ProfilingState()
+        assert profiling_state.should_profile() is False
+        redis_mock.delete.assert_called_once_with(PROFILED_UPDATES_LEFT_KEY)
+        assert profiling_state.enabled_by_command is False
+
+    @mock.patch("telegram_bot.profiling.client")
+    def test_state_is_refreshed_once_per_interval(self, redis_mock):
+        redis_mock.exists.return_value = 0
+        profiling_state = ProfilingState()
+        profiling_state.should_profile()
+        profiling_state.should_profile()
+        redis_mock.exists.assert_called_once()
+
+    @mock.patch("telegram_bot.profiling.client")
+    def test_enable_profiling_for_next_updates(self, redis_mock):
+        enable_profiling_for_next_updates(5)
+        redis_mock.set.assert_called_once_with(PROFILED_UPDATES_LEFT_KEY, 5)
+
+
+class TestProfileUpdate(SimpleTestCase):
+    @mock.patch("telegram_bot.profiling.profiling_state")
+    def test_profile_update(self, mock_profiling_state):
+        mock_profiling_state.should_profile.return_value = True
+        with tempfile.TemporaryDirectory() as profiles_directory:
+            with override_settings(PROFILES_DIRECTORY=profiles_directory):
+                with profile_update("UserMessageProcessor"):
+                    sum(range(100))
+            profiles = os.listdir(profiles_directory)
+        assert len(profiles) == 1
+        assert profiles[0].endswith("_UserMessageProcessor.prof")
+
+    @mock.patch("telegram_bot.profiling.profiling_state")
+    def test_profile_update_not_profiled(self, mock_profiling_state):
+        mock_profiling_state.should_profile.return_value = False
+        assert isinstance(profile_update("UserMessageProcessor"), nullcontext)
+
+    @mock.patch("telegram_bot.profiling.profiling_state")
+    def test_profile_update_state_check_failed(self, mock_profiling_state):
+        mock_profiling_state.should_profile.side_effect = ConnectionError
+        assert isinstance(profile_update("UserMessageProcessor"), nullcontext)
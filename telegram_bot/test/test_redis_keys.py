@@ -0,0 +1,28 @@
+from django.test import SimpleTestCase
+from redis.crc import key_slot
+
+from telegram_bot.redis_keys import (
+    get_session_key,
+    get_session_user_id,
+    get_update_idempotency_key,
+    get_user_lock_key,
+)
+
+
+class TestRedisKeys(SimpleTestCase):
+    def test_keys_of_user_in_same_slot(self):
+        slots = {
+            key_slot(key.encode())
+            for key in (
+                get_session_key(123),
+                get_user_lock_key(123),
+                get_update_idempotency_key(123, 456),
+            )
+        }
+        assert len(slots) == 1
+
+    def test_get_session_user_id(self):
+        assert get_session_user_id(get_session_key(-123)) == -123
+        assert get_session_user_id(b"hsb:session:{123}") == 123
+        assert get_session_user_id(b"hsb:lock:{123}") is None
+        assert get_session_user_id(b"123") is None
@@ -0,0 +1,114 @@
+import datetime
+import os
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from redis.exceptions import RedisError
+
+from telegram_bot.dataclasses import CachedReport, ReportJob
+from telegram_bot.redis_keys import REPORT_CACHE_VERSION_KEY
+from telegram_bot.report_cache import report_cache
+from telegram_bot.test.fake_redis import FakeRedis
+from telegram_bot.test.factories import HeroDataFactory
+
+FEBRUARY_REPORT_JOB = ReportJob(
+    start_date=datetime.date(2024, 2, 1),
+    end_date=datetime.date(2024, 2, 29),
+)
+MARCH_REPORT_JOB = ReportJob(
+    start_date=datetime.date(2024, 3, 1),
+    end_date=datetime.date(2024, 3, 31),
+)
+
+
+class TestReportCache(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            REPORT_CACHE_DIRECTORY=self.directory.name
+        )
+        self.settings_override.enable()
+        self.fake_redis = FakeRedis()
+        client_patch = mock.patch("telegram_bot.report_cache.client", self.fake_redis)
+        client_patch.start()
+        self.addCleanup(client_patch.stop)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.directory.cleanup()
+
+    def _put(self, report_job: ReportJob, content: str = "report") -> CachedReport:
+        report_path = os.path.join(self.directory.name, f"new_{report_job.id}.csv")
+        with open(report_path, "w") as report_file:
+            report_file.write(content)
+        return report_cache.put(report_job, [report_path], report_cache.get_version())
+
+    def test_put_and_get(self):
+        cached_report = self._put(FEBRUARY_REPORT_JOB)
+        report_cache.set_file_ids(FEBRUARY_REPORT_JOB, ["file_id"])
+        assert report_cache.get(FEBRUARY_REPORT_JOB) == CachedReport(
+            file_paths=cached_report.file_paths, file_ids=["file_id"]
+        )
+        assert report_cache.get(MARCH_REPORT_JOB) is None
+
+    def test_put_changed_while_generated(self):
+        report_path = os.path.join(self.directory.name, "report.csv")
+        open(report_path, "w").close()
+        version = report_cache.get_version()
+        report_cache.invalidate_date(datetime.date(2024, 5, 1))
+        assert report_cache.put(FEBRUARY_REPORT_JOB, [report_path], version) is None
+        assert self.fake_redis.get(REPORT_CACHE_VERSION_KEY) == b"1"
+        assert os.path.exists(report_path)
+
+    def test_put_parts(self):
+        report_paths = []
+        for index in range(2):
+            report_path = os.path.join(self.directory.name, f"new_part{index}.csv.gz")
+            open(report_path, "w").close()
+            report_paths.append(report_path)
+        cached_report = report_cache.put(
+            FEBRUARY_REPORT_JOB, report_paths, report_cache.get_version()
+        )
+        assert report_cache.get(FEBRUARY_REPORT_JOB) == cached_report
+        assert len(cached_report.file_paths) == 2
+        report_cache.delete(FEBRUARY_REPORT_JOB)
+        assert not any(map(os.path.exists, cached_report.file_paths))
+
+    def test_least_recently_used_report_evicted(self):
+        february_report = self._put(FEBRUARY_REPORT_JOB, "a" * 10)
+        with override_settings(REPORT_CACHE_MAX_BYTES=15):
+            self._put(MARCH_REPORT_JOB, "b" * 10)
+        assert report_cache.get(FEBRUARY_REPORT_JOB) is None
+        assert not os.path.exists(february_report.file_paths[0])
+        assert report_cache.get(MARCH_REPORT_JOB) is not None
+
+    def test_hero_data_saved_invalidates_covering_reports(self):
+        self._put(FEBRUARY_REPORT_JOB)
+        self._put(MARCH_REPORT_JOB)
+        with self.captureOnCommitCallbacks(execute=True):
+            hero_data = HeroDataFactory()
+            hero_data.created_at = datetime.datetime(
+                2024, 2, 10, tzinfo=datetime.timezone.utc
+            )
+            hero_data.save()
+            # Not invalidated before the commit.
+            assert report_cache.get(FEBRUARY_REPORT_JOB) is not None
+        assert report_cache.get(FEBRUARY_REPORT_JOB) is None
+        assert report_cache.get(MARCH_REPORT_JOB) is not None
+
+    @mock.patch("telegram_bot.signals.report_cache.invalidate_date")
+    def test_hero_data_saved_while_redis_unavailable(self, invalidate_date_mock):
+        invalidate_date_mock.side_effect = RedisError("redis unavailable")
+        with self.captureOnCommitCallbacks(execute=True):
+            HeroDataFactory()
+        invalidate_date_mock.assert_called_once()
+
+    def test_invalidate_dates(self):
+        self._put(FEBRUARY_REPORT_JOB)
+        self._put(MARCH_REPORT_JOB)
+        report_cache.invalidate_dates(
+            datetime.date(2024, 1, 1), datetime.date(2024, 2, 1)
+        )
+        assert report_cache.get(FEBRUARY_REPORT_JOB) is None
+        assert report_cache.get(MARCH_REPORT_JOB) is not None
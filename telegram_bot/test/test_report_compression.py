@@ -0,0 +1,117 @@
+import csv
+import gzip
+import os
+import tempfile
+import zipfile
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from telegram_bot.report_compression import compress_report
+
+HEADERS_LINE = b"case_id;comment\n"
+
+
+class TestCompressReport(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.report_path = os.path.join(self.directory.name, "report.csv")
+        self.rows = [
+            f"{index};{os.urandom(50).hex()}\n".encode() for index in range(50)
+        ]
+        with open(self.report_path, "wb") as report_file:
+            report_file.write(HEADERS_LINE)
+            report_file.writelines(self.rows)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @override_settings(REPORT_COMPRESSION="")
+    def test_report_not_compressed(self):
+        assert compress_report(self.report_path) == [self.report_path]
+
+    @override_settings(REPORT_COMPRESSION="gzip")
+    def test_report_compressed_with_gzip(self):
+        report_paths = compress_report(self.report_path)
+        assert report_paths == [os.path.join(self.directory.name, "report.csv.gz")]
+        assert not os.path.exists(self.report_path)
+        with gzip.open(report_paths[0], "rb") as report_file:
+            assert report_file.read() == HEADERS_LINE + b"".join(self.rows)
+
+    @override_settings(REPORT_COMPRESSION="zip")
+    def test_report_compressed_with_zip(self):
+        report_paths = compress_report(self.report_path)
+        assert report_paths == [os.path.join(self.directory.name, "report.zip")]
+        with zipfile.ZipFile(report_paths[0]) as archive:
+            assert archive.namelist() == ["report.csv"]
+            assert archive.read("report.csv") == HEADERS_LINE + b"".join(self.rows)
+
+    def _assert_parts(self, report_paths: list[str], read_part, max_part_bytes: int):
+        assert len(report_paths) > 1
+        rows = []
+        for report_path in report_paths:
+            assert os.path.getsize(report_path) <= max_part_bytes
+            headers_line, *part_rows = read_part(report_path).splitlines(keepends=True)
+            assert headers_line == HEADERS_LINE
+            rows.extend(part_rows)
+        assert rows == self.rows
+
+    @override_settings(REPORT_COMPRESSION="gzip", REPORT_MAX_PART_BYTES=2000)
+    def test_report_split_into_gzip_parts(self):
+        report_paths = compress_report(self.report_path)
+        assert os.path.basename(report_paths[0]) == "report_part1.csv.gz"
+
+        def read_part(report_path: str) -> bytes:
+            with gzip.open(report_path, "rb") as report_file:
+                return report_file.read()
+
+        self._assert_parts(report_paths, read_part, 2000)
+
+    @override_settings(REPORT_COMPRESSION="zip", REPORT_MAX_PART_BYTES=3000)
+    def test_report_split_into_zip_parts(self):
+        report_paths = compress_report(self.report_path)
+
+        def read_part(report_path: str) -> bytes:
+            with zipfile.ZipFile(report_path) as archive:
+                (file_name,) = archive.namelist()
+                return archive.read(file_name)
+
+        self._assert_parts(report_paths, read_part, 3000)
+
+    @override_settings(REPORT_COMPRESSION="", REPORT_MAX_PART_BYTES=1000)
+    def test_report_split_not_compressed(self):
+        report_paths = compress_report(self.report_path)
+
+        def read_part(report_path: str) -> bytes:
+            with open(report_path, "rb") as report_file:
+                return report_file.read()
+
+        self._assert_parts(report_paths, read_part, 1000)
+
+    @override_settings(REPORT_COMPRESSION="", REPORT_MAX_PART_BYTES=1000)
+    def test_report_split_on_multiline_records(self):
+        # The comments with line breaks and quotes span several lines.
+        self.rows = [
+            f'{index};"a ""quoted""\ncomment\n{os.urandom(20).hex()}"\n'.encode()
+            for index in range(50)
+        ]
+        with open(self.report_path, "wb") as report_file:
+            report_file.write(HEADERS_LINE)
+            report_file.writelines(self.rows)
+
+        report_paths = compress_report(self.report_path)
+
+        assert len(report_paths) > 1
+        rows = []
+        for report_path in report_paths:
+            with open(report_path, newline="") as report_file:
+                headers, *part_rows = csv.reader(report_file, delimiter=";")
+            assert headers == ["case_id", "comment"]
+            rows.extend(part_rows)
+        assert [row[0] for row in rows] == [str(index) for index in range(50)]
+        assert all(row[1].startswith('a "quoted"\ncomment\n') for row in rows)
+
+    @override_settings(REPORT_COMPRESSION="rar")
+    def test_unknown_compression(self):
+        with self.assertRaises(ImproperlyConfigured):
+            compress_report(self.report_path)
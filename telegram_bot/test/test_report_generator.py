@@ -1,14 +1,21 @@
 import datetime
 import os.path
+import zipfile
 from unittest import mock
 
 from django.conf import settings
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
 from django.utils.timezone import now
 from precisely import assert_that, is_sequence
 
 from telegram_bot.constants import DATE_FORMAT
-from telegram_bot.report_generator import ReportGenerator
+from telegram_bot.report_generator import (
+    CopyReportGenerator,
+    ParallelReportGenerator,
+    ReportGenerator,
+    XlsxReportGenerator,
+    split_date_range,
+)
 from telegram_bot.test.factories import HeroDataFactory, TelegramUserFactory
 
 
@@ -124,3 +131,106 @@ class TestReportGenerator(TestCase):
         assert lines[2].split(";")[0] == self.hero_data_2.case_id
 
         os.remove(report_file_path)
+
+
+class TestCopyReportGenerator(TestCase):
+    def test_generate_report_same_as_report_generator(self):
+        HeroDataFactory(comment="comment", item_used_for_dna_extraction="item")
+        HeroDataFactory(is_added_to_dna_db=True)
+        HeroDataFactory(comment="comment; with the delimiter")
+        start_date = now().date() - datetime.timedelta(days=1)
+        end_date = now().date()
+
+        reports_lines = []
+        for generator_class in (ReportGenerator, CopyReportGenerator):
+            report_file_path = generator_class(
+                start_date=start_date, end_date=end_date
+            ).generate_report()
+            with open(report_file_path, "r") as generated_report:
+                reports_lines.append(generated_report.readlines())
+            os.remove(report_file_path)
+
+        report_lines, copy_report_lines = reports_lines
+        assert len(copy_report_lines) == 4
+        # Unlike ReportGenerator, COPY quotes the values with the delimiter.
+        assert copy_report_lines[1].endswith(
+            f';"comment; with the delimiter";{end_date.strftime(DATE_FORMAT)}\n'
+        )
+        assert copy_report_lines[0] == report_lines[0]
+        assert copy_report_lines[2:] == report_lines[2:]
+
+
+class TestSplitDateRange(SimpleTestCase):
+    def test_split_date_range(self):
+        assert split_date_range(
+            datetime.date(2024, 1, 1), datetime.date(2024, 1, 5), 2
+        ) == [
+            (datetime.date(2024, 1, 1), datetime.date(2024, 1, 3)),
+            (datetime.date(2024, 1, 4), datetime.date(2024, 1, 5)),
+        ]
+
+    def test_split_date_range_less_days_than_partitions(self):
+        assert split_date_range(
+            datetime.date(2024, 1, 1), datetime.date(2024, 1, 1), 4
+        ) == [(datetime.date(2024, 1, 1), datetime.date(2024, 1, 1))]
+
+
+class TestParallelReportGenerator(TransactionTestCase):
+    @override_settings(REPORT_GENERATION_PROCESSES=2)
+    def test_generate_report_same_as_report_generator(self):
+        for days_ago in range(4):
+            hero_data = HeroDataFactory()
+            hero_data.created_at = now() - datetime.timedelta(days=days_ago)
+            hero_data.save()
+        start_date = now().date() - datetime.timedelta(days=3)
+        end_date = now().date()
+
+        reports_lines = []
+        for generator_class in (ReportGenerator, ParallelReportGenerator):
+            report_file_path = generator_class(
+                start_date=start_date, end_date=end_date
+            ).generate_report()
+            with open(report_file_path, "r") as generated_report:
+                reports_lines.append(generated_report.readlines())
+            os.remove(report_file_path)
+
+        report_lines, parallel_report_lines = reports_lines
+        assert len(parallel_report_lines) == 5
+        assert parallel_report_lines == report_lines
+
+
+class TestXlsxReportGenerator(TestCase):
+    def setUp(self):
+        self.hero_data_1 = HeroDataFactory(comment="=1+1")
+        self.hero_data_2 = HeroDataFactory()
+
+    def _generate_report_worksheets(self) -> list[str]:
+        report_file_path = XlsxReportGenerator(
+            start_date=now().date(), end_date=now().date()
+        ).generate_report()
+        assert report_file_path.endswith(".xlsx")
+        with zipfile.ZipFile(report_file_path) as report:
+            worksheets = [
+                report.read(name).decode()
+                for name in sorted(report.namelist())
+                if name.startswith("xl/worksheets/sheet")
+            ]
+        os.remove(report_file_path)
+        return worksheets
+
+    def test_generate_report(self):
+        (worksheet,) = self._generate_report_worksheets()
+        assert "Номер справи" in worksheet
+        assert self.hero_data_1.case_id in worksheet
+        assert self.hero_data_2.case_id in worksheet
+        assert "<t>=1+1</t>" in worksheet
+        assert "<f>" not in worksheet
+
+    @mock.patch("telegram_bot.report_generator.XLSX_MAX_ROWS", 2)
+    def test_generate_report_rows_over_worksheet_limit(self):
+        worksheets = self._generate_report_worksheets()
+        assert len(worksheets) == 2
+        for worksheet in worksheets:
+            assert "Номер справи" in worksheet
+        assert self.hero_data_2.case_id in worksheets[0]
+        assert self.hero_data_1.case_id in worksheets[1]
@@ -0,0 +1,229 @@
+import datetime
+import os
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from telegram_bot.constants import BASE_URL
+from telegram_bot.dataclasses import CachedReport, ReportJob
+from telegram_bot.db_routers import REPLICA_DATABASE
+from telegram_bot.messages_texts import REPORT_JOB_FAILED_RESPONSE
+from telegram_bot.redis_keys import REPORT_JOBS_QUEUE_KEY
+from telegram_bot.report_jobs import ReportWorker, enqueue_report_job
+from telegram_bot.test.factories import HeroDataFactory
+
+REPORT_JOB = ReportJob(
+    start_date=datetime.date(2024, 2, 1),
+    end_date=datetime.date(2024, 2, 4),
+)
+
+
+class TestReportJob(SimpleTestCase):
+    def test_id(self):
+        assert REPORT_JOB.id == "01-02-2024_04-02-2024_csv"
+        assert ReportJob.from_id(REPORT_JOB.id) == REPORT_JOB
+
+
+@mock.patch("telegram_bot.report_jobs.client")
+class TestEnqueueReportJob(SimpleTestCase):
+    def test_enqueue_new_job(self, redis_mock):
+        redis_mock.eval.return_value = 1
+        assert enqueue_report_job(REPORT_JOB, chat_id=1) is True
+        assert redis_mock.eval.call_args.args[1:] == (
+            3,
+            "hsb:{report_jobs}:job:01-02-2024_04-02-2024_csv:lock",
+            "hsb:{report_jobs}:job:01-02-2024_04-02-2024_csv:subscribers",
+            REPORT_JOBS_QUEUE_KEY,
+            REPORT_JOB.id,
+            1,
+            settings.REPORT_JOB_TIMEOUT_SECONDS,
+        )
+
+    def test_enqueue_job_in_progress(self, redis_mock):
+        redis_mock.eval.return_value = 0
+        assert enqueue_report_job(REPORT_JOB, chat_id=2) is False
+
+
+@mock.patch("telegram_bot.report_jobs.requests.post")
+@mock.patch("telegram_bot.report_jobs.pop_report_job_subscribers")
+@mock.patch("telegram_bot.report_jobs.report_cache")
+class TestReportWorker(TestCase):
+    def test_process_job(self, mock_report_cache, mock_pop_subscribers, mock_post):
+        mock_report_cache.get.return_value = None
+        mock_report_cache.put.return_value = None
+        HeroDataFactory()
+        mock_pop_subscribers.return_value = [1, 2]
+        mock_post.return_value.ok = True
+        mock_post.return_value.json.return_value = {
+            "ok": True,
+            "result": {"document": {"file_id": "file_id"}},
+        }
+        job = ReportJob(
+            start_date=datetime.date.today(),
+            end_date=datetime.date.today(),
+        )
+        ReportWorker().process_job(job)
+
+        assert mock_post.call_count == 2
+        first_call, second_call = mock_post.call_args_list
+        assert first_call.kwargs["data"] == {"chat_id": 1}
+        assert first_call.kwargs["files"]["document"].closed
+        assert not os.path.exists(first_call.kwargs["files"]["document"].name)
+        assert second_call.kwargs == {
+            "url": BASE_URL + "sendDocument",
+            "data": {"chat_id": 2, "document": "file_id"},
+        }
+
+    @override_settings(REPORT_COMPRESSION="gzip", REPORT_MAX_PART_BYTES=1)
+    def test_process_job_report_split(
+        self, mock_report_cache, mock_pop_subscribers, mock_post
+    ):
+        mock_report_cache.get.return_value = None
+        mock_report_cache.put.return_value = None
+        HeroDataFactory.create_batch(2)
+        mock_pop_subscribers.return_value = [1, 2]
+        mock_post.return_value.ok = True
+        mock_post.return_value.json.side_effect = [
+            {"ok": True, "result": {"document": {"file_id": f"file_id_{index}"}}}
+            for index in range(2)
+        ]
+        job = ReportJob(
+            start_date=datetime.date.today(),
+            end_date=datetime.date.today(),
+        )
+        ReportWorker().process_job(job)
+
+        assert mock_post.call_count == 4
+        first_part_call, second_part_call, *file_id_calls = mock_post.call_args_list
+        assert first_part_call.kwargs["files"]["document"].name.endswith(
+            "_part1.csv.gz"
+        )
+        assert second_part_call.kwargs["files"]["document"].name.endswith(
+            "_part2.csv.gz"
+        )
+        assert not os.path.exists(first_part_call.kwargs["files"]["document"].name)
+        assert [call.kwargs["data"] for call in file_id_calls] == [
+            {"chat_id": 2, "document": "file_id_0"},
+            {"chat_id": 2, "document": "file_id_1"},
+        ]
+
+    @override_settings(REPORT_COMPRESSION="gzip", REPORT_MAX_PART_BYTES=1)
+    def test_process_job_xlsx(self, mock_report_cache, mock_pop_subscribers, mock_post):
+        mock_report_cache.get.return_value = None
+        mock_report_cache.put.return_value = None
+        HeroDataFactory.create_batch(2)
+        mock_pop_subscribers.return_value = [1]
+        job = ReportJob(
+            start_date=datetime.date.today(),
+            end_date=datetime.date.today(),
+            report_format="xlsx",
+        )
+        ReportWorker().process_job(job)
+
+        mock_post.assert_called_once()
+        report_file = mock_post.call_args.kwargs["files"]["document"]
+        assert report_file.name.endswith(".xlsx")
+        assert not os.path.exists(report_file.name)
+
+    @mock.patch("telegram_bot.report_generator.ReportGenerator.generate_report")
+    def test_process_job_cached(
+        self, mock_generate_report, mock_report_cache, mock_pop_subscribers, mock_post
+    ):
+        mock_report_cache.get.return_value = CachedReport(
+            file_paths=["report.csv"], file_ids=["file_id"]
+        )
+        mock_pop_subscribers.return_value = [1]
+        ReportWorker().process_job(REPORT_JOB)
+        mock_generate_report.assert_not_called()
+        mock_post.assert_called_once_with(
+            url=BASE_URL + "sendDocument",
+            data={"chat_id": 1, "document": "file_id"},
+        )
+        mock_report_cache.set_file_ids.assert_not_called()
+
+    @mock.patch("telegram_bot.db_routers.get_read_database")
+    @mock.patch("telegram_bot.report_generator.ReportGenerator.generate_report")
+    def test_process_job_read_from_replica_not_cached(
+        self,
+        mock_generate_report,
+        mock_get_read_database,
+        mock_report_cache,
+        mock_pop_subscribers,
+        mock_post,
+    ):
+        mock_report_cache.get.return_value = None
+        mock_get_read_database.return_value = REPLICA_DATABASE
+        report_file, report_path = tempfile.mkstemp(suffix=".csv")
+        os.close(report_file)
+        mock_generate_report.return_value = report_path
+        mock_pop_subscribers.return_value = [1]
+        mock_post.return_value.json.return_value = {"ok": False}
+        ReportWorker().process_job(REPORT_JOB)
+        mock_report_cache.put.assert_not_called()
+        assert mock_post.call_args.kwargs["url"] == BASE_URL + "sendDocument"
+        assert not os.path.exists(report_path)
+
+    @mock.patch("telegram_bot.report_generator.ReportGenerator.generate_report")
+    def test_process_job_failed(
+        self, mock_generate_report, mock_report_cache, mock_pop_subscribers, mock_post
+    ):
+        mock_report_cache.get.return_value = None
+        mock_generate_report.side_effect = ValueError
+        mock_pop_subscribers.return_value = [1]
+        ReportWorker().process_job(REPORT_JOB)
+        mock_post.assert_called_once_with(
+            url=BASE_URL + "sendMessage",
+            data={"text": REPORT_JOB_FAILED_RESPONSE, "chat_id": 1},
+        )
+
+
+@mock.patch("telegram_bot.report_jobs.client")
+class TestReportWorkerQueue(SimpleTestCase):
+    PROCESSING_KEY = "hsb:{report_jobs}:processing:worker"
+
+    def test_requeue_abandoned_jobs(self, redis_mock):
+        redis_mock.lmove.side_effect = [REPORT_JOB.id.encode(), b"job", None]
+
+        assert ReportWorker(worker_name="worker").requeue_abandoned_jobs() == 2
+        redis_mock.lmove.assert_called_with(
+            self.PROCESSING_KEY, REPORT_JOBS_QUEUE_KEY, src="RIGHT", dest="RIGHT"
+        )
+
+    @mock.patch.object(ReportWorker, "process_job")
+    def test_processed_job_is_removed(self, mock_process_job, redis_mock):
+        redis_mock.blmove.return_value = REPORT_JOB.id.encode()
+        mock_process_job.side_effect = RuntimeError("failed")
+
+        assert ReportWorker(worker_name="worker").process_next_job() is True
+        mock_process_job.assert_called_once_with(REPORT_JOB)
+        assert redis_mock.blmove.call_args.args[:2] == (
+            REPORT_JOBS_QUEUE_KEY,
+            self.PROCESSING_KEY,
+        )
+        redis_mock.lrem.assert_called_once_with(
+            self.PROCESSING_KEY, 1, REPORT_JOB.id.encode()
+        )
+
+    @mock.patch.object(ReportWorker, "process_job")
+    def test_interrupted_job_is_queued_again(self, mock_process_job, redis_mock):
+        redis_mock.blmove.return_value = REPORT_JOB.id.encode()
+        mock_process_job.side_effect = KeyboardInterrupt
+        pipeline_mock = redis_mock.pipeline.return_value.__enter__.return_value
+
+        with self.assertRaises(KeyboardInterrupt):
+            ReportWorker(worker_name="worker").process_next_job()
+        pipeline_mock.lrem.assert_called_once_with(
+            self.PROCESSING_KEY, 1, REPORT_JOB.id.encode()
+        )
+        pipeline_mock.rpush.assert_called_once_with(
+            REPORT_JOBS_QUEUE_KEY, REPORT_JOB.id.encode()
+        )
+        redis_mock.lrem.assert_not_called()
+
+    def test_no_job(self, redis_mock):
+        redis_mock.blmove.return_value = None
+
+        assert ReportWorker(worker_name="worker").process_next_job() is False
+        redis_mock.lrem.assert_not_called()
@@ -1,16 +1,19 @@
 from unittest import mock
 
+from django.test import override_settings
+
 from telegram_bot.exceptions import (
     AllDataReceivedException,
     UserMessageValidationFailedException,
 )
+from telegram_bot.redis_keys import get_session_key
 from telegram_bot.sequential_messages_processor import SequentialMessagesProcessor
 from telegram_bot.test.base import TelegramBotRequestsTestBase
 
 
 class TestSequentialMessagesProcessor(TelegramBotRequestsTestBase):
 
-    @mock.patch("telegram_bot.sequential_messages_processor.client")
+    @mock.patch("telegram_bot.session_stores.client")
     def test_get_current_and_next_message_keys(self, redis_mock):
         message_data = "some_message_data"
         chat_id = "123123"
@@ -104,9 +107,9 @@ class TestSequentialMessagesProcessor(TelegramBotRequestsTestBase):
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -115,14 +118,14 @@ class TestSequentialMessagesProcessor(TelegramBotRequestsTestBase):
                 process_sequential_message()
                 hgetall_mock.assert_called_once()
                 hset_mock.assert_called_once_with(
-                    str(chat_id), mapping={"case_id": message_text}
+                    get_session_key(chat_id), mapping={"case_id": message_text}
                 )
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -131,14 +134,14 @@ class TestSequentialMessagesProcessor(TelegramBotRequestsTestBase):
                 process_sequential_message()
                 hgetall_mock.assert_called_once()
                 hset_mock.assert_called_once_with(
-                    str(chat_id), mapping={"hero_last_name": message_text}
+                    get_session_key(chat_id), mapping={"hero_last_name": message_text}
                 )
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -150,14 +153,14 @@ class TestSequentialMessagesProcessor(TelegramBotRequestsTestBase):
                 process_sequential_message()
                 hgetall_mock.assert_called_once()
                 hset_mock.assert_called_once_with(
-                    str(chat_id), mapping={"hero_first_name": message_text}
+                    get_session_key(chat_id), mapping={"hero_first_name": message_text}
                 )
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -170,15 +173,15 @@ class TestSequentialMessagesProcessor(TelegramBotRequestsTestBase):
                 process_sequential_message()
                 hgetall_mock.assert_called_once()
                 hset_mock.assert_called_once_with(
-                    str(chat_id), mapping={"hero_patronymic": message_text}
+                    get_session_key(chat_id), mapping={"hero_patronymic": message_text}
                 )
 
         with self.subTest():
             # date validation passed
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -193,15 +196,16 @@ class TestSequentialMessagesProcessor(TelegramBotRequestsTestBase):
                 process_sequential_message(message_text_param=date_message_input)
                 hgetall_mock.assert_called_once()
                 hset_mock.assert_called_once_with(
-                    str(chat_id), mapping={"hero_date_of_birth": date_message_input}
+                    get_session_key(chat_id),
+                    mapping={"hero_date_of_birth": date_message_input},
                 )
 
         with self.subTest():
             # date validation not passed
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -219,9 +223,9 @@ class TestSequentialMessagesProcessor(TelegramBotRequestsTestBase):
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -236,14 +240,15 @@ class TestSequentialMessagesProcessor(TelegramBotRequestsTestBase):
                 process_sequential_message()
                 hgetall_mock.assert_called_once()
                 hset_mock.assert_called_once_with(
-                    str(chat_id), mapping={"item_used_for_dna_extraction": message_text}
+                    get_session_key(chat_id),
+                    mapping={"item_used_for_dna_extraction": message_text},
                 )
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -259,14 +264,15 @@ class TestSequentialMessagesProcessor(TelegramBotRequestsTestBase):
                 process_sequential_message()
                 hgetall_mock.assert_called_once()
                 hset_mock.assert_called_once_with(
-                    str(chat_id), mapping={"relative_last_name": message_text}
+                    get_session_key(chat_id),
+                    mapping={"relative_last_name": message_text},
                 )
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -283,14 +289,15 @@ class TestSequentialMessagesProcessor(TelegramBotRequestsTestBase):
                 process_sequential_message()
                 hgetall_mock.assert_called_once()
                 hset_mock.assert_called_once_with(
-                    str(chat_id), mapping={"relative_first_name": message_text}
+                    get_session_key(chat_id),
+                    mapping={"relative_first_name": message_text},
                 )
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -308,14 +315,15 @@ class TestSequentialMessagesProcessor(TelegramBotRequestsTestBase):
                 process_sequential_message()
                 hgetall_mock.assert_called_once()
                 hset_mock.assert_called_once_with(
-                    str(chat_id), mapping={"relative_patronymic": message_text}
+                    get_session_key(chat_id),
+                    mapping={"relative_patronymic": message_text},
                 )
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -334,14 +342,15 @@ class TestSequentialMessagesProcessor(TelegramBotRequestsTestBase):
                 process_sequential_message()
                 hgetall_mock.assert_called_once()
                 hset_mock.assert_called_once_with(
-                    str(chat_id), mapping={"is_added_to_dna_db": message_text}
+                    get_session_key(chat_id),
+                    mapping={"is_added_to_dna_db": message_text},
                 )
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -361,14 +370,14 @@ class TestSequentialMessagesProcessor(TelegramBotRequestsTestBase):
                 process_sequential_message()
                 hgetall_mock.assert_called_once()
                 hset_mock.assert_called_once_with(
-                    str(chat_id), mapping={"comment": message_text}
+                    get_session_key(chat_id), mapping={"comment": message_text}
                 )
 
         with self.subTest():
             with mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hgetall",
+                "telegram_bot.redis_client.redis.Redis.hgetall",
             ) as hgetall_mock, mock.patch(
-                "telegram_bot.sequential_messages_processor.redis.Redis.hset"
+                "telegram_bot.redis_client.redis.Redis.hset"
             ) as hset_mock, mock.patch(
                 "telegram_bot.sequential_messages_processor.SequentialMessagesProcessor.check_if_user_input_exists"
             ) as check_if_user_input_exists_mock:
@@ -391,7 +400,7 @@ class TestSequentialMessagesProcessor(TelegramBotRequestsTestBase):
                     hgetall_mock.assert_called_once()
                     hset_mock.assert_not_called()
 
-    @mock.patch("telegram_bot.sequential_messages_processor.client")
+    @mock.patch("telegram_bot.session_stores.client")
     def test_validate_input(self, redis_mock):
         with self.subTest():
             redis_mock.hgetall.return_value = {}
@@ -418,3 +427,28 @@ class TestSequentialMessagesProcessor(TelegramBotRequestsTestBase):
                     user_id=int(chat_id),
                 )
                 processor._validate_user_input(message_data)
+
+    @override_settings(SESSION_TTL_SECONDS=600)
+    @mock.patch("telegram_bot.session_stores.client")
+    def test_create_new_redis_entry(self, redis_mock):
+        SequentialMessagesProcessor.create_new_redis_entry(user_id=1)
+        redis_mock.hset.assert_called_once_with(
+            "hsb:session:{1}", mapping={"empty": "True"}
+        )
+        redis_mock.expire.assert_called_once_with("hsb:session:{1}", 600)
+
+    @override_settings(SESSION_TTL_SLIDING=True, SESSION_TTL_SECONDS=600)
+    @mock.patch("telegram_bot.session_stores.client")
+    def test_save_message_sliding_ttl(self, redis_mock):
+        redis_mock.hgetall.return_value = {b"empty": b"True"}
+        pipeline_mock = redis_mock.pipeline.return_value.__enter__.return_value
+
+        SequentialMessagesProcessor(message_data="1", user_id=1).save_message()
+
+        redis_mock.pipeline.assert_called_once_with(transaction=True)
+        pipeline_mock.hset.assert_called_once_with(
+            "hsb:session:{1}", mapping={"case_id": "1"}
+        )
+        pipeline_mock.expire.assert_called_once_with("hsb:session:{1}", 600)
+        pipeline_mock.execute.assert_called_once()
+        redis_mock.hset.assert_not_called()
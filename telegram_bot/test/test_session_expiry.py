@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from telegram_bot.constants import BASE_URL, MESSAGE_USER_INPUT_EXPIRED
+from telegram_bot.redis_keys import ABANDONED_SESSIONS_COUNTER_KEY
+from telegram_bot.session_expiry import ExpiredSessionsConsumer
+
+
+@mock.patch("telegram_bot.session_expiry.requests.post")
+@mock.patch("telegram_bot.session_expiry.client")
+class TestExpiredSessionsConsumer(SimpleTestCase):
+    def test_handle_expired_session(self, redis_mock, mock_post):
+        ExpiredSessionsConsumer().handle_expired_key(b"hsb:session:{111}")
+        redis_mock.incr.assert_called_once_with(ABANDONED_SESSIONS_COUNTER_KEY)
+        mock_post.assert_called_once_with(
+            url=BASE_URL + "sendMessage",
+            data={"text": MESSAGE_USER_INPUT_EXPIRED, "chat_id": 111},
+        )
+
+    def test_handle_expired_session_users_not_notified(self, redis_mock, mock_post):
+        ExpiredSessionsConsumer(notify_users=False).handle_expired_key(
+            b"hsb:session:{111}"
+        )
+        redis_mock.incr.assert_called_once_with(ABANDONED_SESSIONS_COUNTER_KEY)
+        mock_post.assert_not_called()
+
+    def test_handle_expired_key_not_a_session(self, redis_mock, mock_post):
+        ExpiredSessionsConsumer().handle_expired_key(b"hsb:profiling:updates_left")
+        redis_mock.incr.assert_not_called()
+        mock_post.assert_not_called()
+
+    def test_enable_keyspace_notifications(self, redis_mock, mock_post):
+        redis_mock.config_get.return_value = {"notify-keyspace-events": ""}
+        ExpiredSessionsConsumer.enable_keyspace_notifications()
+        redis_mock.config_set.assert_called_once_with("notify-keyspace-events", "Ex")
+
+    def test_enable_keyspace_notifications_already_enabled(self, redis_mock, mock_post):
+        redis_mock.config_get.return_value = {"notify-keyspace-events": "AKE"}
+        ExpiredSessionsConsumer.enable_keyspace_notifications()
+        redis_mock.config_set.assert_not_called()
+
+    @override_settings(REDIS_CLUSTER_MODE=True)
+    def test_enable_keyspace_notifications_cluster_mode(self, redis_mock, mock_post):
+        nodes = [mock.Mock(), mock.Mock()]
+        redis_mock.get_primaries.return_value = nodes
+        nodes[0].redis_connection.config_get.return_value = {
+            "notify-keyspace-events": "Ex"
+        }
+        nodes[1].redis_connection.config_get.return_value = {
+            "notify-keyspace-events": ""
+        }
+        ExpiredSessionsConsumer.enable_keyspace_notifications()
+        nodes[0].redis_connection.config_set.assert_not_called()
+        nodes[1].redis_connection.config_set.assert_called_once_with(
+            "notify-keyspace-events", "Ex"
+        )
+        redis_mock.config_set.assert_not_called()
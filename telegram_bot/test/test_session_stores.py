@@ -0,0 +1,158 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from telegram_bot.session_stores import (
+    InMemorySessionStore,
+    NearCacheRedisSessionStore,
+    PostgresSessionStore,
+    RedisSessionStore,
+)
+
+
+class SessionStoreTestMixin:
+    def get_store(self):
+        raise NotImplementedError
+
+    def test_create_and_get(self):
+        store = self.get_store()
+        store.create(1, ttl=600)
+        assert store.get(1) == {b"empty": b"True"}
+        assert store.get(2) == {}
+
+    def test_save_field(self):
+        store = self.get_store()
+        store.create(1, ttl=600)
+        store.save_field(1, "case_id", "123")
+        store.save_field(1, "hero_last_name", "Last name", ttl=600)
+        assert store.get(1) == {
+            b"empty": b"True",
+            b"case_id": b"123",
+            b"hero_last_name": b"Last name",
+        }
+
+    def test_delete(self):
+        store = self.get_store()
+        store.create(1, ttl=600)
+        store.delete(1)
+        store.delete(2)
+        assert store.get(1) == {}
+
+    def test_expired_session(self):
+        store = self.get_store()
+        store.create(1, ttl=0)
+        store.create(2, ttl=600)
+        assert store.get(1) == {}
+        assert store.count() == 1
+
+    def test_count_abandoned(self):
+        store = self.get_store()
+        store.create(1, ttl=0)
+        store.create(2, ttl=0)
+        store.create(3, ttl=600)
+        store.delete(2)
+        store.delete(3)
+        assert store.count_abandoned() == 2
+
+
+class TestInMemorySessionStore(SessionStoreTestMixin, SimpleTestCase):
+    def get_store(self):
+        return InMemorySessionStore(max_entries=10)
+
+    def test_least_recently_used_session_evicted(self):
+        store = InMemorySessionStore(max_entries=2)
+        store.create(1, ttl=600)
+        store.create(2, ttl=600)
+        store.get(1)
+        store.create(3, ttl=600)
+        assert store.get(1) == {b"empty": b"True"}
+        assert store.get(2) == {}
+        assert store.count() == 2
+
+
+class TestPostgresSessionStore(SessionStoreTestMixin, TestCase):
+    def get_store(self):
+        return PostgresSessionStore()
+
+
+@mock.patch("telegram_bot.session_stores.client")
+class TestRedisSessionStore(SimpleTestCase):
+    def test_save_field_without_ttl(self, redis_mock):
+        RedisSessionStore().save_field(1, "case_id", "123")
+        redis_mock.hset.assert_called_once_with(
+            "hsb:session:{1}", mapping={"case_id": "123"}
+        )
+        redis_mock.pipeline.assert_not_called()
+
+    def test_count(self, redis_mock):
+        redis_mock.scan_iter.return_value = [b"hsb:session:{1}", b"hsb:session:{-2}"]
+        assert RedisSessionStore().count() == 2
+        redis_mock.scan_iter.assert_called_once_with(match="hsb:session:*", count=1000)
+
+    def test_count_abandoned(self, redis_mock):
+        redis_mock.get.return_value = None
+        assert RedisSessionStore().count_abandoned() == 0
+        redis_mock.get.return_value = b"3"
+        assert RedisSessionStore().count_abandoned() == 3
+        redis_mock.get.assert_called_with("hsb:stats:abandoned_sessions")
+
+
+@mock.patch("telegram_bot.session_stores.client")
+@mock.patch.object(NearCacheRedisSessionStore, "_start_listener")
+class TestNearCacheRedisSessionStore(SimpleTestCase):
+    def get_store(self):
+        store = NearCacheRedisSessionStore(max_entries=10)
+        store._tracking_enabled = True
+        return store
+
+    def test_get_cached(self, _, redis_mock):
+        redis_mock.hgetall.return_value = {b"empty": b"True"}
+        store = self.get_store()
+        assert store.get(1) == {b"empty": b"True"}
+        assert store.get(1) == {b"empty": b"True"}
+        redis_mock.hgetall.assert_called_once_with("hsb:session:{1}")
+
+    def test_get_tracking_disabled(self, _, redis_mock):
+        redis_mock.hgetall.return_value = {}
+        store = self.get_store()
+        store._tracking_enabled = False
+        store.get(1)
+        store.get(1)
+        assert redis_mock.hgetall.call_count == 2
+
+    def test_invalidation_message(self, _, redis_mock):
+        redis_mock.hgetall.return_value = {}
+        store = self.get_store()
+        store.get(1)
+        store.get(2)
+        store.handle_invalidation_message(
+            [b"message", b"__redis__:invalidate", [b"hsb:session:{1}"]]
+        )
+        store.get(1)
+        store.get(2)
+        assert redis_mock.hgetall.call_count == 3
+        store.handle_invalidation_message([b"message", b"__redis__:invalidate", None])
+        store.get(2)
+        assert redis_mock.hgetall.call_count == 4
+
+    def test_write_invalidates_session(self, _, redis_mock):
+        redis_mock.hgetall.return_value = {}
+        store = self.get_store()
+        store.get(1)
+        store.save_field(1, "case_id", "123")
+        store.get(1)
+        assert redis_mock.hgetall.call_count == 2
+
+    def test_session_changed_while_read_not_cached(self, _, redis_mock):
+        store = self.get_store()
+
+        def hgetall(key):
+            store.handle_invalidation_message(
+                [b"message", b"__redis__:invalidate", [key.encode()]]
+            )
+            return {}
+
+        redis_mock.hgetall.side_effect = hgetall
+        store.get(1)
+        store.get(1)
+        assert redis_mock.hgetall.call_count == 2
@@ -0,0 +1,99 @@
+import json
+from copy import deepcopy
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from telegram_bot.constants import BASE_URL
+from telegram_bot.enums import UpdateKind
+from telegram_bot.messages_texts import UNSUPPORTED_MESSAGE_RESPONSE
+from telegram_bot.test.base import TelegramBotRequestsTestBase
+from telegram_bot.test.requests_examples import (
+    BOT_ADDED_TO_THE_GROUP,
+    COMMAND_AS_CALLBACK_IN_PRIVATE_CHAT,
+    COMMAND_AS_MESSAGE_IN_PRIVATE_CHAT,
+    MESSAGE_EDITED,
+    MESSAGE_IN_PRIVATE_CHAT,
+)
+from telegram_bot.update_filter import classify_update, reject_unsupported_update
+
+
+def build_photo_message(message_payload: dict) -> dict:
+    payload = deepcopy(message_payload)
+    del payload["message"]["text"]
+    payload["message"]["photo"] = [{"file_id": "1", "width": 90, "height": 90}]
+    return payload
+
+
+class TestClassifyUpdate(SimpleTestCase):
+    def test_supported_updates(self):
+        for update in (
+            MESSAGE_IN_PRIVATE_CHAT,
+            COMMAND_AS_MESSAGE_IN_PRIVATE_CHAT,
+            COMMAND_AS_CALLBACK_IN_PRIVATE_CHAT,
+            MESSAGE_EDITED,
+            BOT_ADDED_TO_THE_GROUP,
+        ):
+            assert classify_update(update) is UpdateKind.SUPPORTED
+
+    def test_message_without_text(self):
+        assert (
+            classify_update(build_photo_message(MESSAGE_IN_PRIVATE_CHAT))
+            is UpdateKind.UNSUPPORTED_MESSAGE
+        )
+
+    def test_unsupported_update_type(self):
+        update = {"update_id": 1, "poll": {"id": "1", "question": "?"}}
+
+        assert classify_update(update) is UpdateKind.UNSUPPORTED_UPDATE
+
+    def test_malformed_update_is_left_to_the_serializer(self):
+        assert classify_update([]) is UpdateKind.SUPPORTED
+
+
+class TestRejectUnsupportedUpdate(SimpleTestCase):
+    @mock.patch("telegram_bot.update_filter.requests.post")
+    def test_private_message_without_text_gets_response(self, mock_post):
+        update = build_photo_message(MESSAGE_IN_PRIVATE_CHAT)
+
+        assert reject_unsupported_update(update) is True
+
+        mock_post.assert_called_once_with(
+            url=BASE_URL + "sendMessage",
+            data={
+                "chat_id": update["message"]["chat"]["id"],
+                "text": UNSUPPORTED_MESSAGE_RESPONSE,
+            },
+        )
+
+    @mock.patch("telegram_bot.update_filter.requests.post")
+    def test_group_message_without_text_is_dropped(self, mock_post):
+        update = build_photo_message(MESSAGE_IN_PRIVATE_CHAT)
+        update["message"]["chat"] = {"id": -1, "title": "Group", "type": "group"}
+
+        assert reject_unsupported_update(update) is True
+
+        mock_post.assert_not_called()
+
+    @mock.patch("telegram_bot.update_filter.requests.post")
+    def test_supported_update_is_not_rejected(self, mock_post):
+        assert reject_unsupported_update(MESSAGE_IN_PRIVATE_CHAT) is False
+
+        mock_post.assert_not_called()
+
+
+class TestUnsupportedUpdateRequest(TelegramBotRequestsTestBase):
+    @mock.patch("telegram_bot.api.handle_update")
+    @mock.patch("telegram_bot.update_filter.requests.post")
+    def test_unsupported_update_is_not_handled(self, mock_post, mock_handle_update):
+        response = self.client.post(
+            reverse("telegram_bot:telegram_bot-user-message"),
+            data=json.dumps({"update_id": 1, "channel_post": {"message_id": 1}}),
+            content_type="application/json",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        mock_handle_update.assert_not_called()
+        mock_post.assert_not_called()
@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from redis.exceptions import LockError, LockNotOwnedError
+
+from telegram_bot.test.requests_examples import (
+    COMMAND_AS_CALLBACK_IN_PRIVATE_CHAT,
+    MESSAGE_IN_PRIVATE_CHAT,
+)
+from telegram_bot.update_guards import (
+    UPDATE_DONE,
+    UPDATE_PROCESSING,
+    claim_update,
+    complete_update,
+    get_update_user_id,
+    release_update,
+    user_lock,
+)
+
+IDEMPOTENCY_KEY = "hsb:update:{123}:456"
+
+
+@override_settings(UPDATE_IDEMPOTENCY_TTL_SECONDS=100, USER_LOCK_TIMEOUT_SECONDS=10)
+@mock.patch("telegram_bot.update_guards.client")
+class TestUpdateGuards(SimpleTestCase):
+    def test_claim_update(self, redis_mock):
+        redis_mock.set.return_value = True
+        assert claim_update(123, 456) is True
+        redis_mock.set.assert_called_once_with(
+            IDEMPOTENCY_KEY, UPDATE_PROCESSING, nx=True, ex=100
+        )
+
+    def test_claim_update_claimed_already(self, redis_mock):
+        redis_mock.set.return_value = None
+        assert claim_update(123, 456) is False
+
+    def test_complete_and_release_update(self, redis_mock):
+        complete_update(123, 456)
+        redis_mock.set.assert_called_once_with(IDEMPOTENCY_KEY, UPDATE_DONE, ex=100)
+        release_update(123, 456)
+        redis_mock.delete.assert_called_once_with(IDEMPOTENCY_KEY)
+
+    def test_user_lock(self, redis_mock):
+        with user_lock(123):
+            redis_mock.lock.assert_called_once_with(
+                "hsb:lock:{123}", timeout=10, blocking_timeout=10
+            )
+            redis_mock.lock.return_value.acquire.assert_called_once()
+        redis_mock.lock.return_value.release.assert_called_once()
+
+    def test_user_lock_not_acquired(self, redis_mock):
+        redis_mock.lock.return_value.acquire.return_value = False
+        with self.assertRaises(LockError):
+            with user_lock(123):
+                pass
+        redis_mock.lock.return_value.release.assert_not_called()
+
+    def test_user_lock_expired(self, redis_mock):
+        redis_mock.lock.return_value.release.side_effect = LockNotOwnedError
+        with user_lock(123):
+            pass
+
+
+class TestGetUpdateUserId(SimpleTestCase):
+    def test_get_update_user_id(self):
+        assert (
+            get_update_user_id(MESSAGE_IN_PRIVATE_CHAT)
+            == MESSAGE_IN_PRIVATE_CHAT["message"]["from"]["id"]
+        )
+        assert (
+            get_update_user_id(COMMAND_AS_CALLBACK_IN_PRIVATE_CHAT)
+            == COMMAND_AS_CALLBACK_IN_PRIVATE_CHAT["callback_query"]["from"]["id"]
+        )
+        assert get_update_user_id({"update_id": 1}) is None
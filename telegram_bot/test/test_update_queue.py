@@ -0,0 +1,291 @@
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from redis.exceptions import ResponseError
+
+from telegram_bot.exceptions import (
+    UpdateDeliveriesExceededException,
+    UpdateInterruptedException,
+)
+from telegram_bot.redis_keys import (
+    UPDATES_STREAM_KEY,
+    get_update_idempotency_key,
+    get_user_lock_key,
+)
+from telegram_bot.test.requests_examples import MESSAGE_IN_PRIVATE_CHAT
+from telegram_bot.update_guards import (
+    UPDATE_DONE,
+    UPDATE_PROCESSING,
+    UPDATE_SIDE_EFFECTS_STARTED,
+)
+from telegram_bot.update_queue import (
+    UPDATE_WORKERS_GROUP,
+    UpdateWorker,
+    create_update_workers_group,
+    handle_update,
+)
+
+ENTRY_ID = b"1-0"
+ENTRY_FIELDS = {b"update": json.dumps(MESSAGE_IN_PRIVATE_CHAT).encode()}
+USER_ID = MESSAGE_IN_PRIVATE_CHAT["message"]["from"]["id"]
+IDEMPOTENCY_KEY = get_update_idempotency_key(
+    USER_ID, MESSAGE_IN_PRIVATE_CHAT["update_id"]
+)
+
+
+@mock.patch("telegram_bot.update_queue.MessageHandler")
+@mock.patch("telegram_bot.update_queue.client")
+class TestHandleUpdate(SimpleTestCase):
+    @override_settings(UPDATE_QUEUE=True, UPDATE_QUEUE_MAX_LENGTH=10)
+    def test_update_is_queued(self, redis_mock, message_handler_mock):
+        redis_mock.xadd.return_value = ENTRY_ID
+
+        handle_update(MESSAGE_IN_PRIVATE_CHAT)
+
+        redis_mock.xadd.assert_called_once_with(
+            UPDATES_STREAM_KEY,
+            {"update": json.dumps(MESSAGE_IN_PRIVATE_CHAT)},
+            maxlen=10,
+            approximate=True,
+        )
+        message_handler_mock.assert_not_called()
+
+    @override_settings(UPDATE_QUEUE=False)
+    def test_update_is_handled_in_place(self, redis_mock, message_handler_mock):
+        handle_update(MESSAGE_IN_PRIVATE_CHAT)
+
+        message_handler_mock.assert_called_once_with(
+            telegram_message=MESSAGE_IN_PRIVATE_CHAT
+        )
+        redis_mock.xadd.assert_not_called()
+
+
+@mock.patch("telegram_bot.update_queue.close_old_connections")
+@mock.patch("telegram_bot.update_queue.MessageHandler")
+@mock.patch("telegram_bot.update_queue.client")
+class TestUpdateWorker(SimpleTestCase):
+    def setUp(self):
+        self.worker = UpdateWorker(consumer_name="worker-1")
+        guards_client_patch = mock.patch("telegram_bot.update_guards.client")
+        self.guards_redis_mock = guards_client_patch.start()
+        self.addCleanup(guards_client_patch.stop)
+        self.guards_redis_mock.set.return_value = True
+
+    def test_processed_update_is_acknowledged(
+        self, redis_mock, message_handler_mock, _
+    ):
+        assert self.worker.process_entry(ENTRY_ID, ENTRY_FIELDS) is True
+
+        message_handler_mock.assert_called_once_with(
+            telegram_message=MESSAGE_IN_PRIVATE_CHAT, raise_exceptions=True
+        )
+        redis_mock.xack.assert_called_once_with(
+            UPDATES_STREAM_KEY, UPDATE_WORKERS_GROUP, ENTRY_ID
+        )
+        self.guards_redis_mock.lock.assert_called_once()
+        assert self.guards_redis_mock.lock.call_args.args == (
+            get_user_lock_key(USER_ID),
+        )
+        lock_mock = self.guards_redis_mock.lock.return_value
+        lock_mock.release.assert_called_once()
+        assert self.guards_redis_mock.set.call_args_list == [
+            mock.call(IDEMPOTENCY_KEY, UPDATE_PROCESSING, nx=True, ex=mock.ANY),
+            mock.call(IDEMPOTENCY_KEY, UPDATE_DONE, ex=mock.ANY),
+        ]
+
+    def test_failed_update_stays_pending(self, redis_mock, message_handler_mock, _):
+        handler_mock = message_handler_mock.return_value
+        handler_mock.handle_telegram_message.side_effect = RuntimeError
+        handler_mock.side_effects_started = False
+
+        assert self.worker.process_entry(ENTRY_ID, ENTRY_FIELDS) is False
+
+        redis_mock.xack.assert_not_called()
+        handler_mock.store_failed_update.assert_not_called()
+        self.guards_redis_mock.delete.assert_called_once_with(IDEMPOTENCY_KEY)
+
+    def test_update_failed_after_side_effects_started_is_stored(
+        self, redis_mock, message_handler_mock, _
+    ):
+        handler_mock = message_handler_mock.return_value
+        handler_mock.handle_telegram_message.side_effect = RuntimeError
+        handler_mock.side_effects_started = True
+
+        assert self.worker.process_entry(ENTRY_ID, ENTRY_FIELDS) is True
+
+        exception = handler_mock.store_failed_update.call_args.args[0]
+        assert isinstance(exception, RuntimeError)
+        redis_mock.xack.assert_called_once()
+        self.guards_redis_mock.delete.assert_not_called()
+        self.guards_redis_mock.set.assert_called_once()
+
+    def test_processed_update_is_not_processed_again(
+        self, redis_mock, message_handler_mock, _
+    ):
+        self.guards_redis_mock.set.return_value = None
+        self.guards_redis_mock.get.return_value = UPDATE_DONE
+
+        assert self.worker.process_entry(ENTRY_ID, ENTRY_FIELDS) is True
+
+        message_handler_mock.assert_not_called()
+        redis_mock.xack.assert_called_once()
+
+    def test_update_interrupted_before_side_effects_is_processed_again(
+        self, redis_mock, message_handler_mock, _
+    ):
+        self.guards_redis_mock.set.return_value = None
+        self.guards_redis_mock.get.return_value = UPDATE_PROCESSING
+
+        assert self.worker.process_entry(ENTRY_ID, ENTRY_FIELDS) is True
+
+        handler_mock = message_handler_mock.return_value
+        handler_mock.handle_telegram_message.assert_called_once()
+        handler_mock.store_failed_update.assert_not_called()
+        redis_mock.xack.assert_called_once()
+        assert self.guards_redis_mock.set.call_args_list[-1] == mock.call(
+            IDEMPOTENCY_KEY, UPDATE_DONE, ex=mock.ANY
+        )
+
+    def test_interrupted_update_is_stored(self, redis_mock, message_handler_mock, _):
+        self.guards_redis_mock.set.return_value = None
+        self.guards_redis_mock.get.return_value = UPDATE_SIDE_EFFECTS_STARTED
+
+        assert self.worker.process_entry(ENTRY_ID, ENTRY_FIELDS) is True
+
+        handler_mock = message_handler_mock.return_value
+        handler_mock.handle_telegram_message.assert_not_called()
+        exception = handler_mock.store_failed_update.call_args.args[0]
+        assert isinstance(exception, UpdateInterruptedException)
+        assert handler_mock.store_failed_update.call_args.kwargs == {
+            "side_effects_started": True
+        }
+        redis_mock.xack.assert_called_once()
+
+    def test_update_of_locked_user_stays_pending(
+        self, redis_mock, message_handler_mock, _
+    ):
+        self.guards_redis_mock.lock.return_value.acquire.return_value = False
+
+        assert self.worker.process_entry(ENTRY_ID, ENTRY_FIELDS) is False
+
+        message_handler_mock.assert_not_called()
+        self.guards_redis_mock.set.assert_not_called()
+        redis_mock.xack.assert_not_called()
+
+    def test_read_new_entries(self, redis_mock, message_handler_mock, _):
+        redis_mock.xreadgroup.return_value = [
+            [UPDATES_STREAM_KEY.encode(), [(ENTRY_ID, ENTRY_FIELDS)]]
+        ]
+
+        assert self.worker.read_new_entries() == 1
+
+        redis_mock.xreadgroup.assert_called_once()
+        assert redis_mock.xreadgroup.call_args.args[:3] == (
+            UPDATE_WORKERS_GROUP,
+            "worker-1",
+            {UPDATES_STREAM_KEY: ">"},
+        )
+        redis_mock.xack.assert_called_once()
+
+    @override_settings(UPDATE_QUEUE_MAX_DELIVERIES=3)
+    def test_claimed_update_is_processed_again(
+        self, redis_mock, message_handler_mock, _
+    ):
+        redis_mock.xautoclaim.return_value = [b"0-0", [(ENTRY_ID, ENTRY_FIELDS)]]
+        redis_mock.xpending_range.return_value = [{"times_delivered": 3}]
+
+        assert self.worker.claim_pending_entries() == 1
+
+        message_handler_mock.assert_called_once()
+        redis_mock.xack.assert_called_once()
+
+    @override_settings(UPDATE_QUEUE_MAX_DELIVERIES=3)
+    def test_claimed_update_is_dropped_after_max_deliveries(
+        self, redis_mock, message_handler_mock, _
+    ):
+        redis_mock.xautoclaim.return_value = [b"0-0", [(ENTRY_ID, ENTRY_FIELDS)]]
+        redis_mock.xpending_range.return_value = [{"times_delivered": 4}]
+        self.guards_redis_mock.get.return_value = UPDATE_PROCESSING
+
+        assert self.worker.claim_pending_entries() == 1
+
+        handler_mock = message_handler_mock.return_value
+        handler_mock.handle_telegram_message.assert_not_called()
+        exception = handler_mock.store_failed_update.call_args.args[0]
+        assert isinstance(exception, UpdateDeliveriesExceededException)
+        assert handler_mock.store_failed_update.call_args.kwargs == {
+            "side_effects_started": False
+        }
+        redis_mock.xack.assert_called_once_with(
+            UPDATES_STREAM_KEY, UPDATE_WORKERS_GROUP, ENTRY_ID
+        )
+
+    @override_settings(UPDATE_QUEUE_MAX_DELIVERIES=3)
+    def test_update_failed_on_last_delivery_is_stored(
+        self, redis_mock, message_handler_mock, _
+    ):
+        redis_mock.xautoclaim.return_value = [b"0-0", [(ENTRY_ID, ENTRY_FIELDS)]]
+        redis_mock.xpending_range.return_value = [{"times_delivered": 3}]
+        handler_mock = message_handler_mock.return_value
+        handler_mock.handle_telegram_message.side_effect = RuntimeError
+
+        self.worker.claim_pending_entries()
+
+        exception = handler_mock.store_failed_update.call_args.args[0]
+        assert isinstance(exception, RuntimeError)
+        redis_mock.xack.assert_called_once()
+
+
+@mock.patch("telegram_bot.message_handling_services.requests.post")
+@mock.patch(
+    "telegram_bot.message_handling_services.SequentialMessagesProcessor.get_user_input"
+)
+@mock.patch("telegram_bot.update_queue.client")
+class TestUpdateWorkerRedelivery(TestCase):
+    def setUp(self):
+        self.worker = UpdateWorker(consumer_name="worker-1")
+        guards_client_patch = mock.patch("telegram_bot.update_guards.client")
+        self.guards_redis_mock = guards_client_patch.start()
+        self.addCleanup(guards_client_patch.stop)
+        self.guards_redis_mock.set.return_value = True
+
+    def test_update_failed_on_transient_error_is_processed_on_redelivery(
+        self, redis_mock, get_user_input_mock, post_mock
+    ):
+        get_user_input_mock.side_effect = RuntimeError("redis unavailable")
+
+        assert self.worker.process_entry(ENTRY_ID, ENTRY_FIELDS) is False
+
+        redis_mock.xack.assert_not_called()
+        post_mock.assert_not_called()
+        self.guards_redis_mock.delete.assert_called_once_with(IDEMPOTENCY_KEY)
+
+        get_user_input_mock.side_effect = None
+        get_user_input_mock.return_value = {}
+        assert self.worker.process_entry(ENTRY_ID, ENTRY_FIELDS) is True
+
+        redis_mock.xack.assert_called_once()
+        post_mock.assert_called_once()
+        assert self.guards_redis_mock.set.call_args_list == [
+            mock.call(IDEMPOTENCY_KEY, UPDATE_PROCESSING, nx=True, ex=mock.ANY),
+            mock.call(IDEMPOTENCY_KEY, UPDATE_PROCESSING, nx=True, ex=mock.ANY),
+            mock.call(IDEMPOTENCY_KEY, UPDATE_SIDE_EFFECTS_STARTED, ex=mock.ANY),
+            mock.call(IDEMPOTENCY_KEY, UPDATE_DONE, ex=mock.ANY),
+        ]
+
+
+@mock.patch("telegram_bot.update_queue.client")
+class TestCreateUpdateWorkersGroup(SimpleTestCase):
+    def test_existing_group(self, redis_mock):
+        redis_mock.xgroup_create.side_effect = ResponseError(
+            "BUSYGROUP Consumer Group name already exists"
+        )
+
+        create_update_workers_group()
+
+    def test_other_error(self, redis_mock):
+        redis_mock.xgroup_create.side_effect = ResponseError("WRONGTYPE")
+
+        with self.assertRaises(ResponseError):
+            create_update_workers_group()
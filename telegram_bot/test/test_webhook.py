@@ -0,0 +1,171 @@
+import asyncio
+import json
+from copy import deepcopy
+from unittest import mock
+
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from telegram_bot.constants import BASE_URL
+from telegram_bot.management.commands.benchmark_webhook_path import (
+    build_webhook_environ,
+)
+from telegram_bot.test.base import TelegramBotRequestsTestBase
+from telegram_bot.webhook import (
+    WEBHOOK_PATH,
+    LeanWebhookASGIApplication,
+    LeanWebhookWSGIApplication,
+)
+
+
+class TestLeanWebhookWSGIApplication(TelegramBotRequestsTestBase):
+    def setUp(self):
+        super().setUp()
+        # As in the django test client, the connection of the test transaction
+        # must not be closed at the end of the request.
+        for signal in (request_started, request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+        self.django_application = mock.Mock(return_value=[b"django"])
+        self.application = LeanWebhookWSGIApplication(self.django_application)
+        self.start_response = mock.Mock()
+
+    def _post(self, body: bytes, secret_token: str | None = None) -> bytes:
+        return b"".join(
+            self.application(
+                build_webhook_environ(body, secret_token), self.start_response
+            )
+        )
+
+    def test_webhook_path_is_the_api_view_path(self):
+        assert WEBHOOK_PATH == reverse("telegram_bot:telegram_bot-user-message")
+
+    @mock.patch("telegram_bot.message_handling_services.requests.post")
+    def test_update_is_handled_without_django(self, mock_post):
+        payload = deepcopy(self.command_as_message_in_private_chat_request_payload)
+
+        self._post(json.dumps(payload).encode())
+
+        self.start_response.assert_called_once()
+        assert self.start_response.call_args.args[0] == "200 OK"
+        self.django_application.assert_not_called()
+        assert mock_post.call_args.kwargs["url"] == BASE_URL + "sendMessage"
+
+    def test_invalid_json_is_rejected(self):
+        self._post(b"{")
+
+        assert self.start_response.call_args.args[0] == "400 Bad Request"
+
+    def test_invalid_update_is_rejected(self):
+        response = self._post(json.dumps({"message": {}}).encode())
+
+        assert self.start_response.call_args.args[0] == "400 Bad Request"
+        assert "chat" in json.loads(response)["message"]
+
+    @override_settings(TELEGRAM_WEBHOOK_SECRET_TOKEN="secret")
+    @mock.patch("telegram_bot.webhook.process_webhook_request")
+    def test_request_with_secret_token_is_handled(self, mock_process):
+        mock_process.return_value = (status.HTTP_200_OK, b"")
+
+        self._post(b"{}", secret_token="secret")
+
+        assert self.start_response.call_args.args[0] == "200 OK"
+        mock_process.assert_called_once_with(b"{}")
+
+    @override_settings(TELEGRAM_WEBHOOK_SECRET_TOKEN="secret")
+    @mock.patch("telegram_bot.webhook.process_webhook_request")
+    def test_request_without_secret_token_is_rejected(self, mock_process):
+        for secret_token in (None, "wrong", ""):
+            self._post(b"{}", secret_token=secret_token)
+
+            assert self.start_response.call_args.args[0] == "403 Forbidden"
+        mock_process.assert_not_called()
+
+    def test_other_requests_are_passed_to_django(self):
+        environ = build_webhook_environ(b"")
+        environ["REQUEST_METHOD"] = "GET"
+
+        response = self.application(environ, self.start_response)
+
+        assert response == [b"django"]
+        self.django_application.assert_called_once_with(environ, self.start_response)
+
+
+class TestLeanWebhookASGIApplication(TelegramBotRequestsTestBase):
+    def setUp(self):
+        super().setUp()
+        self.django_application = mock.AsyncMock()
+        self.application = LeanWebhookASGIApplication(self.django_application)
+
+    @staticmethod
+    def _get_scope(method: str, path: str, headers: list | None = None) -> dict:
+        return {
+            "type": "http",
+            "method": method,
+            "path": path,
+            "headers": headers or [],
+        }
+
+    def _call(self, scope: dict, body: bytes) -> list[dict]:
+        messages = [
+            {"type": "http.request", "body": body[:10], "more_body": True},
+            {"type": "http.request", "body": body[10:], "more_body": False},
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(self.application(scope, receive, send))
+        return sent
+
+    @mock.patch("telegram_bot.webhook.process_webhook_request")
+    def test_update_is_handled_without_django(self, mock_process):
+        mock_process.return_value = (status.HTTP_200_OK, b"")
+        body = json.dumps(self.command_as_message_in_group_request_payload).encode()
+
+        sent = self._call(self._get_scope("POST", WEBHOOK_PATH), body)
+
+        mock_process.assert_called_once_with(body)
+        assert sent[0]["status"] == status.HTTP_200_OK
+        assert sent[1] == {"type": "http.response.body", "body": b""}
+        self.django_application.assert_not_called()
+
+    @override_settings(TELEGRAM_WEBHOOK_SECRET_TOKEN="secret")
+    @mock.patch("telegram_bot.webhook.process_webhook_request")
+    def test_request_with_secret_token_is_handled(self, mock_process):
+        mock_process.return_value = (status.HTTP_200_OK, b"")
+        scope = self._get_scope(
+            "POST", WEBHOOK_PATH, [(b"x-telegram-bot-api-secret-token", b"secret")]
+        )
+
+        sent = self._call(scope, b"{}")
+
+        mock_process.assert_called_once_with(b"{}")
+        assert sent[0]["status"] == status.HTTP_200_OK
+
+    @override_settings(TELEGRAM_WEBHOOK_SECRET_TOKEN="secret")
+    @mock.patch("telegram_bot.webhook.process_webhook_request")
+    def test_request_without_secret_token_is_rejected(self, mock_process):
+        scope = self._get_scope(
+            "POST", WEBHOOK_PATH, [(b"x-telegram-bot-api-secret-token", b"wrong")]
+        )
+
+        sent = self._call(scope, b"{}")
+
+        mock_process.assert_not_called()
+        assert sent[0]["status"] == status.HTTP_403_FORBIDDEN
+
+    def test_other_requests_are_passed_to_django(self):
+        scope = self._get_scope("GET", "/admin/")
+
+        sent = self._call(scope, b"")
+
+        assert sent == []
+        self.django_application.assert_awaited_once()
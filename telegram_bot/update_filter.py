@@ -0,0 +1,64 @@
+import requests
+
+from telegram_bot.constants import BASE_URL
+from telegram_bot.enums import UpdateKind
+from telegram_bot.logger_config import logger
+from telegram_bot.messages_texts import UNSUPPORTED_MESSAGE_RESPONSE
+from telegram_bot.metrics import count_skipped_update, current_processor, measure_stage
+
+# The update types handled by MessageHandler, also sent as allowed_updates by
+# set_webhook so telegram does not deliver the others at all.
+SUPPORTED_UPDATE_TYPES = [
+    "message",
+    "edited_message",
+    "callback_query",
+    "my_chat_member",
+]
+SUPPORTED_MESSAGE_KEYS = ("text", "left_chat_member")
+UNSUPPORTED_UPDATE_PROCESSOR = "UnsupportedUpdate"
+
+
+def classify_update(update: dict) -> UpdateKind:
+    # Only the top level keys are looked at, the malformed updates are left
+    # to the serializer.
+    if not isinstance(update, dict):
+        return UpdateKind.SUPPORTED
+    if not any(update_type in update for update_type in SUPPORTED_UPDATE_TYPES):
+        return UpdateKind.UNSUPPORTED_UPDATE
+    message = update.get("message") or update.get("edited_message")
+    if isinstance(message, dict) and not any(
+        key in message for key in SUPPORTED_MESSAGE_KEYS
+    ):
+        return UpdateKind.UNSUPPORTED_MESSAGE
+    return UpdateKind.SUPPORTED
+
+
+@measure_stage("telegram_send")
+def _send_unsupported_message_response(chat_id: int) -> requests.Response:
+    return requests.post(
+        url=BASE_URL + "sendMessage",
+        data={"chat_id": chat_id, "text": UNSUPPORTED_MESSAGE_RESPONSE},
+    )
+
+
+def reject_unsupported_update(update: dict) -> bool:
+    # Returns True if the update is unsupported and needs no further handling.
+    # A new private message gets the text only response, the rest are dropped.
+    update_kind = classify_update(update)
+    if update_kind is UpdateKind.SUPPORTED:
+        return False
+    current_processor_token = current_processor.set(UNSUPPORTED_UPDATE_PROCESSOR)
+    try:
+        logger.info(f"Unsupported update dropped: {update_kind.name}")
+        count_skipped_update()
+        chat = (update.get("message") or {}).get("chat") or {}
+        if update_kind is UpdateKind.UNSUPPORTED_MESSAGE and (
+            chat.get("type") == "private"
+        ):
+            try:
+                _send_unsupported_message_response(chat["id"])
+            except requests.RequestException as e:
+                logger.error(f"Unsupported message response failed: {e}")
+    finally:
+        current_processor.reset(current_processor_token)
+    return True
@@ -0,0 +1,122 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from redis.exceptions import LockError, LockNotOwnedError
+
+from telegram_bot.logger_config import logger
+from telegram_bot.redis_client import client
+from telegram_bot.redis_keys import get_update_idempotency_key, get_user_lock_key
+
+UPDATE_PROCESSING = b"processing"
+UPDATE_SIDE_EFFECTS_STARTED = b"side_effects_started"
+UPDATE_DONE = b"done"
+UPDATE_TYPES_WITH_SENDER = (
+    "message",
+    "edited_message",
+    "callback_query",
+    "my_chat_member",
+)
+
+
+# Set right before the first write or Telegram request made for an update. An
+# update failed before that had no side effects and may be processed again.
+_side_effects_started: ContextVar[bool] = ContextVar(
+    "side_effects_started", default=False
+)
+
+
+@contextmanager
+def track_side_effects():
+    # Yields a callable telling whether a side effect was started in the block.
+    token = _side_effects_started.set(False)
+    try:
+        yield _side_effects_started.get
+    finally:
+        _side_effects_started.reset(token)
+
+
+# The idempotency key of the update processed under guard_update.
+_guarded_update_key: ContextVar[str | None] = ContextVar(
+    "guarded_update_key", default=None
+)
+
+
+@contextmanager
+def guard_update(user_id: int, update_id: int):
+    # The idempotency key of the update is moved to the side effects started
+    # state at its first side effect, so an update left in the processing
+    # state by a stopped worker is known to have had none.
+    token = _guarded_update_key.set(get_update_idempotency_key(user_id, update_id))
+    try:
+        yield
+    finally:
+        _guarded_update_key.reset(token)
+
+
+def mark_side_effects_started():
+    if _side_effects_started.get():
+        return
+    update_key = _guarded_update_key.get()
+    if update_key is not None:
+        client.set(
+            update_key,
+            UPDATE_SIDE_EFFECTS_STARTED,
+            ex=settings.UPDATE_IDEMPOTENCY_TTL_SECONDS,
+        )
+    _side_effects_started.set(True)
+
+
+def get_update_user_id(update: dict) -> int | None:
+    for update_type in UPDATE_TYPES_WITH_SENDER:
+        if update_type in update:
+            return update[update_type].get("from", {}).get("id")
+    return None
+
+
+def claim_update(user_id: int, update_id: int) -> bool:
+    # Returns False if the update is processed or was being processed already.
+    return bool(
+        client.set(
+            get_update_idempotency_key(user_id, update_id),
+            UPDATE_PROCESSING,
+            nx=True,
+            ex=settings.UPDATE_IDEMPOTENCY_TTL_SECONDS,
+        )
+    )
+
+
+def get_update_state(user_id: int, update_id: int) -> bytes | None:
+    return client.get(get_update_idempotency_key(user_id, update_id))
+
+
+def complete_update(user_id: int, update_id: int):
+    client.set(
+        get_update_idempotency_key(user_id, update_id),
+        UPDATE_DONE,
+        ex=settings.UPDATE_IDEMPOTENCY_TTL_SECONDS,
+    )
+
+
+def release_update(user_id: int, update_id: int):
+    # For the updates failed before any side effect, they may be processed again.
+    client.delete(get_update_idempotency_key(user_id, update_id))
+
+
+@contextmanager
+def user_lock(user_id: int):
+    # Raises redis.exceptions.LockError if the lock is not acquired in time.
+    lock = client.lock(
+        get_user_lock_key(user_id),
+        timeout=settings.USER_LOCK_TIMEOUT_SECONDS,
+        blocking_timeout=settings.USER_LOCK_TIMEOUT_SECONDS,
+    )
+    if not lock.acquire():
+        raise LockError(f"Lock of user {user_id} not acquired.")
+    try:
+        yield
+    finally:
+        try:
+            lock.release()
+        except LockNotOwnedError:
+            logger.warning(f"Lock of user {user_id} expired while held.")
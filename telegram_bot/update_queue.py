@@ -0,0 +1,242 @@
+import json
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from redis.exceptions import LockError, ResponseError
+
+from telegram_bot.exceptions import (
+    UpdateDeliveriesExceededException,
+    UpdateInterruptedException,
+)
+from telegram_bot.logger_config import logger
+from telegram_bot.message_handling_services import MessageHandler
+from telegram_bot.metrics import count_exception
+from telegram_bot.redis_client import client
+from telegram_bot.redis_keys import UPDATES_STREAM_KEY
+from telegram_bot.update_guards import (
+    UPDATE_DONE,
+    UPDATE_PROCESSING,
+    UPDATE_SIDE_EFFECTS_STARTED,
+    claim_update,
+    complete_update,
+    get_update_state,
+    get_update_user_id,
+    guard_update,
+    release_update,
+    user_lock,
+)
+
+UPDATE_WORKERS_GROUP = "update_workers"
+UPDATE_QUEUE_READ_COUNT = 10
+UPDATE_QUEUE_BLOCK_MILLISECONDS = 5000
+UPDATE_QUEUE_CLAIM_INTERVAL = 5.0
+
+
+def enqueue_update(update: dict) -> str:
+    entry_id = client.xadd(
+        UPDATES_STREAM_KEY,
+        {"update": json.dumps(update)},
+        maxlen=settings.UPDATE_QUEUE_MAX_LENGTH,
+        approximate=True,
+    )
+    return entry_id.decode()
+
+
+def handle_update(update: dict):
+    # Called by the webhook with a validated update.
+    if settings.UPDATE_QUEUE:
+        enqueue_update(update)
+    else:
+        MessageHandler(telegram_message=update).handle_telegram_message()
+
+
+def create_update_workers_group():
+    try:
+        client.xgroup_create(
+            UPDATES_STREAM_KEY, UPDATE_WORKERS_GROUP, id="0", mkstream=True
+        )
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def get_default_consumer_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class UpdateWorker:
+    # Updates are acknowledged after they are processed, the ones of a crashed
+    # or failing worker stay pending and are claimed again after
+    # UPDATE_QUEUE_CLAIM_IDLE_SECONDS. The updates of a user are processed one
+    # at a time under the user lock, and the idempotency key of an update
+    # keeps a redelivered update from being processed twice.
+
+    def __init__(self, consumer_name: str | None = None):
+        self.consumer_name = consumer_name or get_default_consumer_name()
+
+    def _acknowledge(self, entry_id: bytes):
+        client.xack(UPDATES_STREAM_KEY, UPDATE_WORKERS_GROUP, entry_id)
+
+    def _get_delivery_count(self, entry_id: bytes) -> int:
+        pending = client.xpending_range(
+            UPDATES_STREAM_KEY,
+            UPDATE_WORKERS_GROUP,
+            min=entry_id,
+            max=entry_id,
+            count=1,
+        )
+        return pending[0]["times_delivered"] if pending else 0
+
+    def process_entry(
+        self, entry_id: bytes, fields: dict[bytes, bytes], last_delivery: bool = False
+    ) -> bool:
+        # Returns True if the update was acknowledged.
+        update = json.loads(fields[b"update"])
+        # The updates without a sender share the guards of user 0.
+        user_id = get_update_user_id(update) or 0
+        try:
+            with user_lock(user_id):
+                return self._process_update(entry_id, update, user_id, last_delivery)
+        except LockError as e:
+            logger.warning(f"Update {entry_id.decode()} postponed: {e}")
+            return False
+
+    def _skip_claimed_update(
+        self, entry_id: bytes, update: dict, update_state: bytes | None
+    ) -> bool:
+        if update_state is None:
+            # Released after a failure in the meantime, delivered again later.
+            return False
+        if update_state == UPDATE_SIDE_EFFECTS_STARTED:
+            # A worker stopped while processing it, messages may have been sent.
+            logger.error(
+                f"Update {entry_id.decode()} interrupted, not processed again."
+            )
+            MessageHandler(telegram_message=update).store_failed_update(
+                UpdateInterruptedException(), side_effects_started=True
+            )
+        elif update_state == UPDATE_DONE:
+            logger.info(f"Update {entry_id.decode()} processed already.")
+        self._acknowledge(entry_id)
+        return True
+
+    def _process_update(
+        self, entry_id: bytes, update: dict, user_id: int, last_delivery: bool
+    ) -> bool:
+        # An update failed before its first side effect is released and
+        # delivered again, up to the last delivery. An update failed after
+        # that is moved to the FailedUpdate dead letters right away, with its
+        # idempotency key left in the side effects started state.
+        update_id = update["update_id"]
+        if not claim_update(user_id, update_id):
+            update_state = get_update_state(user_id, update_id)
+            if update_state != UPDATE_PROCESSING:
+                return self._skip_claimed_update(entry_id, update, update_state)
+            # A worker stopped before any side effect of the update, it is
+            # processed again under the user lock.
+            logger.warning(f"Update {entry_id.decode()} interrupted, processed again.")
+        handler = MessageHandler(telegram_message=update, raise_exceptions=True)
+        try:
+            # The connection is checked the same way as between the requests.
+            close_old_connections()
+            with guard_update(user_id, update_id):
+                handler.handle_telegram_message()
+        except Exception as e:
+            logger.exception(f"Update {entry_id.decode()} failed: {e}")
+            count_exception(e)
+            if not handler.side_effects_started:
+                release_update(user_id, update_id)
+                if not last_delivery:
+                    return False
+            handler.store_failed_update(e)
+        else:
+            complete_update(user_id, update_id)
+        self._acknowledge(entry_id)
+        return True
+
+    def _process_claimed_entry(self, entry_id: bytes, fields: dict[bytes, bytes]):
+        delivery_count = self._get_delivery_count(entry_id)
+        if delivery_count > settings.UPDATE_QUEUE_MAX_DELIVERIES:
+            # The worker stopped while processing it every time.
+            logger.error(
+                f"Update {entry_id.decode()} dropped after "
+                f"{settings.UPDATE_QUEUE_MAX_DELIVERIES} deliveries."
+            )
+            update = json.loads(fields[b"update"])
+            update_state = get_update_state(
+                get_update_user_id(update) or 0, update["update_id"]
+            )
+            if update_state != UPDATE_DONE:
+                MessageHandler(telegram_message=update).store_failed_update(
+                    UpdateDeliveriesExceededException(
+                        settings.UPDATE_QUEUE_MAX_DELIVERIES
+                    ),
+                    side_effects_started=update_state == UPDATE_SIDE_EFFECTS_STARTED,
+                )
+            self._acknowledge(entry_id)
+            return
+        self.process_entry(
+            entry_id,
+            fields,
+            last_delivery=delivery_count == settings.UPDATE_QUEUE_MAX_DELIVERIES,
+        )
+
+    def claim_pending_entries(self) -> int:
+        claimed_count = 0
+        start_id = "0-0"
+        while True:
+            start_id, entries, *_ = client.xautoclaim(
+                UPDATES_STREAM_KEY,
+                UPDATE_WORKERS_GROUP,
+                self.consumer_name,
+                min_idle_time=settings.UPDATE_QUEUE_CLAIM_IDLE_SECONDS * 1000,
+                start_id=start_id,
+                count=UPDATE_QUEUE_READ_COUNT,
+            )
+            for entry_id, fields in entries:
+                # The entries deleted by the stream trimming have no fields.
+                if fields:
+                    self._process_claimed_entry(entry_id, fields)
+                else:
+                    self._acknowledge(entry_id)
+            claimed_count += len(entries)
+            if start_id in (b"0-0", "0-0"):
+                return claimed_count
+
+    def read_new_entries(self) -> int:
+        response = client.xreadgroup(
+            UPDATE_WORKERS_GROUP,
+            self.consumer_name,
+            {UPDATES_STREAM_KEY: ">"},
+            count=UPDATE_QUEUE_READ_COUNT,
+            block=UPDATE_QUEUE_BLOCK_MILLISECONDS,
+        )
+        entries_count = 0
+        for _, entries in response or []:
+            for entry_id, fields in entries:
+                self.process_entry(entry_id, fields)
+            entries_count += len(entries)
+        return entries_count
+
+    def run(self):
+        create_update_workers_group()
+        logger.info(
+            f"Waiting for updates on {UPDATES_STREAM_KEY} as {self.consumer_name}"
+        )
+        claimed_at = None
+        while True:
+            try:
+                now = time.monotonic()
+                if (
+                    claimed_at is None
+                    or now - claimed_at >= UPDATE_QUEUE_CLAIM_INTERVAL
+                ):
+                    claimed_at = now
+                    self.claim_pending_entries()
+                self.read_new_entries()
+            except Exception as e:
+                logger.exception(f"Exception: {e}")
+                count_exception(e)
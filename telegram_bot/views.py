@@ -1,3 +1,22 @@
-from django.shortcuts import render
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
 
-# Create your views here.
+from telegram_bot.metrics import SessionsCollector, get_metrics_registry
+from telegram_bot.sequential_messages_processor import SequentialMessagesProcessor
+
+sessions_registry = CollectorRegistry()
+sessions_registry.register(
+    SessionsCollector(
+        count_open_sessions=SequentialMessagesProcessor.count_open_sessions,
+        count_abandoned_sessions=SequentialMessagesProcessor.count_abandoned_sessions,
+    )
+)
+
+
+@require_GET
+def metrics(request):
+    output = generate_latest(get_metrics_registry()) + generate_latest(
+        sessions_registry
+    )
+    return HttpResponse(output, content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,116 @@
+import json
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
+from django.core.signals import request_finished, request_started
+
+from telegram_bot.logger_config import log_payload, logger
+from telegram_bot.permissions import is_secret_token_valid
+from telegram_bot.serializers import TelegramBotSerializer
+from telegram_bot.update_filter import reject_unsupported_update
+from telegram_bot.update_queue import handle_update
+
+WEBHOOK_PATH = "/api/telegram_bot/user_message/"
+JSON_HEADERS = [(b"content-type", b"application/json")]
+SECRET_TOKEN_WSGI_KEY = "HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN"
+SECRET_TOKEN_ASGI_HEADER = b"x-telegram-bot-api-secret-token"
+FORBIDDEN_RESPONSE = (HTTPStatus.FORBIDDEN, b'{"detail": "Invalid secret token."}')
+
+
+def process_webhook_request(body: bytes) -> tuple[int, bytes]:
+    # Does what TelegramBotApiView.user_message does, without the middlewares,
+    # the url resolving and the DRF request and response handling.
+    # The request signals close or check the database connections as usual.
+    request_started.send(sender=process_webhook_request)
+    try:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, b'{"detail": "JSON parse error"}'
+        if reject_unsupported_update(data):
+            return HTTPStatus.OK, b""
+        log_payload("Received request with data", data)
+        serializer = TelegramBotSerializer(data=data)
+        if not serializer.is_valid():
+            return HTTPStatus.BAD_REQUEST, json.dumps(serializer.errors).encode()
+        handle_update(data)
+        return HTTPStatus.OK, b""
+    except Exception as e:
+        logger.exception(f"Exception: {e}")
+        return HTTPStatus.INTERNAL_SERVER_ERROR, b""
+    finally:
+        request_finished.send(sender=process_webhook_request)
+
+
+def is_webhook_request(method: str, path: str) -> bool:
+    return method == "POST" and path == WEBHOOK_PATH
+
+
+class LeanWebhookWSGIApplication:
+    # Handles the webhook requests before django, the other requests are
+    # passed to the django application. Requests without the secret token are
+    # rejected before the body is read.
+
+    def __init__(self, application):
+        self.application = application
+
+    def __call__(self, environ, start_response):
+        if not is_webhook_request(environ["REQUEST_METHOD"], environ["PATH_INFO"]):
+            return self.application(environ, start_response)
+        if not is_secret_token_valid(environ.get(SECRET_TOKEN_WSGI_KEY)):
+            status_code, body = FORBIDDEN_RESPONSE
+        else:
+            content_length = int(environ.get("CONTENT_LENGTH") or 0)
+            status_code, body = process_webhook_request(
+                environ["wsgi.input"].read(content_length)
+            )
+        status = HTTPStatus(status_code)
+        start_response(
+            f"{status.value} {status.phrase}",
+            [(name.decode(), value.decode()) for name, value in JSON_HEADERS]
+            + [("Content-Length", str(len(body)))],
+        )
+        return [body]
+
+
+class LeanWebhookASGIApplication:
+    def __init__(self, application):
+        self.application = application
+
+    @staticmethod
+    def _get_secret_token(scope) -> str | None:
+        for name, value in scope["headers"]:
+            if name == SECRET_TOKEN_ASGI_HEADER:
+                return value.decode("latin-1")
+        return None
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                return body
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not is_webhook_request(
+            scope["method"], scope["path"]
+        ):
+            return await self.application(scope, receive, send)
+        if not is_secret_token_valid(self._get_secret_token(scope)):
+            status_code, response_body = FORBIDDEN_RESPONSE
+        else:
+            body = await self._read_body(receive)
+            status_code, response_body = await sync_to_async(
+                process_webhook_request, thread_sensitive=True
+            )(body)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": JSON_HEADERS
+                + [(b"content-length", str(len(response_body)).encode())],
+            }
+        )
+        await send({"type": "http.response.body", "body": response_body})